@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Profile, Project, Issue, Comment, Attachment, ProjectAttachment  # adjust to your existing imports
+from .models import Profile, Project, Issue, Comment, Attachment, ProjectAttachment, Job, ChunkedUpload  # adjust to your existing imports
 admin.site.register(Project)
 
 @admin.register(Profile)
@@ -7,3 +7,16 @@ class ProfileAdmin(admin.ModelAdmin):
     list_display = ("user", "role", "department")
     list_filter = ("role", "department")
     search_fields = ("user__username", "user__email")
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "attempts", "run_at", "locked_by", "finished_at")
+    list_filter = ("status", "name")
+    readonly_fields = ("last_error",)
+
+
+@admin.register(ChunkedUpload)
+class ChunkedUploadAdmin(admin.ModelAdmin):
+    list_display = ("filename", "user", "target", "target_id", "received", "size", "status", "updated_at")
+    list_filter = ("status", "target")
@@ -7,4 +7,4 @@ class BoardConfig(AppConfig):
 
     def ready(self):
         # import signals so Django registers them
-        from . import signals  # noqa
+        from . import checks, signals  # noqa
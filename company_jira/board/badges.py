@@ -0,0 +1,64 @@
+# board/badges.py
+"""
+Nav badge counts (open / overdue issues, unread notifications).
+
+``unread`` is the user's denormalized NotificationCounter row (see
+board.notifications.bump_unread), a primary-key read that is never
+cached: it changes with every notification and has to agree in every
+worker at once.
+
+The two issue COUNTs are cached per user when BOARD_SHARED_CACHE says
+the default cache is shared by all workers. The entry is dropped
+whenever an issue assigned to the user changes (see board.signals);
+with a per-process cache that delete would only reach one worker, so
+then the counts are computed per request instead.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Issue, NotificationCounter
+
+SHARED_CACHE = getattr(settings, "BOARD_SHARED_CACHE", False)
+# safety net for writes that bypass signals (queryset.update etc.)
+NAV_COUNTS_TIMEOUT = getattr(settings, "BOARD_NAV_COUNTS_TIMEOUT", 10 * 60)
+
+
+def _cache_key(user_id):
+    return f"board:nav-counts:{user_id}"
+
+
+def _compute(user_id, today):
+    open_issues = Issue.objects.filter(assignee_id=user_id).exclude(status="DONE")
+    return {
+        "date": today.isoformat(),
+        "open": open_issues.count(),
+        "overdue": open_issues.filter(due_date__lt=today).count(),
+    }
+
+
+def unread_count(user_id):
+    return NotificationCounter.objects.filter(pk=user_id).values_list("unread", flat=True).first() or 0
+
+
+def get_nav_counts(user):
+    """
+    {"open": .., "overdue": .., "unread": ..} for ``user``. Overdue
+    depends on the date, so yesterday's cache entry is treated as a miss.
+    """
+    today = timezone.localdate()
+    counts = None
+    if SHARED_CACHE:
+        key = _cache_key(user.pk)
+        counts = cache.get(key)
+    if counts is None or counts.get("date") != today.isoformat():
+        counts = _compute(user.pk, today)
+        if SHARED_CACHE:
+            cache.set(key, counts, NAV_COUNTS_TIMEOUT)
+    return {**counts, "unread": unread_count(user.pk)}
+
+
+def invalidate_nav_counts(*user_ids):
+    keys = [_cache_key(uid) for uid in set(user_ids) if uid]
+    if SHARED_CACHE and keys:
+        cache.delete_many(keys)
@@ -0,0 +1,198 @@
+# board/blobs.py
+"""
+Content-addressed storage for attachment files.
+
+Every uploaded file is hashed (SHA-256, streamed in chunks) and stored
+once under ``blobs/<aa>/<bb>/<sha256>``, however many Attachment and
+ProjectAttachment rows use it. The Blob row counts those references;
+when the last row goes, the file is deleted after the transaction
+commits.
+
+Rows are wired up from board.signals: ``attachment_pre_save`` swaps a
+freshly uploaded file for its blob (so views keep saving attachments
+the usual way), and ``attachment_saved`` / ``attachment_deleted``
+keep ``ref_count`` right. ``manage.py rebuild_blob_refs`` recounts it
+from the tables.
+"""
+import hashlib
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, Value
+from django.db.models.functions import Greatest
+
+from .models import Attachment, Blob, ProjectAttachment
+from .previews import remove_preview
+
+BLOB_DIR = "blobs"
+_TEMP_DIR = "tmp"
+_CHUNK = 64 * 1024
+
+_SNAPSHOT_ATTR = "_blob_snapshot"
+
+
+def blob_name(sha256):
+    """Storage name (relative to MEDIA_ROOT) of the blob with this hash."""
+    return f"{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def _full_path(name):
+    return os.path.join(settings.MEDIA_ROOT, *name.split("/"))
+
+
+def _hash_to_temp(content):
+    """
+    Stream ``content`` into a temp file under the blob directory while
+    hashing it. Uploads Django already spooled to disk (and finished
+    chunked uploads) are hashed in place and moved, not copied.
+    Returns ``(sha256, size, temp_path, owned)``; ``owned`` says the temp
+    file is ours to delete.
+    """
+    digest = hashlib.sha256()
+    size = 0
+
+    if hasattr(content, "temporary_file_path"):
+        path = content.temporary_file_path()
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(_CHUNK), b""):
+                digest.update(chunk)
+                size += len(chunk)
+        return digest.hexdigest(), size, path, False
+
+    temp_dir = _full_path(f"{BLOB_DIR}/{_TEMP_DIR}")
+    os.makedirs(temp_dir, exist_ok=True)
+    path = os.path.join(temp_dir, uuid.uuid4().hex)
+    with open(path, "wb") as out:
+        for chunk in content.chunks(_CHUNK):
+            digest.update(chunk)
+            size += len(chunk)
+            out.write(chunk)
+    return digest.hexdigest(), size, path, True
+
+
+def store(content):
+    """
+    Put ``content`` (a django File) in the blob store, or find the copy
+    that is already there, and take a reference to it. Returns the Blob.
+    """
+    sha256, size, temp_path, owned = _hash_to_temp(content)
+    final_path = _full_path(blob_name(sha256))
+
+    with transaction.atomic():
+        blob, created = Blob.objects.select_for_update().get_or_create(
+            sha256=sha256, defaults={"size": size}
+        )
+        # A new row always brings its own copy: a file already at the path
+        # may belong to a blob deleted a moment ago, whose on-commit
+        # removal hasn't run yet.
+        if os.path.exists(final_path) and not created:
+            if owned:
+                os.remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            if owned:
+                os.replace(temp_path, final_path)
+            else:
+                # already on disk (spooled upload, finished chunked upload): move it
+                file_move_safe(temp_path, final_path, allow_overwrite=True)
+        Blob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") + 1)
+    return blob
+
+
+def release(blob_id):
+    """Drop one reference; the last one deletes the row and (after commit) the file."""
+    with transaction.atomic():
+        Blob.objects.filter(pk=blob_id).update(
+            ref_count=Greatest(F("ref_count") - 1, Value(0), output_field=IntegerField())
+        )
+        _delete_unreferenced([blob_id])
+
+
+def _delete_unreferenced(blob_ids):
+    unused = Blob.objects.filter(pk__in=blob_ids, ref_count=0)
+    shas = list(unused.values_list("sha256", flat=True))
+    names = [blob_name(sha) for sha in shas]
+    if not names:
+        return
+    unused.delete()
+
+    def remove_files():
+        # a sha stored again since the delete has a new row and owns the file
+        revived = set(Blob.objects.filter(sha256__in=shas).values_list("sha256", flat=True))
+        for sha, name in zip(shas, names):
+            if sha in revived:
+                continue
+            try:
+                os.remove(_full_path(name))
+            except FileNotFoundError:
+                pass
+            remove_preview(name)
+
+    transaction.on_commit(remove_files)
+
+
+# ---------------------------------------------------------------------
+# attachment hooks (see board.signals)
+# ---------------------------------------------------------------------
+def remember_blob(instance):
+    setattr(instance, _SNAPSHOT_ATTR, instance.__dict__.get("blob_id"))
+
+
+def attachment_pre_save(instance):
+    """Replace a newly assigned upload with a reference to its blob."""
+    field_file = instance.file
+    if not field_file or field_file._committed:
+        return
+    if not instance.original_name:
+        instance.original_name = os.path.basename(field_file.name)[:255]
+    blob = store(field_file.file)
+    instance.blob = blob
+    # point the field at the blob and mark it saved, so FileField.pre_save
+    # doesn't write a second copy under upload_to
+    field_file.name = blob_name(blob.sha256)
+    field_file._committed = True
+
+
+def attachment_saved(instance):
+    old_blob_id = getattr(instance, _SNAPSHOT_ATTR, None)
+    if old_blob_id and old_blob_id != instance.blob_id:
+        release(old_blob_id)
+    remember_blob(instance)
+
+
+def attachment_deleted(instance):
+    blob_id = instance.__dict__.get("blob_id")
+    if blob_id:
+        release(blob_id)
+
+
+def rebuild_refs():
+    """
+    Recount ``ref_count`` from both attachment tables and delete blobs
+    nothing points at. Returns ``(updated, deleted)``.
+    """
+    counts = {}
+    for model in (Attachment, ProjectAttachment):
+        rows = (
+            model.objects.filter(blob__isnull=False)
+            .order_by()
+            .values("blob_id")
+            .annotate(n=Count("pk"))
+            .values_list("blob_id", "n")
+        )
+        for blob_id, n in rows:
+            counts[blob_id] = counts.get(blob_id, 0) + n
+
+    updated = 0
+    with transaction.atomic():
+        for blob in Blob.objects.only("pk", "ref_count").iterator(chunk_size=1000):
+            actual = counts.get(blob.pk, 0)
+            if blob.ref_count != actual:
+                Blob.objects.filter(pk=blob.pk).update(ref_count=actual)
+                updated += 1
+        orphan_ids = list(Blob.objects.filter(ref_count=0).values_list("pk", flat=True))
+        _delete_unreferenced(orphan_ids)
+    return updated, len(orphan_ids)
@@ -0,0 +1,24 @@
+# board/checks.py
+"""System checks for settings the board relies on."""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+_PER_PROCESS_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    if getattr(settings, "BOARD_SHARED_CACHE", False) and backend in _PER_PROCESS_CACHES:
+        return [
+            Error(
+                "BOARD_SHARED_CACHE is True but the default cache is per process.",
+                hint="Point CACHES['default'] at Redis, Memcached or the database cache, "
+                "or set BOARD_SHARED_CACHE = False.",
+                id="board.E001",
+            )
+        ]
+    return []
@@ -0,0 +1,115 @@
+# board/conditional.py
+"""
+ETag functions for conditional GET on the pages people keep refreshing.
+
+Each function builds a cheap version token for everything the page
+shows (scope aggregates, Project.generation, the viewer's role and bell count, the CSRF
+cookie that forms on the page are bound to, the query string, today's date). If the
+browser sends the same token back in If-None-Match, Django's
+``condition`` decorator answers 304 without running the view.
+
+Returning None disables the check for that request, which we do when
+flash messages are waiting (a 304 would hide them).
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from .badges import unread_count
+from .delta import TOMBSTONE_RETENTION
+from .models import Issue, Notification, Project
+from .visibility import cached_role, can_view_project, visible_project_ids, visible_projects
+
+
+def conditional_page(etag_func):
+    """
+    ``condition`` plus ``Cache-Control: private, no-cache`` so browsers
+    keep the page but always revalidate it with us.
+    """
+    def decorator(view):
+        return cache_control(private=True, no_cache=True)(condition(etag_func=etag_func)(view))
+
+    return decorator
+
+
+def _token(request, *parts):
+    user = request.user
+    if not user.is_authenticated or len(get_messages(request)):
+        return None
+
+    base = (
+        user.pk,
+        user.username,
+        cached_role(user),
+        unread_count(user.pk),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+        request.GET.urlencode(),
+        # "overdue" / "due today" markers depend on the date, not on any row
+        timezone.localdate(),
+    )
+    raw = repr(base + parts).encode()
+    return hashlib.sha1(raw).hexdigest()
+
+
+def _issue_version(issues):
+    row = issues.order_by().aggregate(n=Count("pk"), latest=Max("updated_at"))
+    return row["n"], row["latest"]
+
+
+def dashboard_etag(request, *args, **kwargs):
+    ids = visible_project_ids(request.user)
+    projects = visible_projects(request.user)
+    # the cards show names and keys; any project save bumps its generation
+    project_row = projects.order_by().aggregate(
+        n=Count("pk"), latest=Max("pk"), generations=Sum("generation")
+    )
+    return _token(
+        request,
+        "dashboard",
+        ids is None,
+        tuple(sorted(ids)) if ids is not None else (project_row["n"], project_row["latest"]),
+        project_row["generations"],
+        _issue_version(Issue.objects.filter(project__in=projects)),
+    )
+
+
+def project_board_etag(request, pk, *args, **kwargs):
+    if not can_view_project(request.user, pk):
+        return None  # let the view answer 404
+
+    # members / attachments / project edits all bump Project.generation
+    generation = Project.objects.filter(pk=pk).values_list("generation", flat=True).first()
+    # The page embeds the delta version it was rendered at. A 304 keeps
+    # that version, and one older than the tombstone window makes the
+    # client reload - which would 304 again, forever. So the token
+    # changes every half window, and a revalidated page is never that old.
+    epoch = int(time.time() // (TOMBSTONE_RETENTION.total_seconds() / 2))
+    return _token(
+        request,
+        "board",
+        pk,
+        generation,
+        epoch,
+        _issue_version(Issue.objects.filter(project_id=pk)),
+    )
+
+
+def my_tasks_etag(request, *args, **kwargs):
+    user = request.user
+    mine = Issue.objects.filter(Q(assignee=user) | Q(members=user))
+    row = mine.order_by().aggregate(n=Count("pk", distinct=True), latest=Max("updated_at"))
+    return _token(request, "my_tasks", row["n"], row["latest"])
+
+
+def notifications_etag(request, *args, **kwargs):
+    # coalesced activity bumps last_occurred_at without adding a row
+    row = Notification.objects.filter(user=request.user).order_by().aggregate(
+        n=Count("pk"), latest=Max("last_occurred_at"), unread=Count("pk", filter=Q(is_read=False))
+    )
+    return _token(request, "notifications", row["n"], row["latest"], row["unread"])
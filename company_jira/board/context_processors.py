@@ -1,22 +1,27 @@
-from django.utils import timezone
-from .models import Issue
-from .models import Notification
+from .badges import get_nav_counts
+
+
+def _lazy_nav_count(request, key):
+    """
+    Template variables that are callables are only called when a template
+    actually uses them, so pages without badges never touch the cache or
+    the database. All badges on one request share a single lookup.
+    """
+    def count():
+        if not hasattr(request, "_nav_counts"):
+            request._nav_counts = get_nav_counts(request.user)
+        return request._nav_counts[key]
+
+    return count
+
 
 def user_issue_counts(request):
     if not request.user.is_authenticated:
         return {}
-    today = timezone.localdate()
-    overdue = Issue.objects.filter(
-        assignee=request.user,
-        due_date__lt=today
-    ).exclude(status="DONE").count()
-    open_issues = Issue.objects.filter(
-        assignee=request.user
-    ).exclude(status="DONE").count()
 
     return {
-        "nav_overdue_count": overdue,
-        "nav_open_issue_count": open_issues,
+        "nav_overdue_count": _lazy_nav_count(request, "overdue"),
+        "nav_open_issue_count": _lazy_nav_count(request, "open"),
     }
 
 #-----------------Notification-------------------------------#
@@ -26,11 +31,8 @@ def notifications_context(request):
     Adds unread_notifications_count to every template.
     """
     if request.user.is_authenticated:
-        count = Notification.objects.filter(
-            user=request.user,
-            is_read=False
-        ).count()
+        count = _lazy_nav_count(request, "unread")
     else:
         count = 0
 
-    return {"unread_notifications_count": count}
\ No newline at end of file
+    return {"unread_notifications_count": count}
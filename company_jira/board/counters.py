@@ -0,0 +1,202 @@
+# board/counters.py
+"""
+Incremental maintenance of ProjectIssueCounters.
+
+Each Issue remembers the bucket values it was loaded with (see
+``remember_issue_state``); on save we subtract the old buckets and add
+the new ones with F() updates, on delete we subtract. Anything that
+bypasses signals (queryset.update, raw SQL) can be repaired with
+``manage.py rebuild_issue_counters``.
+"""
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Issue, Project, ProjectIssueCounters
+
+STATUS_FIELDS = {
+    "TODO": "todo",
+    "IN_PROGRESS": "in_progress",
+    "DONE": "done",
+}
+PRIORITY_FIELDS = {
+    "LOW": "low",
+    "MEDIUM": "medium",
+    "HIGH": "high",
+    "CRITICAL": "critical",
+}
+COUNTER_FIELDS = list(STATUS_FIELDS.values()) + list(PRIORITY_FIELDS.values()) + ["overdue"]
+
+_SNAPSHOT_ATTR = "_counter_snapshot"
+
+
+def _is_overdue(status, due_date, today):
+    return bool(due_date) and status != "DONE" and due_date < today
+
+
+def _state(issue):
+    """
+    The bits of an issue the counters depend on, or None if any of them
+    was deferred (we never want to trigger a query just to snapshot).
+    """
+    values = issue.__dict__
+    keys = ("project_id", "status", "priority", "due_date")
+    if any(k not in values for k in keys):
+        return None
+    return tuple(values[k] for k in keys)
+
+
+def remember_issue_state(issue):
+    """Called from post_init / after every write to snapshot the buckets."""
+    setattr(issue, _SNAPSHOT_ATTR, _state(issue) if issue.pk else None)
+
+
+# ---------------------------------------------------------------------
+# delta application
+# ---------------------------------------------------------------------
+def _add(deltas, state, sign, today):
+    project_id, status, priority, due_date = state
+    bucket = deltas.setdefault(project_id, {})
+    for field in (STATUS_FIELDS.get(status), PRIORITY_FIELDS.get(priority)):
+        if field:
+            bucket[field] = bucket.get(field, 0) + sign
+    if _is_overdue(status, due_date, today):
+        bucket["overdue"] = bucket.get("overdue", 0) + sign
+
+
+def _apply(deltas, today, rebuild_missing=True):
+    for project_id, changes in deltas.items():
+        changes = {f: d for f, d in changes.items() if d}
+        if not changes or project_id is None:
+            continue
+
+        updates = {}
+        for field, delta in changes.items():
+            new_value = Greatest(F(field) + delta, Value(0), output_field=IntegerField())
+            if field == "overdue":
+                # a stale overdue count gets recomputed on read anyway
+                new_value = Case(
+                    When(overdue_as_of=today, then=new_value),
+                    default=F("overdue"),
+                    output_field=IntegerField(),
+                )
+            updates[field] = new_value
+
+        updated = ProjectIssueCounters.objects.filter(project_id=project_id).update(**updates)
+        if not updated and rebuild_missing:
+            # no row yet (or it was wiped) - build it from scratch
+            rebuild_counters([project_id])
+
+
+def issue_saved(issue, created):
+    today = timezone.localdate()
+    old_state = None if created else getattr(issue, _SNAPSHOT_ATTR, None)
+    new_state = _state(issue)
+
+    with transaction.atomic():
+        if new_state is None or (not created and old_state is None):
+            # partial save of a deferred instance - recount the project
+            rebuild_counters([issue.project_id])
+        elif old_state != new_state:
+            deltas = {}
+            if old_state is not None:
+                _add(deltas, old_state, -1, today)
+            _add(deltas, new_state, +1, today)
+            _apply(deltas, today)
+
+    remember_issue_state(issue)
+
+
+def issue_deleted(issue):
+    today = timezone.localdate()
+    state = getattr(issue, _SNAPSHOT_ATTR, None) or _state(issue)
+    if state is None:
+        return
+    deltas = {}
+    _add(deltas, state, -1, today)
+    with transaction.atomic():
+        # a missing row here usually means the project is being deleted
+        # in the same cascade - recreating it would break the FK
+        _apply(deltas, today, rebuild_missing=False)
+
+
+# ---------------------------------------------------------------------
+# full recount (repair + stale overdue)
+# ---------------------------------------------------------------------
+def _bucket_aggregates(today):
+    aggregates = {}
+    for value, field in STATUS_FIELDS.items():
+        aggregates[field] = Count("pk", filter=Q(status=value))
+    for value, field in PRIORITY_FIELDS.items():
+        aggregates[field] = Count("pk", filter=Q(priority=value))
+    aggregates["overdue"] = Count("pk", filter=Q(due_date__lt=today) & ~Q(status="DONE"))
+    return aggregates
+
+
+def rebuild_counters(project_ids=None):
+    """
+    Recount every bucket for the given projects (or all projects) with a
+    single grouped query and upsert the counter rows. Returns the number
+    of rows written.
+    """
+    today = timezone.localdate()
+    projects = Project.objects.all()
+    if project_ids is not None:
+        projects = projects.filter(pk__in=list(project_ids))
+    ids = list(projects.values_list("pk", flat=True))
+    if not ids:
+        return 0
+
+    grouped = (
+        Issue.objects.filter(project_id__in=ids)
+        .order_by()
+        .values("project_id")
+        .annotate(**_bucket_aggregates(today))
+    )
+    by_project = {row.pop("project_id"): row for row in grouped}
+
+    rows = [
+        ProjectIssueCounters(
+            project_id=pid,
+            overdue_as_of=today,
+            **by_project.get(pid, {}),
+        )
+        for pid in ids
+    ]
+    with transaction.atomic():
+        ProjectIssueCounters.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["project"],
+            update_fields=COUNTER_FIELDS + ["overdue_as_of"],
+        )
+    return len(rows)
+
+
+def refresh_stale_overdue(counters):
+    """
+    Recount ``overdue`` for rows in ``counters`` that were last counted
+    on an earlier day. Usually a no-op; at most once a day per project.
+    """
+    today = timezone.localdate()
+    stale_ids = list(
+        counters.exclude(overdue_as_of=today).values_list("project_id", flat=True)
+    )
+    if not stale_ids:
+        return
+
+    overdue_by_project = dict(
+        Issue.objects.filter(project_id__in=stale_ids, due_date__lt=today)
+        .exclude(status="DONE")
+        .order_by()
+        .values("project_id")
+        .annotate(n=Count("pk"))
+        .values_list("project_id", "n")
+    )
+    with transaction.atomic():
+        for pid in stale_ids:
+            ProjectIssueCounters.objects.filter(project_id=pid).update(
+                overdue=overdue_by_project.get(pid, 0),
+                overdue_as_of=today,
+            )
@@ -0,0 +1,72 @@
+# board/delta.py
+"""
+Incremental board updates for live clients.
+
+The board page embeds a ``version`` (server time of the render). The
+page then polls ``project_board_delta`` with ``?since=<version>`` and
+gets back only the issues created / edited / moved since then plus the
+ids of deleted issues (from IssueTombstone), together with a new
+version to use next time.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Issue, IssueTombstone
+
+# tombstones older than this are pruned; clients further behind reload
+TOMBSTONE_RETENTION = timedelta(days=getattr(settings, "BOARD_TOMBSTONE_RETENTION_DAYS", 7))
+
+# updated_at is set before commit, so re-send a few seconds of history to
+# cover writes that committed after the previous poll read them
+OVERLAP = timedelta(seconds=getattr(settings, "BOARD_DELTA_OVERLAP_SECONDS", 5))
+
+
+class StaleVersion(Exception):
+    """The client is older than the tombstone window and must reload."""
+
+
+def current_version():
+    return timezone.now().isoformat()
+
+
+def parse_version(value):
+    since = datetime.fromisoformat(value)
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, dt_timezone.utc)
+    return since
+
+
+def record_tombstone(issue):
+    now = timezone.now()
+    IssueTombstone.objects.create(project_id=issue.project_id, issue_id=issue.pk)
+    # keep the table bounded without a separate job
+    IssueTombstone.objects.filter(
+        project_id=issue.project_id,
+        deleted_at__lt=now - TOMBSTONE_RETENTION,
+    ).delete()
+
+
+def board_changes(project_id, since):
+    """
+    ``(changed_issues, deleted_issue_ids)`` for ``project_id`` after
+    ``since``. Hidden (show_on_board=False) issues are included so the
+    client can take their cards off the board.
+    """
+    if since < timezone.now() - TOMBSTONE_RETENTION:
+        raise StaleVersion()
+
+    window_start = since - OVERLAP
+    changed = sorted(
+        # a handful of rows: sorted here, so the query is just the index seek
+        Issue.objects.filter(project_id=project_id, updated_at__gt=window_start)
+        .select_related("assignee")
+        .order_by(),
+        key=lambda issue: (issue.created_at, issue.pk),
+    )
+    deleted = list(
+        IssueTombstone.objects.filter(project_id=project_id, deleted_at__gt=window_start)
+        .values_list("issue_id", flat=True)
+    )
+    return changed, deleted
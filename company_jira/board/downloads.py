@@ -0,0 +1,158 @@
+# board/downloads.py
+"""
+Serving attachment files after the view has checked access.
+
+With BOARD_SENDFILE_BACKEND set, Django only answers with a header and
+the front proxy streams the file itself (and handles Range, ETags and
+slow clients):
+
+* ``"nginx"`` - ``X-Accel-Redirect: <BOARD_SENDFILE_URL_PREFIX><name>``,
+  where the prefix is an ``internal`` location aliased to MEDIA_ROOT;
+* ``"apache"`` / ``"lighttpd"`` - ``X-Sendfile: <absolute path>``
+  (mod_xsendfile, or lighttpd's equivalent).
+
+Without a proxy the file is streamed from Python, with single-range
+``Range`` requests, ``If-Range`` and ``If-None-Match`` handled so big
+files can be resumed and revalidated cheaply.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+SENDFILE_BACKEND = getattr(settings, "BOARD_SENDFILE_BACKEND", None)
+SENDFILE_URL_PREFIX = getattr(settings, "BOARD_SENDFILE_URL_PREFIX", "/protected-media/")
+
+_BLOCK = 64 * 1024
+
+# attachments: any cached copy is checked (cheaply, via ETag) before reuse
+PRIVATE_REVALIDATE = "private, no-cache"
+# for URLs whose bytes never change, e.g. thumbnails of immutable originals
+PRIVATE_IMMUTABLE = "private, max-age=31536000, immutable"
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _etag(size, mtime):
+    # cheap validator: changes whenever the file is replaced or rewritten
+    return quote_etag(f"{size:x}-{int(mtime * 1000):x}")
+
+
+def _etag_matches(header, etag):
+    tags = [t.strip() for t in header.split(",")]
+    # weak comparison, as RFC 9110 asks for If-None-Match
+    return "*" in tags or any(t.removeprefix("W/") == etag for t in tags)
+
+
+def _byte_range(header, size):
+    """
+    ``(start, end)`` (inclusive) for a single-range header, None to send
+    the whole file, or False when the range can't be satisfied.
+    """
+    match = _RANGE.match(header.replace(" ", ""))
+    if not match:
+        return None  # multiple ranges or junk: a full response is allowed
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:  # suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        while length > 0:
+            block = fh.read(min(_BLOCK, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def _common_headers(response, filename, as_attachment, cache_control):
+    response["Content-Disposition"] = content_disposition_header(as_attachment, filename)
+    # uploads are user content: never let the browser sniff or run it on our origin
+    response["X-Content-Type-Options"] = "nosniff"
+    response["Content-Security-Policy"] = "sandbox"
+    response["Cache-Control"] = cache_control
+    return response
+
+
+def serve_file(request, fieldfile, filename=None, as_attachment=False, cache_control=PRIVATE_REVALIDATE):
+    """
+    Response for the file behind ``fieldfile`` (a FieldFile, or a storage
+    name); access must already be checked.
+    """
+    name = getattr(fieldfile, "name", fieldfile)
+    path = os.path.join(settings.MEDIA_ROOT, *name.split("/"))
+    filename = filename or os.path.basename(name)
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    if SENDFILE_BACKEND == "nginx":
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = SENDFILE_URL_PREFIX + quote(name)
+        return _common_headers(response, filename, as_attachment, cache_control)
+    if SENDFILE_BACKEND in ("apache", "lighttpd"):
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = path
+        return _common_headers(response, filename, as_attachment, cache_control)
+
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404("File not found.")
+    size, etag = stat.st_size, _etag(stat.st_size, stat.st_mtime)
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        response["Cache-Control"] = cache_control
+        return response
+
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if range_header and request.method == "GET":
+        if_range = request.headers.get("If-Range")
+        # a stale If-Range means "send me the whole new file"
+        if not if_range or if_range == etag:
+            byte_range = _byte_range(range_header, size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    if byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(path, start, end - start + 1), status=206, content_type=content_type
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+    else:
+        response = FileResponse(open(path, "rb"), content_type=content_type)
+        response.block_size = _BLOCK
+
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    return _common_headers(response, filename, as_attachment, cache_control)
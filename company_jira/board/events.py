@@ -0,0 +1,125 @@
+# board/events.py
+"""
+Push events (new notifications, unread count changes) to connected
+browsers over server-sent events.
+
+Publishers are ordinary sync code (signals, views); subscribers are the
+async SSE views in board.views. They meet in a broker chosen by the
+BOARD_EVENT_BROKER setting. The default, InProcessBroker, hands events
+to asyncio queues in the same process: fine for a single ASGI worker
+and for tests. Multi-process deployments plug in a broker backed by
+something shared (e.g. Redis pub/sub) with the same interface.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """One connected client. ``get`` is safe to wrap in wait_for."""
+
+    def __init__(self, broker, user_id, maxsize=100):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, event):
+        # runs on self.loop; a client this far behind just misses events
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class BaseBroker:
+    def subscribe(self, user_id):
+        """Register a client for ``user_id``'s events. Call from async code."""
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+    def publish(self, user_id, event):
+        """Send ``event`` (a JSON-able dict) to every client of ``user_id``."""
+        raise NotImplementedError
+
+    def has_subscribers(self, user_id):
+        """Cheap hint used to skip building payloads nobody will read."""
+        return True
+
+
+class InProcessBroker(BaseBroker):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subs = self._subscriptions.get(subscription.user_id)
+            if subs is not None:
+                subs.discard(subscription)
+                if not subs:
+                    del self._subscriptions[subscription.user_id]
+
+    def has_subscribers(self, user_id):
+        return user_id in self._subscriptions
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subs = list(self._subscriptions.get(user_id, ()))
+        for subscription in subs:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # event loop already closed - the client is gone
+                self.unsubscribe(subscription)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, "BOARD_EVENT_BROKER", "board.events.InProcessBroker")
+                _broker = import_string(path)()
+    return _broker
+
+
+def publish_on_commit(user_ids, event):
+    """
+    Publish ``event`` to each user once the current transaction commits.
+    ``event`` may be a callable taking the user id, for per-user payloads
+    (it is called after the commit, so it sees the committed data).
+    """
+    user_ids = [uid for uid in set(user_ids) if uid]
+    if not user_ids:
+        return
+
+    def send():
+        broker = get_broker()
+        for uid in user_ids:
+            if broker.has_subscribers(uid):
+                broker.publish(uid, event(uid) if callable(event) else event)
+
+    transaction.on_commit(send)
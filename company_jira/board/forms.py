@@ -3,12 +3,13 @@ from django.contrib.auth.models import User
 from .models import Project, Issue, Comment, Attachment, ProjectAttachment
 from django.contrib.auth import get_user_model
 from .models import Profile
+from .widgets import UserSelect, UserSelectMultiple
 
 class ProjectForm(forms.ModelForm):
     members = forms.ModelMultipleChoiceField(
         queryset=User.objects.filter(is_active=True),
         required=False,
-        widget=forms.SelectMultiple(attrs={"size": 6}),
+        widget=UserSelectMultiple(attrs={"size": 6}),
         help_text="Select team members for this project.",
     )
 
@@ -49,7 +50,8 @@ class IssueForm(forms.ModelForm):
         ]
         widgets = {
             "description": forms.Textarea(attrs={"rows": 4}),
-            "members": forms.SelectMultiple(attrs={"size": 4}),
+            "assignee": UserSelect(),
+            "members": UserSelectMultiple(attrs={"size": 4}),
             # IMPORTANT: browser will send ISO date (YYYY-MM-DD)
             "due_date": forms.DateInput(attrs={"type": "date"}),
         }
@@ -125,5 +127,5 @@ class ProjectMembersForm(forms.ModelForm):
         model = Project
         fields = ["members"]
         widgets = {
-            "members": forms.SelectMultiple(attrs={"size": 8}),
+            "members": UserSelectMultiple(attrs={"size": 8}),
         }
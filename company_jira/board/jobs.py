@@ -0,0 +1,172 @@
+# board/jobs.py
+"""
+Small database-backed job queue.
+
+Code that should not run inside the request (SMTP, ...) registers a
+handler with ``@job("name")`` and calls ``enqueue("name", **payload)``.
+The row is written in the caller's transaction, so a rolled-back request
+leaves no job behind. ``manage.py run_worker`` claims due jobs with a
+lease (a conditional UPDATE, so no broker and no SELECT ... FOR UPDATE
+is needed), runs them in a thread pool and retries failures with
+exponential backoff.
+
+With BOARD_JOBS_EAGER = True jobs run right after commit in the
+process that enqueued them; handy in development where no worker runs.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+LEASE = timedelta(seconds=getattr(settings, "BOARD_JOB_LEASE_SECONDS", 5 * 60))
+BACKOFF_BASE = getattr(settings, "BOARD_JOB_BACKOFF_SECONDS", 30)
+BACKOFF_MAX = getattr(settings, "BOARD_JOB_BACKOFF_MAX_SECONDS", 60 * 60)
+
+_registry = {}
+
+
+class UnknownJob(Exception):
+    pass
+
+
+def job(name):
+    """Register the decorated function as the handler for ``name``."""
+    def decorator(func):
+        _registry[name] = func
+        return func
+
+    return decorator
+
+
+def get_handler(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise UnknownJob(name) from None
+
+
+def enqueue(name, *, delay=None, max_attempts=None, **payload):
+    """
+    Queue ``name`` to run with ``payload`` (JSON-able keyword arguments).
+    Returns the Job.
+    """
+    get_handler(name)  # fail fast on typos
+    fields = {"name": name, "payload": payload}
+    if delay is not None:
+        fields["run_at"] = timezone.now() + delay
+    if max_attempts is not None:
+        fields["max_attempts"] = max_attempts
+    new_job = Job.objects.create(**fields)
+
+    if getattr(settings, "BOARD_JOBS_EAGER", False):
+        transaction.on_commit(lambda: run_job(new_job.pk, worker_id="eager"))
+    return new_job
+
+
+def backoff(attempts):
+    """Seconds to wait before retry number ``attempts`` (1-based)."""
+    return min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+
+
+def _claimable(now):
+    return Q(status=Job.STATUS_QUEUED, run_at__lte=now) | Q(
+        status=Job.STATUS_RUNNING, locked_until__lt=now
+    )
+
+
+def claim(worker_id, limit):
+    """
+    Lease up to ``limit`` due jobs for ``worker_id`` and return their ids.
+
+    Each candidate is taken with an UPDATE that re-checks it is still
+    claimable, so two workers racing for the same row cannot both win.
+    """
+    now = timezone.now()
+    candidates = list(
+        Job.objects.filter(_claimable(now)).order_by("run_at", "pk").values_list("pk", flat=True)[: limit * 2]
+    )
+    claimed = []
+    for pk in candidates:
+        if len(claimed) >= limit:
+            break
+        won = Job.objects.filter(_claimable(now), pk=pk).update(
+            status=Job.STATUS_RUNNING,
+            locked_by=worker_id,
+            locked_until=now + LEASE,
+            attempts=F("attempts") + 1,
+        )
+        if won:
+            claimed.append(pk)
+    return claimed
+
+
+def run_job(pk, worker_id):
+    """Run a claimed job and record the outcome. Returns True on success."""
+    if worker_id == "eager":
+        # eager mode skips claim(); take the lease here
+        Job.objects.filter(pk=pk, status=Job.STATUS_QUEUED).update(
+            status=Job.STATUS_RUNNING,
+            locked_by=worker_id,
+            locked_until=timezone.now() + LEASE,
+            attempts=F("attempts") + 1,
+        )
+
+    current = Job.objects.filter(pk=pk, locked_by=worker_id, status=Job.STATUS_RUNNING).first()
+    if current is None:
+        return False  # lease lost to another worker
+
+    mine = Job.objects.filter(pk=pk, locked_by=worker_id)
+    try:
+        get_handler(current.name)(**current.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s #%s failed (attempt %s)", current.name, pk, current.attempts)
+        now = timezone.now()
+        if current.attempts >= current.max_attempts:
+            mine.update(status=Job.STATUS_FAILED, last_error=error, locked_until=None, finished_at=now)
+        else:
+            mine.update(
+                status=Job.STATUS_QUEUED,
+                last_error=error,
+                locked_until=None,
+                run_at=now + timedelta(seconds=backoff(current.attempts)),
+            )
+        return False
+
+    mine.update(status=Job.STATUS_DONE, locked_until=None, finished_at=timezone.now())
+    return True
+
+
+#-----------------------------Handlers---------------------------------#
+
+@job("board.send_mail")
+def send_mail_job(subject, message, recipient_list, from_email=None):
+    from django.core.mail import send_mail
+
+    # raise so failures are retried; callers used fail_silently before
+    send_mail(
+        subject=subject,
+        message=message,
+        from_email=from_email,
+        recipient_list=recipient_list,
+        fail_silently=False,
+    )
+
+
+@job("board.generate_preview")
+def generate_preview_job(file_name, filename):
+    from .models import Project, ProjectAttachment
+    from .previews import generate_preview
+
+    if generate_preview(file_name, filename):
+        # the project sidebar is cached per generation; show the new thumbnail
+        project_ids = ProjectAttachment.objects.filter(file=file_name).values("project_id")
+        Project.objects.filter(pk__in=project_ids).update(generation=F("generation") + 1)
@@ -0,0 +1,54 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from board.media import delete_orphans, find_orphans
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete files under MEDIA_ROOT that no attachment, blob or upload refers "
+        "to any more, once they are older than the grace period. Use --dry-run "
+        "(with -v 2 for the file list) to see what would go."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours",
+            type=int,
+            default=getattr(settings, "BOARD_MEDIA_GC_GRACE_HOURS", 24),
+            help="Leave files modified within this many hours alone.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.05,
+            help="Seconds to sleep between batches to go easy on the disk.",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only report what would be deleted."
+        )
+
+    def handle(self, *args, **options):
+        files = freed = 0
+        for batch in find_orphans(options["grace_hours"], options["batch_size"]):
+            if options["dry_run"]:
+                for name, _size in batch:
+                    if options["verbosity"] >= 2:
+                        self.stdout.write(name)
+                files += len(batch)
+                freed += sum(size for _name, size in batch)
+                continue
+
+            deleted, deleted_bytes = delete_orphans(batch)
+            files += deleted
+            freed += deleted_bytes
+            time.sleep(options["pause"])
+
+        megabytes = freed / (1024 * 1024)
+        if options["dry_run"]:
+            self.stdout.write(f"{files} orphaned file(s), {megabytes:.1f} MB, would be deleted.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Deleted {files} orphaned file(s), {megabytes:.1f} MB."))
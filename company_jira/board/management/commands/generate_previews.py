@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from board.jobs import enqueue
+from board.models import Attachment, ProjectAttachment
+from board.previews import can_preview, preview_exists
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue thumbnail jobs for image and PDF attachments that don't have "
+        "one yet (e.g. files uploaded before previews existed)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        queued, seen = 0, set()
+        for model in (Attachment, ProjectAttachment):
+            rows = model.objects.only("pk", "file", "original_name").order_by("pk")
+            for attachment in rows.iterator(chunk_size=options["batch_size"]):
+                name = attachment.file.name
+                # shared blobs need only one job
+                if not name or name in seen:
+                    continue
+                seen.add(name)
+                filename = attachment.filename()
+                if can_preview(filename) and not preview_exists(name):
+                    enqueue("board.generate_preview", file_name=name, filename=filename)
+                    queued += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Queued {queued} preview job(s)."))
@@ -0,0 +1,102 @@
+import os
+import shutil
+import time
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from board.models import Attachment, ProjectAttachment
+from board.storage import is_sharded, shard_name
+
+
+class Command(BaseCommand):
+    help = (
+        "Move attachment files saved in the old flat layout (attachments/<name>) "
+        "into hashed subdirectories and rewrite the FileField paths. Safe to run "
+        "while the site is up and to re-run after an interruption."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.1,
+            help="Seconds to sleep between batches so web requests can write.",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only report what would be moved."
+        )
+
+    def handle(self, *args, **options):
+        moved = missing = 0
+        for model in (Attachment, ProjectAttachment):
+            last_pk = 0
+            while True:
+                # keyset over pk; rows already moved are skipped below, so a
+                # re-run just walks past them
+                batch = list(
+                    model.objects.filter(pk__gt=last_pk, blob__isnull=True)
+                    .order_by("pk")
+                    .values_list("pk", "file")[: options["batch_size"]]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1][0]
+
+                pending = [(pk, name) for pk, name in batch if name and not is_sharded(name)]
+                if options["dry_run"]:
+                    for _pk, name in pending:
+                        self.stdout.write(f"{name} -> {shard_name(name)}")
+                    moved += len(pending)
+                    continue
+
+                for pk, name in pending:
+                    if self._move(model, pk, name):
+                        moved += 1
+                    else:
+                        missing += 1
+                time.sleep(options["pause"])
+
+        verb = "would be moved" if options["dry_run"] else "moved"
+        self.stdout.write(self.style.SUCCESS(f"{moved} file(s) {verb}, {missing} missing on disk."))
+
+    def _move(self, model, pk, old_name):
+        """
+        Link the file at its new path, point the row at it, then drop the
+        old path once that is committed. Readers holding the old name
+        keep working until the very end.
+        """
+        old_path = default_storage.path(old_name)
+        if not os.path.exists(old_path):
+            self.stderr.write(f"{model.__name__} #{pk}: {old_name} is missing, left as is.")
+            return False
+
+        new_name = shard_name(old_name)
+        new_path = default_storage.path(new_name)
+        if os.path.exists(new_path) and not os.path.samefile(old_path, new_path):
+            # taken by a newer upload with the same name
+            new_name = default_storage.get_available_name(new_name)
+            new_path = default_storage.path(new_name)
+
+        os.makedirs(os.path.dirname(new_path), exist_ok=True)
+        if not os.path.exists(new_path):
+            try:
+                os.link(old_path, new_path)
+            except OSError:
+                # no hard links on this filesystem: copy, keeping mtime
+                shutil.copy2(old_path, new_path)
+
+        with transaction.atomic():
+            # every row that shares the old file follows it
+            model.objects.filter(file=old_name, blob__isnull=True).update(file=new_name)
+            transaction.on_commit(lambda: _remove(old_path))
+        return True
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,58 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from board.models import Notification
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete read notifications older than the retention period, in small "
+        "batches so SQLite never holds the write lock for long."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=getattr(settings, "BOARD_NOTIFICATION_RETENTION_DAYS", 90),
+            help="Keep read notifications newer than this many days.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.05,
+            help="Seconds to sleep between batches so web requests can write.",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only report how many rows would go."
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        expired = Notification.objects.filter(is_read=True, last_occurred_at__lt=cutoff)
+
+        if options["dry_run"]:
+            self.stdout.write(f"{expired.count()} notification(s) older than {cutoff:%Y-%m-%d} would be deleted.")
+            return
+
+        deleted = 0
+        while True:
+            # oldest first; the pk list keeps each DELETE a short, indexed write
+            batch = list(
+                expired.order_by("last_occurred_at", "pk").values_list("pk", flat=True)[
+                    : options["batch_size"]
+                ]
+            )
+            if not batch:
+                break
+            with transaction.atomic():
+                deleted += Notification.objects.filter(pk__in=batch).delete()[0]
+            time.sleep(options["pause"])
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} notification(s)."))
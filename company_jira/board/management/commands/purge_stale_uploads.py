@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from board import uploads
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete chunked uploads nobody has touched for a while, together with "
+        "their partial files under MEDIA_ROOT/uploads_tmp/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours",
+            type=int,
+            default=getattr(settings, "BOARD_UPLOAD_EXPIRY_HOURS", 24),
+            help="Remove uploads with no activity for this many hours.",
+        )
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only report how many uploads would go."
+        )
+
+    def handle(self, *args, **options):
+        stale = uploads.stale_uploads(options["hours"])
+
+        if options["dry_run"]:
+            self.stdout.write(f"{stale.count()} upload(s) idle for {options['hours']}h would be deleted.")
+            return
+
+        deleted = 0
+        while True:
+            batch = list(stale.order_by("updated_at")[: options["batch_size"]])
+            if not batch:
+                break
+            deleted += uploads.purge_uploads(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} upload(s)."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from board.blobs import rebuild_refs
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount Blob.ref_count from the Attachment and ProjectAttachment tables "
+        "(repair) and delete blobs nothing refers to."
+    )
+
+    def handle(self, *args, **options):
+        updated, deleted = rebuild_refs()
+        self.stdout.write(
+            self.style.SUCCESS(f"Fixed {updated} blob count(s), deleted {deleted} unused blob(s).")
+        )
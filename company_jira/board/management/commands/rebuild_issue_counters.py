@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from board.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Recount ProjectIssueCounters from the Issue table (repair after bulk edits)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--project",
+            type=int,
+            action="append",
+            dest="project_ids",
+            help="Only rebuild this project id (can be given several times).",
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_counters(options["project_ids"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt issue counters for {written} project(s)."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from board.notifications import rebuild_unread_counts
+
+
+class Command(BaseCommand):
+    help = "Recount NotificationCounter rows from the Notification table (repair)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Only rebuild this user id (can be given several times).",
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_unread_counts(options["user_ids"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt unread counts for {written} user(s)."))
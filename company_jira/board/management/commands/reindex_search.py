@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from board.search import fts_enabled, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search table from issues, comments and projects."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not fts_enabled():
+            self.stdout.write("This database uses the fallback search; nothing to index.")
+            return
+        written = rebuild_index(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {written} row(s)."))
@@ -0,0 +1,60 @@
+import os
+import signal
+import socket
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from board.jobs import claim, run_job
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (board.jobs) until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=4, help="Jobs run in parallel.")
+        parser.add_argument(
+            "--poll", type=float, default=2.0, help="Seconds to sleep when the queue is empty."
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Drain the due jobs and exit (cron / tests)."
+        )
+
+    def handle(self, *args, **options):
+        threads = options["threads"]
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        self.stdout.write(f"Worker {worker_id} started with {threads} thread(s).")
+        running = set()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            while not stopping:
+                running = {f for f in running if not f.done()}
+                free = threads - len(running)
+                ids = claim(worker_id, free) if free else []
+                for pk in ids:
+                    running.add(pool.submit(self._run, pk, worker_id))
+
+                if options["once"] and not ids and not running:
+                    break
+                if not ids:
+                    time.sleep(options["poll"] if not options["once"] else 0.05)
+
+            # the with-block waits for in-flight jobs before exiting
+        self.stdout.write(self.style.SUCCESS(f"Worker {worker_id} stopped."))
+
+    @staticmethod
+    def _run(pk, worker_id):
+        # threads keep their connection between jobs; drop it if stale
+        close_old_connections()
+        run_job(pk, worker_id)
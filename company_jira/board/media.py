@@ -0,0 +1,166 @@
+# board/media.py
+"""
+Reclaiming disk space under MEDIA_ROOT.
+
+Going forward, deleting an attachment row removes its file once the
+transaction commits: blob-backed rows through the reference count in
+board.blobs, older rows (own file, no blob) through ``file_deleted``
+below, unless another row still points at the same name.
+
+``find_orphans`` is the safety net for everything else (files left
+behind before this existed, crashed uploads, half-written thumbnails):
+it walks the media tree lazily and checks candidates against the
+tables one batch at a time, so neither side is ever loaded whole. Files
+younger than the grace period are never touched; they may belong to an
+upload whose row isn't committed yet.
+"""
+import os
+import time
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+
+from .blobs import BLOB_DIR
+from .models import Attachment, Blob, ChunkedUpload, ProjectAttachment
+from .previews import PREVIEW_DIR, original_name, remove_preview
+from .uploads import TEMP_DIR as UPLOAD_TEMP_DIR
+
+GRACE_HOURS = getattr(settings, "BOARD_MEDIA_GC_GRACE_HOURS", 24)
+
+# only these top-level directories are ours to clean
+MANAGED_DIRS = ("attachments", "project_attachments", BLOB_DIR, UPLOAD_TEMP_DIR, PREVIEW_DIR)
+
+
+def _full_path(name):
+    return os.path.join(settings.MEDIA_ROOT, *name.split("/"))
+
+
+# ---------------------------------------------------------------------
+# post-commit deletes
+# ---------------------------------------------------------------------
+def file_deleted(instance):
+    """
+    post_delete hook for Attachment / ProjectAttachment rows that own
+    their file (no blob): remove it after commit if nothing else uses it.
+    """
+    name = instance.__dict__.get("file")
+    name = getattr(name, "name", name)
+    if not name or instance.__dict__.get("blob_id"):
+        return
+
+    def remove():
+        if Attachment.objects.filter(file=name).exists() or ProjectAttachment.objects.filter(file=name).exists():
+            return
+        try:
+            os.remove(_full_path(name))
+        except FileNotFoundError:
+            pass
+        remove_preview(name)
+
+    transaction.on_commit(remove)
+
+
+# ---------------------------------------------------------------------
+# orphan scan
+# ---------------------------------------------------------------------
+def _walk(path, rel):
+    """Yield ``(name, path, stat)`` for every file below ``path``, lazily."""
+    try:
+        entries = os.scandir(path)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            name = f"{rel}/{entry.name}"
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk(entry.path, name)
+            elif entry.is_file(follow_symlinks=False):
+                yield name, entry.path, entry.stat(follow_symlinks=False)
+
+
+def _referenced(names):
+    """The subset of ``names`` (files of one batch) that something still uses."""
+    owners = {}  # name of the thing that must exist -> files that depend on it
+    for name in names:
+        owners.setdefault(name, []).append(name)
+        original = original_name(name)
+        if original:
+            # a thumbnail lives as long as its original does
+            owners.setdefault(original, []).append(name)
+
+    blob_shas, upload_ids, attachment_names = {}, {}, []
+    for owner in owners:
+        top, _, rest = owner.partition("/")
+        base = owner.rsplit("/", 1)[-1]
+        if top == BLOB_DIR:
+            # blobs/tmp/* has no owner: orphans once old
+            if len(base) == 64 and rest.count("/") == 2:
+                blob_shas[base] = owner
+        elif top == UPLOAD_TEMP_DIR:
+            try:
+                upload_ids[uuid.UUID(base.removesuffix(".part"))] = owner
+            except ValueError:
+                pass
+        else:
+            attachment_names.append(owner)
+
+    live = set()
+    live.update(
+        blob_shas[sha] for sha in Blob.objects.filter(sha256__in=list(blob_shas)).values_list("sha256", flat=True)
+    )
+    live.update(
+        upload_ids[pk] for pk in ChunkedUpload.objects.filter(pk__in=list(upload_ids)).values_list("pk", flat=True)
+    )
+    for model in (Attachment, ProjectAttachment):
+        live.update(model.objects.filter(file__in=attachment_names).values_list("file", flat=True))
+
+    return {name for owner in live for name in owners.get(owner, ())}
+
+
+def find_orphans(grace_hours=None, batch_size=500):
+    """
+    Yield batches of ``(name, size)`` for files under the managed
+    directories that nothing references and that are older than the
+    grace period.
+    """
+    cutoff = time.time() - 3600 * (GRACE_HOURS if grace_hours is None else grace_hours)
+
+    def flush(batch):
+        referenced = _referenced([name for name, _size in batch])
+        return [(name, size) for name, size in batch if name not in referenced]
+
+    batch = []
+    for top in MANAGED_DIRS:
+        for name, _path, stat in _walk(os.path.join(settings.MEDIA_ROOT, top), top):
+            if stat.st_mtime >= cutoff:
+                continue
+            batch.append((name, stat.st_size))
+            if len(batch) >= batch_size:
+                orphans = flush(batch)
+                batch = []
+                if orphans:
+                    yield orphans
+    if batch:
+        orphans = flush(batch)
+        if orphans:
+            yield orphans
+
+
+def delete_orphans(batch):
+    """
+    Delete one batch from ``find_orphans`` after checking it against the
+    tables once more. Returns ``(files, bytes)`` removed.
+    """
+    referenced = _referenced([name for name, _size in batch])
+    files = freed = 0
+    for name, size in batch:
+        if name in referenced:
+            continue  # picked up since the scan
+        try:
+            os.remove(_full_path(name))
+        except FileNotFoundError:
+            continue
+        files += 1
+        freed += size
+    return files, freed
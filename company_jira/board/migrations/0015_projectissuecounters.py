@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_counters(apps, schema_editor):
+    Project = apps.get_model("board", "Project")
+    Issue = apps.get_model("board", "Issue")
+    ProjectIssueCounters = apps.get_model("board", "ProjectIssueCounters")
+
+    buckets = {
+        "todo": Q(status="TODO"),
+        "in_progress": Q(status="IN_PROGRESS"),
+        "done": Q(status="DONE"),
+        "low": Q(priority="LOW"),
+        "medium": Q(priority="MEDIUM"),
+        "high": Q(priority="HIGH"),
+        "critical": Q(priority="CRITICAL"),
+    }
+    grouped = (
+        Issue.objects.order_by()
+        .values("project_id")
+        .annotate(**{name: Count("pk", filter=q) for name, q in buckets.items()})
+    )
+    by_project = {row.pop("project_id"): row for row in grouped}
+
+    # overdue_as_of stays empty so overdue is counted on first read
+    ProjectIssueCounters.objects.bulk_create(
+        ProjectIssueCounters(project_id=pid, **by_project.get(pid, {}))
+        for pid in Project.objects.values_list("pk", flat=True)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0014_project_reference_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectIssueCounters',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='issue_counters', serialize=False, to='board.project')),
+                ('todo', models.PositiveIntegerField(default=0)),
+                ('in_progress', models.PositiveIntegerField(default=0)),
+                ('done', models.PositiveIntegerField(default=0)),
+                ('low', models.PositiveIntegerField(default=0)),
+                ('medium', models.PositiveIntegerField(default=0)),
+                ('high', models.PositiveIntegerField(default=0)),
+                ('critical', models.PositiveIntegerField(default=0)),
+                ('overdue', models.PositiveIntegerField(default=0)),
+                ('overdue_as_of', models.DateField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:40
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_at(apps, schema_editor):
+    Notification = apps.get_model("board", "Notification")
+    Notification.objects.update(last_occurred_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0018_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='notification',
+            options={'ordering': ['-last_occurred_at']},
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='kind',
+            field=models.CharField(blank=True, choices=[('status', 'Status update'), ('issue', 'Issue'), ('project_created', 'Project created')], max_length=20),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='last_occurred_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='occurrences',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'project', 'kind', 'last_occurred_at'], name='board_notif_user_id_43af1c_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0019_notification_coalescing'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'last_occurred_at'], name='board_notif_user_id_4ec78f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['is_read', 'last_occurred_at'], name='board_notif_is_read_fc7a5b_idx'),
+        ),
+    ]
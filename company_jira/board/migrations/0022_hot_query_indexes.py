@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+# email__iexact compiles to ``LIKE`` on SQLite and ``UPPER(..) = UPPER(..)``
+# on PostgreSQL; a plain index helps neither, so build the matching
+# expression index per backend. (MySQL collations are already
+# case-insensitive.)
+CI_EMAIL_INDEXES = [
+    # (index name, model, columns after the email expression)
+    ("board_user_email_ci", ("auth", "User"), ""),
+    ("board_emailotp_email_code_ci", ("board", "EmailOTP"), ", code"),
+]
+
+
+def create_ci_email_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        expression = "email COLLATE NOCASE"
+    elif vendor == "postgresql":
+        expression = "UPPER(email)"
+    else:
+        return
+    quote = schema_editor.quote_name
+    for name, model, rest in CI_EMAIL_INDEXES:
+        table = apps.get_model(*model)._meta.db_table
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote(table)} ({expression}{rest})"
+        )
+
+
+def drop_ci_email_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor not in ("sqlite", "postgresql"):
+        return
+    for name, _model, _rest in CI_EMAIL_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name(name)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0021_notificationcounter'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='board_notif_is_read_fc7a5b_idx',
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project', 'show_on_board', 'status'], name='board_issue_project_dfd1e4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['assignee', 'status', 'due_date'], name='board_issue_assigne_fa98a2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project', 'show_on_board', 'created_at'], name='board_issue_project_1b767e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', True)), fields=['last_occurred_at'], name='board_notif_read_age_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', 'last_occurred_at'], name='board_notif_user_id_93a8d7_idx'),
+        ),
+        migrations.RunPython(create_ci_email_indexes, drop_ci_email_indexes),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:50
+
+from django.db import migrations
+
+# SQLite only (see board.search); other databases use the icontains
+# fallback and skip this migration's work.
+CREATE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS board_search USING fts5(
+    project_id UNINDEXED,
+    title,
+    body,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+# rowid = pk * 4 + kind (1 issue, 2 comment, 3 project), as in board.search
+POPULATE = [
+    """
+    INSERT INTO board_search (rowid, project_id, title, body)
+    SELECT id * 4 + 1, project_id, title, description FROM board_issue
+    """,
+    """
+    INSERT INTO board_search (rowid, project_id, title, body)
+    SELECT c.id * 4 + 2, i.project_id, i.title, c.body
+    FROM board_comment c JOIN board_issue i ON i.id = c.issue_id
+    """,
+    """
+    INSERT INTO board_search (rowid, project_id, title, body)
+    SELECT id * 4 + 3, id, name, key || char(10) || description || char(10) || sop
+    FROM board_project
+    """,
+]
+
+
+def create_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(CREATE)
+    for statement in POPULATE:
+        schema_editor.execute(statement)
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS board_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0022_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
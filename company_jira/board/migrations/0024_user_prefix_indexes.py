@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:58
+
+from django.db import migrations
+
+# Prefix (istartswith) lookups for the user picker autocomplete. SQLite
+# compiles them to LIKE 'abc%', which can seek a NOCASE index (email
+# already has one from 0022); PostgreSQL needs text_pattern_ops for LIKE
+# prefixes outside the C locale.
+COLUMNS = ["username", "first_name", "last_name", "email"]
+
+
+def _index_name(column):
+    return f"board_user_{column}_prefix"
+
+
+def create_prefix_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    quote = schema_editor.quote_name
+    table = quote(apps.get_model("auth", "User")._meta.db_table)
+    for column in COLUMNS:
+        if vendor == "sqlite":
+            if column == "email":
+                continue
+            expression = f"{quote(column)} COLLATE NOCASE"
+        elif vendor == "postgresql":
+            expression = f"(UPPER({quote(column)}::text)) text_pattern_ops"
+        else:
+            return
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {quote(_index_name(column))} ON {table} ({expression})"
+        )
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor not in ("sqlite", "postgresql"):
+        return
+    for column in COLUMNS:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name(_index_name(column))}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0023_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
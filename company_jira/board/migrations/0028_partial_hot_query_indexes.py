@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0027_profile_visibility_changed_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='issue',
+            name='board_issue_project_dfd1e4_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='issue',
+            name='board_issue_project_1b767e_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='board_notif_user_id_93a8d7_idx',
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(condition=models.Q(('show_on_board', True)), fields=['project', 'created_at'], name='board_issue_on_board_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(condition=models.Q(('show_on_board', False)), fields=['project', 'created_at'], name='board_issue_detail_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user', 'last_occurred_at'], name='board_notif_unread_idx'),
+        ),
+    ]
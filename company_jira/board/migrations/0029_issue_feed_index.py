@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0028_partial_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(condition=models.Q(('show_on_board', True)), fields=['created_at', 'id', 'project'], name='board_issue_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0029_issue_feed_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profile',
+            name='role',
+            field=models.CharField(choices=[('BOSS', 'Director'), ('LEAD', 'Team Lead'), ('EMP', 'Member')], default='EMP', max_length=10),
+        ),
+    ]
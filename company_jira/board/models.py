@@ -8,6 +8,8 @@ import uuid
 import random
 import string
 
+from .previews import preview_exists
+
 #Profile 
 #-----------------------------------------------------------------------------------------------------------------------------#
 
@@ -44,6 +46,9 @@ class Profile(models.Model):
     department = models.CharField(
         max_length=20, choices=DEPARTMENT_CHOICES, blank=True, null=True
     )
+    # version of the user's cached visible-project set (board.visibility);
+    # moved on every save and whenever the user's projects change
+    visibility_changed_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.user.username} ({self.get_role_display()})"
@@ -101,6 +106,10 @@ class Project(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # bumped (F() + 1) whenever members, attachments or the project itself
+    # change; used as the version in board sidebar cache keys / ETags
+    generation = models.PositiveIntegerField(default=0, editable=False)
+
     class Meta:
         ordering = ["name"]
 
@@ -112,11 +121,18 @@ class Project(models.Model):
 class ProjectAttachment(models.Model):
     project = models.ForeignKey(Project, related_name="attachments", on_delete=models.CASCADE)
     file = models.FileField(upload_to="project_attachments/")
+    # new uploads share a content-addressed file (board.blobs); rows from
+    # before that keep their own file and have no blob
+    blob = models.ForeignKey("Blob", null=True, blank=True, related_name="+", on_delete=models.PROTECT)
+    original_name = models.CharField(max_length=255, blank=True)
     uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def filename(self):
-        return self.file.name.split("/")[-1]
+        return self.original_name or self.file.name.split("/")[-1]
+
+    def has_preview(self):
+        return preview_exists(self.file.name)
 
     def __str__(self):
         return f"{self.filename()} for {self.project}"
@@ -160,6 +176,31 @@ class Issue(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # My Tasks, nav badge counts
+            models.Index(fields=["assignee", "status", "due_date"]),
+            # Partial on show_on_board, which SQLite compiles to a bare
+            # column test that cannot seek a (project, show_on_board, ..)
+            # index. Kanban columns and lead / boss feeds:
+            models.Index(
+                fields=["project", "created_at"],
+                condition=models.Q(show_on_board=True),
+                name="board_issue_on_board_idx",
+            ),
+            # the all-projects boss feed (and multi-project lead feeds),
+            # keyset-paged along (created_at, id)
+            models.Index(
+                fields=["created_at", "id", "project"],
+                condition=models.Q(show_on_board=True),
+                name="board_issue_feed_idx",
+            ),
+            # My Tasks "latest detailed issue"
+            models.Index(
+                fields=["project", "created_at"],
+                condition=models.Q(show_on_board=False),
+                name="board_issue_detail_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.project.key}-{self.id}: {self.title}"
@@ -176,6 +217,60 @@ class Issue(models.Model):
         return self.due_date < today
 
 
+class ProjectIssueCounters(models.Model):
+    """
+    Denormalized issue counts for one project.
+
+    Kept up to date incrementally by board.counters on every Issue
+    save/delete, so dashboards can sum a handful of rows instead of
+    scanning the Issue table. ``overdue`` depends on the calendar, so it
+    is only trusted on the day stored in ``overdue_as_of``; older rows
+    are refreshed on read.
+    """
+    project = models.OneToOneField(
+        Project,
+        primary_key=True,
+        related_name="issue_counters",
+        on_delete=models.CASCADE,
+    )
+
+    # status buckets
+    todo = models.PositiveIntegerField(default=0)
+    in_progress = models.PositiveIntegerField(default=0)
+    done = models.PositiveIntegerField(default=0)
+
+    # priority buckets
+    low = models.PositiveIntegerField(default=0)
+    medium = models.PositiveIntegerField(default=0)
+    high = models.PositiveIntegerField(default=0)
+    critical = models.PositiveIntegerField(default=0)
+
+    overdue = models.PositiveIntegerField(default=0)
+    overdue_as_of = models.DateField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Issue counters for {self.project_id}"
+
+
+class IssueTombstone(models.Model):
+    """
+    Left behind when an Issue is deleted so live boards polling the delta
+    endpoint can drop the card. Plain ids (no FKs): the issue is gone and
+    the project may be deleted in the same cascade.
+    """
+    project_id = models.BigIntegerField()
+    issue_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["project_id", "deleted_at"]),
+        ]
+
+    def __str__(self):
+        return f"Issue {self.issue_id} deleted from project {self.project_id}"
+
+
 class Comment(models.Model):
     issue = models.ForeignKey(Issue, related_name="comments", on_delete=models.CASCADE)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -192,11 +287,18 @@ class Comment(models.Model):
 class Attachment(models.Model):
     issue = models.ForeignKey(Issue, related_name="attachments", on_delete=models.CASCADE)
     file = models.FileField(upload_to="attachments/")
+    # new uploads share a content-addressed file (board.blobs); rows from
+    # before that keep their own file and have no blob
+    blob = models.ForeignKey("Blob", null=True, blank=True, related_name="+", on_delete=models.PROTECT)
+    original_name = models.CharField(max_length=255, blank=True)
     uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def filename(self):
-        return self.file.name.split("/")[-1]
+        return self.original_name or self.file.name.split("/")[-1]
+
+    def has_preview(self):
+        return preview_exists(self.file.name)
 
     def __str__(self):
         return f"Attachment {self.file} for {self.issue}"
@@ -239,6 +341,17 @@ class EmailOTP(models.Model):
 #----------------------------Notification---------------------------------------------------------------------#
 
 class Notification(models.Model):
+    # what kind of activity; repeats of the same kind on the same project
+    # inside BOARD_NOTIFICATION_COALESCE_MINUTES update one row
+    KIND_STATUS = "status"
+    KIND_ISSUE = "issue"
+    KIND_PROJECT_CREATED = "project_created"
+    KIND_CHOICES = [
+        (KIND_STATUS, "Status update"),
+        (KIND_ISSUE, "Issue"),
+        (KIND_PROJECT_CREATED, "Project created"),
+    ]
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -252,11 +365,164 @@ class Notification(models.Model):
         blank=True,
         related_name="notifications",
     )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, blank=True)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # bumped each time more activity is merged into this row
+    occurrences = models.PositiveIntegerField(default=1)
+    last_occurred_at = models.DateTimeField(default=timezone.now)
+
     class Meta:
-        ordering = ["-created_at"]
+        ordering = ["-last_occurred_at"]
+        indexes = [
+            models.Index(fields=["user", "project", "kind", "last_occurred_at"]),
+            # inbox pages
+            models.Index(fields=["user", "last_occurred_at"]),
+            # retention purge; partial because SQLite compiles is_read=True
+            # to a bare column test that cannot seek a (is_read, ..) index
+            models.Index(
+                fields=["last_occurred_at"],
+                condition=models.Q(is_read=True),
+                name="board_notif_read_age_idx",
+            ),
+            # unread rows of one user (mark all read, coalescing); partial
+            # for the same reason
+            models.Index(
+                fields=["user", "last_occurred_at"],
+                condition=models.Q(is_read=False),
+                name="board_notif_unread_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} – {self.verb}"
+
+
+class NotificationCounter(models.Model):
+    """
+    Unread Notification count for one user, so the bell reads a single
+    row by primary key instead of counting. Maintained with F() updates
+    by board.notifications; ``manage.py rebuild_unread_counts`` repairs it.
+
+    A separate table rather than a Profile field: Profile is saved whole
+    from several places and would write a stale count back.
+    """
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name="notification_counter",
+        on_delete=models.CASCADE,
+    )
+    unread = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Unread notifications for {self.user_id}"
+
+#----------------------------Background jobs------------------------------------------------------------------#
+
+class Job(models.Model):
+    """
+    A unit of work for ``manage.py run_worker`` (see board.jobs).
+
+    Workers claim a row by moving it to RUNNING with ``locked_until`` set;
+    a RUNNING row whose lease has expired (worker crashed) is claimable
+    again.
+    """
+    STATUS_QUEUED = "QUEUED"
+    STATUS_RUNNING = "RUNNING"
+    STATUS_DONE = "DONE"
+    STATUS_FAILED = "FAILED"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    name = models.CharField(max_length=100)  # key in board.jobs registry
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["run_at", "pk"]
+        indexes = [
+            models.Index(fields=["status", "run_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+#----------------------------Chunked uploads------------------------------------------------------------------#
+
+class ChunkedUpload(models.Model):
+    """
+    A file being uploaded in pieces (see board.uploads). The bytes live in
+    MEDIA_ROOT/uploads_tmp/<id>.part until the upload is completed and
+    turned into an Attachment or ProjectAttachment.
+    """
+    TARGET_ISSUE = "issue"
+    TARGET_PROJECT = "project"
+    TARGET_CHOICES = [
+        (TARGET_ISSUE, "Issue"),
+        (TARGET_PROJECT, "Project"),
+    ]
+
+    STATUS_UPLOADING = "UPLOADING"
+    STATUS_COMPLETE = "COMPLETE"
+    STATUS_CHOICES = [
+        (STATUS_UPLOADING, "Uploading"),
+        (STATUS_COMPLETE, "Complete"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, related_name="chunked_uploads", on_delete=models.CASCADE)
+    target = models.CharField(max_length=10, choices=TARGET_CHOICES)
+    target_id = models.PositiveIntegerField()
+    filename = models.CharField(max_length=255)
+
+    size = models.PositiveBigIntegerField()  # declared by the client up front
+    received = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_UPLOADING)
+    attachment_id = models.PositiveIntegerField(null=True, blank=True)  # set once complete
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "status"]),
+            models.Index(fields=["updated_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size}, {self.status})"
+
+
+#----------------------------Attachment blobs------------------------------------------------------------------#
+
+class Blob(models.Model):
+    """
+    One stored file, named by the SHA-256 of its content (see board.blobs).
+    ``ref_count`` is the number of Attachment / ProjectAttachment rows
+    pointing at it; the file goes when it drops to zero.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.user} – {self.verb}"
\ No newline at end of file
+        return f"{self.sha256[:12]}… ({self.size} bytes, {self.ref_count} refs)"
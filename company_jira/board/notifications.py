@@ -1,18 +1,20 @@
 # board/notifications.py
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
 
-from .models import Notification, Profile, Project, Issue
+from .badges import unread_count
+from .events import publish_on_commit
+from .models import Notification, NotificationCounter, Profile, Project, Issue
 
 User = get_user_model()
 
 
-def _boss_ids():
-    """All users with role BOSS."""
-    return Profile.objects.filter(
-        role=Profile.ROLE_BOSS
-    ).values_list("user_id", flat=True)
-
-
 def _lead_ids_for_department(department):
     """
     All leads for a given department code.
@@ -26,39 +28,250 @@ def _lead_ids_for_department(department):
     ).values_list("user_id", flat=True)
 
 
+# ---------------------------------------------------------------------
+# Live events (SSE, see board.events)
+# ---------------------------------------------------------------------
+def _notification_event(notification, user_id):
+    project = notification.project
+    return {
+        "type": "notification",
+        "id": notification.pk,
+        "verb": notification.verb,
+        "occurrences": notification.occurrences,
+        "project": str(project) if project else None,
+        "unread": unread_count(user_id),
+    }
+
+
+def publish_notification(notification):
+    """Push a freshly created notification + the new bell count."""
+    publish_on_commit(
+        [notification.user_id],
+        lambda uid: _notification_event(notification, uid),
+    )
+
+
+def publish_notifications(notifications):
+    """``publish_notification`` for a batch, with one on_commit hook."""
+    by_user = {n.user_id: n for n in notifications}
+    publish_on_commit(by_user, lambda uid: _notification_event(by_user[uid], uid))
+
+
+def publish_unread_count(*user_ids):
+    """Push the current bell count (e.g. after mark-all-read)."""
+    publish_on_commit(user_ids, lambda uid: {"type": "unread", "unread": unread_count(uid)})
+
+
+# ---------------------------------------------------------------------
+# Unread counter (NotificationCounter)
+# ---------------------------------------------------------------------
+def bump_unread(user_ids, delta, rebuild_missing=True):
+    """Add ``delta`` (may be negative) to each user's unread counter."""
+    user_ids = {uid for uid in user_ids if uid}
+    if not user_ids or not delta:
+        return
+    updated = NotificationCounter.objects.filter(user_id__in=user_ids).update(
+        unread=Greatest(F("unread") + delta, Value(0), output_field=IntegerField())
+    )
+    if updated < len(user_ids) and rebuild_missing:
+        # some users have no row yet - count theirs from scratch
+        missing = user_ids - set(
+            NotificationCounter.objects.filter(user_id__in=user_ids).values_list("user_id", flat=True)
+        )
+        rebuild_unread_counts(missing)
+
+
+def remember_read_state(notification):
+    """post_init snapshot so a save can tell whether is_read flipped."""
+    notification._was_unread = bool(notification.pk) and not notification.__dict__.get("is_read", True)
+
+
+def notification_saved(notification, created):
+    was_unread = False if created else getattr(notification, "_was_unread", False)
+    now_unread = not notification.is_read
+    if was_unread != now_unread:
+        bump_unread([notification.user_id], 1 if now_unread else -1)
+    notification._was_unread = now_unread
+
+
+def notification_deleted(notification):
+    if not notification.is_read:
+        # no row usually means the user is being deleted in this cascade
+        bump_unread([notification.user_id], -1, rebuild_missing=False)
+
+
+def mark_read(user, pk):
+    """Mark one of ``user``'s notifications read. Returns True if it was unread."""
+    with transaction.atomic():
+        changed = Notification.objects.filter(pk=pk, user=user, is_read=False).update(is_read=True)
+        bump_unread([user.pk], -changed)
+    if changed:
+        publish_unread_count(user.pk)
+    return bool(changed)
+
+
+def mark_all_read(user):
+    with transaction.atomic():
+        changed = Notification.objects.filter(user=user, is_read=False).update(is_read=True)
+        # subtract what we flipped rather than writing 0, so a fan-out
+        # committing in between is not lost
+        bump_unread([user.pk], -changed)
+    publish_unread_count(user.pk)
+    return changed
+
+
+def rebuild_unread_counts(user_ids=None):
+    """
+    Recount the unread counters of the given users (or everyone) with one
+    grouped query and upsert the rows. Returns the number of rows written.
+    """
+    users = User.objects.all()
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    user_ids = list(users.values_list("pk", flat=True))
+
+    unread = dict(
+        Notification.objects.filter(is_read=False, user_id__in=user_ids)
+        .order_by()
+        .values("user_id")
+        .annotate(n=Count("pk"))
+        .values_list("user_id", "n")
+    )
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=uid, unread=unread.get(uid, 0)) for uid in user_ids],
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["user"],
+        update_fields=["unread"],
+    )
+    return len(user_ids)
+
+
+# ---------------------------------------------------------------------
+# Fan-out engine
+# ---------------------------------------------------------------------
+FANOUT_BATCH_SIZE = getattr(settings, "BOARD_NOTIFICATION_BATCH_SIZE", 500)
+COALESCE_WINDOW = timedelta(minutes=getattr(settings, "BOARD_NOTIFICATION_COALESCE_MINUTES", 15))
+
+
+def _coalesce(recipient_ids, project, kind, verb, now):
+    """
+    Fold this activity into each recipient's unread row of the same kind
+    on the same project from inside the window. Returns the rows that
+    were updated (in memory, for events), keyed by user id.
+    """
+    if not kind or not COALESCE_WINDOW:
+        return {}
+
+    rows = (
+        Notification.objects.filter(
+            user_id__in=recipient_ids,
+            project=project,
+            kind=kind,
+            is_read=False,
+            last_occurred_at__gte=now - COALESCE_WINDOW,
+        )
+        .order_by("user_id", "-last_occurred_at")
+        .values_list("pk", "user_id", "occurrences")
+    )
+    merged = {}
+    for pk, user_id, occurrences in rows:
+        if user_id not in merged:  # newest row per user
+            merged[user_id] = Notification(
+                pk=pk,
+                user_id=user_id,
+                project=project,
+                kind=kind,
+                verb=verb,
+                occurrences=occurrences + 1,
+                last_occurred_at=now,
+            )
+    if merged:
+        Notification.objects.filter(pk__in=[n.pk for n in merged.values()]).update(
+            verb=verb,
+            occurrences=F("occurrences") + 1,
+            last_occurred_at=now,
+        )
+    return merged
+
+
+def fan_out(recipients, verb, project=None, kind="", exclude=(), defer=False):
+    """
+    Create one Notification per recipient with batched INSERTs.
+
+    ``recipients`` is a user-id queryset (evaluated once, when the
+    fan-out runs) or any iterable of ids. ``exclude`` ids are dropped,
+    typically the actor. Recipients who already have an unread ``kind``
+    notification for ``project`` from the coalescing window get that row
+    updated instead of a new one. With ``defer=True`` the whole thing
+    waits for the surrounding transaction to commit, so the caller's
+    transaction is not held open for it and a rollback sends nothing.
+
+    bulk_create / update skip post_save, so the unread counters, bell
+    cache and live events that board.signals handles for single rows are
+    dealt with here.
+    """
+    exclude = {uid for uid in exclude if uid}
+
+    def run():
+        recipient_ids = set(recipients) - exclude
+        if not recipient_ids:
+            return []
+
+        now = timezone.now()
+        with transaction.atomic():
+            merged = _coalesce(recipient_ids, project, kind, verb, now)
+            created = Notification.objects.bulk_create(
+                [
+                    Notification(
+                        user_id=uid, project=project, kind=kind, verb=verb, last_occurred_at=now
+                    )
+                    for uid in sorted(recipient_ids - merged.keys())
+                ],
+                batch_size=FANOUT_BATCH_SIZE,
+            )
+            # merged rows were already unread, so only new rows count
+            bump_unread([n.user_id for n in created], 1)
+            publish_notifications(created + list(merged.values()))
+        return created
+
+    if defer:
+        transaction.on_commit(run)
+        return None
+    return run()
+
+
 # ---------------------------------------------------------------------
 # 1) Project created (we already use this in ProjectCreateView)
 # ---------------------------------------------------------------------
-def create_project_created_notifications(project: Project):
+def create_project_created_notifications(project: Project, defer=False):
     """
     Notify:
       - all project members
       - all BOSS users
     when a project is created.
     """
-    member_ids = project.members.values_list("id", flat=True)
-    boss_ids = _boss_ids()
-
-    recipient_ids = set(member_ids) | set(boss_ids)
-
-    # don’t notify the creator about their own action
-    if project.owner_id in recipient_ids:
-        recipient_ids.remove(project.owner_id)
+    recipients = User.objects.filter(
+        Q(projects=project) | Q(profile__role=Profile.ROLE_BOSS)
+    ).values_list("id", flat=True).distinct()
 
     verb = f"{project.owner.username} created project: {project.name}"
 
-    for uid in recipient_ids:
-        Notification.objects.create(
-            user_id=uid,
-            project=project,
-            verb=verb,
-        )
+    # don’t notify the creator about their own action
+    return fan_out(
+        recipients,
+        verb,
+        project=project,
+        kind=Notification.KIND_PROJECT_CREATED,
+        exclude=[project.owner_id],
+        defer=defer,
+    )
 
 
 # ---------------------------------------------------------------------
 # 2) Issue / Status activity on a project
 # ---------------------------------------------------------------------
-def create_issue_activity_notifications(issue: Issue, actor: User, verb: str):
+def create_issue_activity_notifications(issue: Issue, actor: User, verb: str, kind="", defer=False):
     """
     Notify on issue/status activity:
 
@@ -73,46 +286,30 @@ def create_issue_activity_notifications(issue: Issue, actor: User, verb: str):
 
     'verb' is the human text like:
       "ammar updated status" / "lakshita reported an issue"
+    'kind' (Notification.KIND_*) lets repeats within the window coalesce.
     """
     project = issue.project
     if project is None:
-        return
+        return None
 
-    # 1) All bosses
-    boss_ids = set(_boss_ids())
-
-    # 2) Project owner, if they are a Team Lead
-    lead_ids = set()
-    owner = project.owner
-    if (
-        owner is not None
-        and hasattr(owner, "profile")
-        and owner.profile.role == Profile.ROLE_LEAD
-    ):
-        lead_ids.add(owner.id)
-
-    # 3) Any Team Lead who is a member of this project
-    lead_member_ids = project.members.filter(
-        profile__role=Profile.ROLE_LEAD
-    ).values_list("id", flat=True)
-    lead_ids.update(lead_member_ids)
-
-    # Combine all recipients
-    recipient_ids = boss_ids | lead_ids
-
-    # 4) Don't notify the actor themselves
-    if actor and actor.id in recipient_ids:
-        recipient_ids.remove(actor.id)
-
-    if not recipient_ids:
-        return
+    # all three groups in one query
+    recipients = User.objects.filter(
+        Q(profile__role=Profile.ROLE_BOSS)
+        | (
+            Q(profile__role=Profile.ROLE_LEAD)
+            & (Q(pk=project.owner_id) | Q(projects=project))
+        )
+    ).values_list("id", flat=True).distinct()
 
     # Final message text
     full_verb = f"{verb} – {project.name}"
 
-    for uid in recipient_ids:
-        Notification.objects.create(
-            user_id=uid,
-            project=project,
-            verb=full_verb,
-        )
+    # Don't notify the actor themselves
+    return fan_out(
+        recipients,
+        full_verb,
+        project=project,
+        kind=kind,
+        exclude=[actor.id] if actor else (),
+        defer=defer,
+    )
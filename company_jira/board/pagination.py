@@ -0,0 +1,63 @@
+# board/pagination.py
+"""
+Keyset (cursor) pagination over ``(created_at, id)`` (or another
+timestamp field), newest first.
+
+Unlike OFFSET paging, every page is a plain range scan starting right
+after the last row the client saw, so page 50 costs the same as page 1:
+
+    paginator = KeysetPaginator(Issue.objects.filter(...), page_size=25)
+    items, next_cursor = paginator.page(request.GET.get("cursor"))
+
+``next_cursor`` is an opaque string (None on the last page).
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+class KeysetPaginator:
+    def __init__(self, queryset, page_size=25, field="created_at"):
+        self.queryset = queryset.order_by(f"-{field}", "-pk")
+        self.page_size = page_size
+        self.field = field
+
+    def page_queryset(self, cursor=None):
+        """The query behind one page (one row more than ``page_size``)."""
+        qs = self.queryset
+        if cursor:
+            value, pk = decode_cursor(cursor)
+            qs = qs.filter(
+                Q(**{f"{self.field}__lt": value}) | Q(**{self.field: value, "pk__lt": pk})
+            )
+        # fetch one extra row to know whether another page exists
+        return qs[: self.page_size + 1]
+
+    def page(self, cursor=None):
+        """Return ``(items, next_cursor)`` for the page after ``cursor``."""
+        items = list(self.page_queryset(cursor))
+        next_cursor = None
+        if len(items) > self.page_size:
+            items = items[: self.page_size]
+            last = items[-1]
+            next_cursor = encode_cursor(getattr(last, self.field), last.pk)
+        return items, next_cursor
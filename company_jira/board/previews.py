@@ -0,0 +1,161 @@
+# board/previews.py
+"""
+Thumbnails for image and PDF attachments.
+
+After an upload, board.signals queues a ``board.generate_preview`` job;
+the worker writes a small JPEG to ``previews/<name>.jpg``, a tree of its
+own so a thumbnail is never mistaken for an uploaded file. A
+deduplicated blob gets one thumbnail however many attachments share it.
+Pages link the thumbnail through the download views, which serve it
+with far-future cache headers: the original never changes, so neither
+does its preview.
+
+Both renderers are optional. Images need Pillow; PDFs need PyMuPDF, or
+poppler's ``pdftoppm`` on the PATH. Without them attachments are just
+listed by name, as before.
+"""
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+
+from django.conf import settings
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:  # pragma: no cover - optional dependency
+    fitz = None
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = getattr(settings, "BOARD_THUMBNAIL_SIZE", (320, 320))
+THUMBNAIL_QUALITY = 80
+PREVIEW_DIR = "previews"
+SUFFIX = ".jpg"
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tif", ".tiff"}
+PDF_EXTENSIONS = {".pdf"}
+
+# refuse to decode anything bigger (decompression bombs, giant scans)
+MAX_PIXELS = getattr(settings, "BOARD_THUMBNAIL_MAX_PIXELS", 80_000_000)
+
+
+def preview_name(name):
+    return f"{PREVIEW_DIR}/{name}{SUFFIX}"
+
+
+def original_name(name):
+    """The stored file a ``previews/...`` name belongs to, or None."""
+    prefix = PREVIEW_DIR + "/"
+    if name.startswith(prefix) and name.endswith(SUFFIX):
+        return name[len(prefix):-len(SUFFIX)]
+    return None
+
+
+def _full_path(name):
+    return os.path.join(settings.MEDIA_ROOT, *name.split("/"))
+
+
+def preview_exists(name):
+    return bool(name) and os.path.exists(_full_path(preview_name(name)))
+
+
+def can_preview(filename):
+    """Whether a renderer is available for a file called ``filename``."""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in IMAGE_EXTENSIONS:
+        return Image is not None
+    if ext in PDF_EXTENSIONS:
+        return Image is not None and (fitz is not None or shutil.which("pdftoppm") is not None)
+    return False
+
+
+def _thumbnail(image, out_path):
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(THUMBNAIL_SIZE)
+    if image.mode not in ("RGB", "L"):
+        # flatten transparency onto white rather than black
+        background = Image.new("RGB", image.size, "white")
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+    image.save(out_path, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+
+
+def _render_image(src, out_path):
+    with Image.open(src) as image:
+        # open() only reads the header; refuse before anything is decoded
+        if image.width * image.height > MAX_PIXELS:
+            raise ValueError(f"{image.width}x{image.height} is over {MAX_PIXELS} pixels")
+        # JPEG can decode at 1/2..1/8 scale directly, which keeps memory low
+        image.draft("RGB", THUMBNAIL_SIZE)
+        _thumbnail(image, out_path)
+
+
+def _render_pdf(src, out_path):
+    if fitz is not None:
+        with fitz.open(src) as doc:
+            if not doc.page_count:
+                return False
+            page = doc[0]
+            zoom = min(THUMBNAIL_SIZE[0] / page.rect.width, THUMBNAIL_SIZE[1] / page.rect.height) * 2
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+            image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+        _thumbnail(image, out_path)
+        return True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prefix = os.path.join(tmp, "page")
+        subprocess.run(
+            ["pdftoppm", "-f", "1", "-l", "1", "-singlefile", "-png",
+             "-scale-to", str(max(THUMBNAIL_SIZE) * 2), src, prefix],
+            check=True,
+            capture_output=True,
+            timeout=60,
+        )
+        _render_image(prefix + ".png", out_path)
+    return True
+
+
+def generate_preview(name, filename):
+    """
+    Write the thumbnail for the stored file ``name`` (the original upload
+    was called ``filename``). Returns False when there is nothing to do.
+    """
+    src = _full_path(name)
+    out = _full_path(preview_name(name))
+    if not can_preview(filename) or os.path.exists(out) or not os.path.exists(src):
+        return False
+
+    # render to a temp file and rename, so a half-written JPEG is never served
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(out))
+    os.close(fd)
+    try:
+        if os.path.splitext(filename)[1].lower() in PDF_EXTENSIONS:
+            if not _render_pdf(src, tmp):
+                return False
+        else:
+            _render_image(src, tmp)
+        os.replace(tmp, out)
+    except (OSError, ValueError, RuntimeError, Image.DecompressionBombError, subprocess.SubprocessError):
+        # corrupt, encrypted or huge: retrying won't help, keep the plain link
+        logger.info("No preview for %s (%s)", name, filename, exc_info=True)
+        return False
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return True
+
+
+def remove_preview(name):
+    try:
+        os.remove(_full_path(preview_name(name)))
+    except FileNotFoundError:
+        pass
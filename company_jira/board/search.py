@@ -0,0 +1,278 @@
+# board/search.py
+"""
+Full-text search over issues, comments and projects.
+
+On SQLite the text lives in the ``board_search`` FTS5 table (created by
+migration 0023) and is kept in sync from board.signals; results are
+ranked with bm25 inside the FTS query and filtered to the projects the
+user can see, and only the rows up to the requested page are read. Each
+object maps to a fixed rowid (``pk * 4 + kind``) so updating or
+removing an entry is a rowid lookup, not a scan of the index.
+
+Other databases fall back to icontains lookups, which is fine for small
+installs. ``manage.py reindex_search`` rebuilds the table from scratch.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Comment, Issue, Project
+from .visibility import visible_project_ids
+
+TABLE = "board_search"
+
+KIND_ISSUE = 1
+KIND_COMMENT = 2
+KIND_PROJECT = 3
+_KIND_SLOTS = 4
+
+# title matches count ten times as much as body matches
+_TITLE_WEIGHT = 10.0
+_BODY_WEIGHT = 1.0
+
+# paging stops here; nobody reads page 51
+MAX_RESULTS = getattr(settings, "BOARD_SEARCH_MAX_RESULTS", 1000)
+
+SNIPPET_WORDS = 24
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_enabled():
+    return connection.vendor == "sqlite"
+
+
+def _rowid(kind, pk):
+    return pk * _KIND_SLOTS + kind
+
+
+def _documents(obj):
+    """``(kind, pk, project_id, title, body)`` for an indexed object."""
+    if isinstance(obj, Issue):
+        return KIND_ISSUE, obj.pk, obj.project_id, obj.title, obj.description
+    if isinstance(obj, Comment):
+        return KIND_COMMENT, obj.pk, obj.issue.project_id, obj.issue.title, obj.body
+    if isinstance(obj, Project):
+        body = "\n".join(part for part in (obj.key, obj.description, obj.sop) if part)
+        return KIND_PROJECT, obj.pk, obj.pk, obj.name, body
+    raise TypeError(f"{type(obj).__name__} is not searchable")
+
+
+# ---------------------------------------------------------------------
+# index maintenance
+# ---------------------------------------------------------------------
+def _write(cursor, rows):
+    cursor.executemany(
+        f"DELETE FROM {TABLE} WHERE rowid = %s", [(_rowid(kind, pk),) for kind, pk, *_ in rows]
+    )
+    cursor.executemany(
+        f"INSERT INTO {TABLE} (rowid, project_id, title, body) VALUES (%s, %s, %s, %s)",
+        [(_rowid(kind, pk), project_id, title, body or "") for kind, pk, project_id, title, body in rows],
+    )
+
+
+def index_object(obj):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        _write(cursor, [_documents(obj)])
+
+
+def remove_object(obj):
+    if not fts_enabled():
+        return
+    kind = {Issue: KIND_ISSUE, Comment: KIND_COMMENT, Project: KIND_PROJECT}[type(obj)]
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [_rowid(kind, obj.pk)])
+
+
+def update_issue_comments(issue):
+    """Comments carry their issue's project id and title; follow a move or rename."""
+    if not fts_enabled():
+        return
+    rowids = [
+        (issue.project_id, issue.title, _rowid(KIND_COMMENT, pk))
+        for pk in Comment.objects.filter(issue=issue).values_list("pk", flat=True)
+    ]
+    if rowids:
+        with connection.cursor() as cursor:
+            cursor.executemany(f"UPDATE {TABLE} SET project_id = %s, title = %s WHERE rowid = %s", rowids)
+
+
+def rebuild_index(batch_size=1000):
+    """Empty and refill the search table. Returns the number of rows indexed."""
+    if not fts_enabled():
+        return 0
+
+    sources = [
+        Issue.objects.only("pk", "project_id", "title", "description"),
+        Comment.objects.select_related("issue").only("pk", "body", "issue__project_id", "issue__title"),
+        Project.objects.only("pk", "name", "key", "description", "sop"),
+    ]
+    total = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+        for queryset in sources:
+            batch = []
+            for obj in queryset.order_by("pk").iterator(chunk_size=batch_size):
+                batch.append(_documents(obj))
+                if len(batch) >= batch_size:
+                    _write(cursor, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                _write(cursor, batch)
+                total += len(batch)
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+    return total
+
+
+# ---------------------------------------------------------------------
+# querying
+# ---------------------------------------------------------------------
+class SearchHit:
+    def __init__(self, kind, obj, snippet=""):
+        self.kind = kind
+        self.obj = obj
+        self.snippet = snippet
+
+    @property
+    def kind_label(self):
+        return {KIND_ISSUE: "Issue", KIND_COMMENT: "Comment", KIND_PROJECT: "Project"}[self.kind]
+
+
+def _words(query):
+    return [w.casefold() for w in _TOKEN.findall(query)]
+
+
+def _match_expression(words):
+    """
+    Turn free text into a safe FTS5 query: every word must match, the
+    last one as a prefix (so results show up while typing).
+    """
+    terms = [f'"{w}"' for w in words[:-1]] + [f'"{words[-1]}"*']
+    return " ".join(terms)
+
+
+def _snippet(texts, words):
+    """
+    A window of the first text that mentions one of ``words``, with the
+    matches wrapped in <mark>. Built here rather than with FTS5's
+    snippet(), which would have to run for every candidate row.
+    """
+    for text in texts:
+        tokens = list(_TOKEN.finditer(text or ""))
+        hits = [i for i, t in enumerate(tokens) if t.group().casefold().startswith(tuple(words))]
+        if not hits:
+            continue
+
+        start = max(hits[0] - SNIPPET_WORDS // 3, 0)
+        window = tokens[start:start + SNIPPET_WORDS]
+        html, pos = [], window[0].start()
+        for i, token in enumerate(window, start):
+            html.append(escape(text[pos:token.start()]))
+            if i in hits:
+                html.append(f"<mark>{escape(token.group())}</mark>")
+            else:
+                html.append(escape(token.group()))
+            pos = token.end()
+        prefix = "… " if start else ""
+        suffix = " …" if start + SNIPPET_WORDS < len(tokens) else escape(text[pos:])
+        return mark_safe(prefix + "".join(html) + suffix)
+    return ""
+
+
+def _texts(kind, obj):
+    if kind == KIND_ISSUE:
+        return obj.description, obj.title
+    if kind == KIND_COMMENT:
+        return (obj.body,)
+    return obj.description, obj.sop, obj.name
+
+
+def _hydrate(rowids, words):
+    """Load the objects behind ``rowids`` (in order) with one query per kind."""
+    ids = {KIND_ISSUE: [], KIND_COMMENT: [], KIND_PROJECT: []}
+    for rowid in rowids:
+        ids[rowid % _KIND_SLOTS].append(rowid // _KIND_SLOTS)
+
+    objects = {
+        KIND_ISSUE: Issue.objects.select_related("project").in_bulk(ids[KIND_ISSUE]),
+        KIND_COMMENT: Comment.objects.select_related("issue__project", "author").in_bulk(ids[KIND_COMMENT]),
+        KIND_PROJECT: Project.objects.in_bulk(ids[KIND_PROJECT]),
+    }
+    hits = []
+    for rowid in rowids:
+        kind = rowid % _KIND_SLOTS
+        obj = objects[kind].get(rowid // _KIND_SLOTS)
+        if obj is not None:  # deleted since it was indexed
+            hits.append(SearchHit(kind, obj, _snippet(_texts(kind, obj), words)))
+    return hits
+
+
+def _fts_search(words, project_ids, limit):
+    """Rowids of the best ``limit`` matching rows, best first."""
+    # "rank MATCH" swaps in the weighted bm25, and ORDER BY rank lets FTS5
+    # rank every match itself and keep only the top ``limit``
+    sql = [f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s AND rank MATCH %s"]
+    params = [_match_expression(words), f"bm25(0, {_TITLE_WEIGHT}, {_BODY_WEIGHT})"]
+    if project_ids is not None:
+        if not project_ids:
+            return []
+        # checked per match before the LIMIT, so hidden rows never use up a page
+        sql.append(f"AND project_id IN ({', '.join(['%s'] * len(project_ids))})")
+        params.extend(project_ids)
+    sql.append("ORDER BY rank LIMIT %s")
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(" ".join(sql), params)
+        return [rowid for rowid, in cursor.fetchall()]
+
+
+def _fallback_search(words, project_ids, limit):
+    issue_q, comment_q, project_q = Q(), Q(), Q()
+    for w in words:
+        issue_q &= Q(title__icontains=w) | Q(description__icontains=w)
+        comment_q &= Q(body__icontains=w)
+        project_q &= Q(name__icontains=w) | Q(description__icontains=w) | Q(sop__icontains=w)
+
+    issues = Issue.objects.filter(issue_q)
+    comments = Comment.objects.filter(comment_q)
+    projects = Project.objects.filter(project_q)
+    if project_ids is not None:
+        issues = issues.filter(project_id__in=project_ids)
+        comments = comments.filter(issue__project_id__in=project_ids)
+        projects = projects.filter(pk__in=project_ids)
+
+    rowids = [_rowid(KIND_PROJECT, pk) for pk in projects.order_by("name").values_list("pk", flat=True)[:limit]]
+    rowids += [_rowid(KIND_ISSUE, pk) for pk in issues.order_by("-updated_at").values_list("pk", flat=True)[:limit]]
+    rowids += [_rowid(KIND_COMMENT, pk) for pk in comments.order_by("-created_at").values_list("pk", flat=True)[:limit]]
+    return rowids[:limit]
+
+
+def search(user, query, page=1, page_size=20):
+    """
+    Ranked hits for ``query`` among the projects ``user`` can see.
+    Returns ``(hits, has_next)``.
+    """
+    words = _words(query)
+    if not words:
+        return [], False
+
+    ids = visible_project_ids(user)
+    project_ids = sorted(ids) if ids is not None else None
+    offset = (max(page, 1) - 1) * page_size
+    # one extra row tells whether there is a next page
+    limit = min(offset + page_size + 1, MAX_RESULTS)
+    if offset >= limit:
+        return [], False
+    find = _fts_search if fts_enabled() else _fallback_search
+    rowids = find(words, project_ids, limit)
+
+    page_rowids = rowids[offset:offset + page_size]
+    return _hydrate(page_rowids, words), len(rowids) > offset + page_size
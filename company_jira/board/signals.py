@@ -1,14 +1,34 @@
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
 
-from .models import Profile
+from . import blobs, counters, media, previews, search
+from .delta import record_tombstone
+from .jobs import enqueue
+from . import notifications
+from .notifications import publish_notification
+from .badges import invalidate_nav_counts
+from .models import (
+    Attachment,
+    Comment,
+    Issue,
+    Notification,
+    NotificationCounter,
+    Profile,
+    Project,
+    ProjectAttachment,
+    ProjectIssueCounters,
+)
+from .visibility import invalidate_visible_projects
 
 
 @receiver(post_save, sender=User)
 def create_profile_for_new_user(sender, instance, created, **kwargs):
     if created:
         Profile.objects.create(user=instance)
+        NotificationCounter.objects.get_or_create(user=instance)
 
 
 @receiver(post_save, sender=User)
@@ -16,3 +36,242 @@ def save_profile_for_user(sender, instance, **kwargs):
     # make sure profile is saved when user is saved
     if hasattr(instance, "profile"):
         instance.profile.save()
+
+
+#------------------------Project issue counters-------------------------------#
+
+@receiver(post_save, sender=Project)
+def create_issue_counters_for_new_project(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        ProjectIssueCounters.objects.get_or_create(
+            project=instance,
+            defaults={"overdue_as_of": timezone.localdate()},
+        )
+
+
+@receiver(post_init, sender=Issue)
+def remember_issue_counter_state(sender, instance, **kwargs):
+    counters.remember_issue_state(instance)
+
+
+@receiver(post_save, sender=Issue)
+def update_issue_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        counters.issue_saved(instance, created)
+
+
+@receiver(post_delete, sender=Issue)
+def update_issue_counters_on_delete(sender, instance, **kwargs):
+    counters.issue_deleted(instance)
+
+
+#------------------------Nav badge counts-------------------------------------#
+
+@receiver(post_init, sender=Issue)
+def remember_issue_assignee(sender, instance, **kwargs):
+    instance._badge_assignee_id = instance.__dict__.get("assignee_id")
+
+
+@receiver(post_save, sender=Issue)
+@receiver(post_delete, sender=Issue)
+def invalidate_assignee_nav_counts(sender, instance, **kwargs):
+    invalidate_nav_counts(
+        getattr(instance, "_badge_assignee_id", None),
+        instance.__dict__.get("assignee_id"),
+    )
+    instance._badge_assignee_id = instance.__dict__.get("assignee_id")
+
+
+#------------------------Unread notification counter--------------------------#
+
+@receiver(post_init, sender=Notification)
+def remember_notification_read_state(sender, instance, **kwargs):
+    notifications.remember_read_state(instance)
+
+
+@receiver(post_save, sender=Notification)
+def update_unread_counter_on_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        notifications.notification_saved(instance, created)
+
+
+@receiver(post_delete, sender=Notification)
+def update_unread_counter_on_delete(sender, instance, **kwargs):
+    notifications.notification_deleted(instance)
+
+
+#------------------------Visible projects cache-------------------------------#
+
+@receiver(post_init, sender=Project)
+def remember_project_owner(sender, instance, **kwargs):
+    instance._visibility_owner_id = instance.__dict__.get("owner_id")
+
+
+@receiver(post_save, sender=Project)
+def invalidate_visibility_on_owner_change(sender, instance, created, **kwargs):
+    old_owner_id = getattr(instance, "_visibility_owner_id", None)
+    if created or old_owner_id != instance.owner_id:
+        invalidate_visible_projects(old_owner_id, instance.owner_id)
+    instance._visibility_owner_id = instance.owner_id
+
+
+@receiver(pre_delete, sender=Project)
+def invalidate_visibility_on_project_delete(sender, instance, **kwargs):
+    member_ids = list(instance.members.values_list("pk", flat=True))
+    invalidate_visible_projects(instance.owner_id, *member_ids)
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def invalidate_visibility_on_members_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # user.projects.add(...) etc. - only that user's view changes
+        if action.startswith("post_"):
+            invalidate_visible_projects(instance.pk)
+        return
+
+    if action == "pre_clear":
+        instance._visibility_cleared_ids = list(instance.members.values_list("pk", flat=True))
+    elif action == "post_clear":
+        invalidate_visible_projects(*getattr(instance, "_visibility_cleared_ids", []))
+    elif action in ("post_add", "post_remove"):
+        invalidate_visible_projects(*(pk_set or ()))
+
+
+# Profile.role changes need no receiver: saving a Profile moves its
+# visibility_changed_at (auto_now), which is part of the cache key.
+
+
+#------------------------Project generation (sidebar cache version)-----------#
+
+def _bump_generation(*project_ids):
+    ids = {pid for pid in project_ids if pid}
+    if ids:
+        Project.objects.filter(pk__in=ids).update(generation=F("generation") + 1)
+
+
+@receiver(post_save, sender=Project)
+def bump_generation_on_project_save(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        _bump_generation(instance.pk)
+
+
+@receiver(post_save, sender=ProjectAttachment)
+@receiver(post_delete, sender=ProjectAttachment)
+def bump_generation_on_attachment_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _bump_generation(instance.project_id)
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def bump_generation_on_members_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            _bump_generation(instance.pk)
+        return
+
+    # user.projects.add/remove/clear(...)
+    if action == "pre_clear":
+        instance._generation_cleared_ids = list(instance.projects.values_list("pk", flat=True))
+    elif action == "post_clear":
+        _bump_generation(*getattr(instance, "_generation_cleared_ids", []))
+    elif action in ("post_add", "post_remove"):
+        _bump_generation(*(pk_set or ()))
+
+
+#------------------------Board delta tombstones-------------------------------#
+
+@receiver(post_delete, sender=Issue)
+def leave_tombstone_for_live_boards(sender, instance, **kwargs):
+    record_tombstone(instance)
+
+
+#------------------------Live notification events-----------------------------#
+
+@receiver(post_save, sender=Notification)
+def push_new_notification(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        publish_notification(instance)
+
+
+#------------------------Full-text search index-------------------------------#
+
+@receiver(post_init, sender=Issue)
+def remember_issue_search_fields(sender, instance, **kwargs):
+    instance._search_project_id = instance.__dict__.get("project_id")
+    instance._search_title = instance.__dict__.get("title")
+
+
+@receiver(post_save, sender=Issue)
+def index_issue_for_search(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_object(instance)
+    old_project_id = getattr(instance, "_search_project_id", None)
+    old_title = getattr(instance, "_search_title", None)
+    moved = old_project_id is not None and old_project_id != instance.project_id
+    renamed = old_title is not None and old_title != instance.title
+    if not created and (moved or renamed):
+        search.update_issue_comments(instance)
+    instance._search_project_id = instance.project_id
+    instance._search_title = instance.title
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Project)
+def index_for_search(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_object(instance)
+
+
+@receiver(post_delete, sender=Issue)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Project)
+def remove_from_search(sender, instance, **kwargs):
+    search.remove_object(instance)
+
+
+#------------------------Attachment blobs-------------------------------------#
+
+@receiver(post_init, sender=Attachment)
+@receiver(post_init, sender=ProjectAttachment)
+def remember_attachment_blob(sender, instance, **kwargs):
+    blobs.remember_blob(instance)
+
+
+@receiver(pre_save, sender=Attachment)
+@receiver(pre_save, sender=ProjectAttachment)
+def store_attachment_blob(sender, instance, raw=False, **kwargs):
+    if not raw:
+        blobs.attachment_pre_save(instance)
+
+
+@receiver(post_save, sender=Attachment)
+@receiver(post_save, sender=ProjectAttachment)
+def release_replaced_blob(sender, instance, raw=False, **kwargs):
+    if not raw:
+        blobs.attachment_saved(instance)
+
+
+@receiver(post_delete, sender=Attachment)
+@receiver(post_delete, sender=ProjectAttachment)
+def release_attachment_blob(sender, instance, **kwargs):
+    blobs.attachment_deleted(instance)
+
+
+@receiver(post_delete, sender=Attachment)
+@receiver(post_delete, sender=ProjectAttachment)
+def delete_attachment_file(sender, instance, **kwargs):
+    # rows from before blobs own their file; blob files go with the last reference
+    media.file_deleted(instance)
+
+
+#------------------------Attachment previews----------------------------------#
+
+@receiver(post_save, sender=Attachment)
+@receiver(post_save, sender=ProjectAttachment)
+def queue_attachment_preview(sender, instance, created, raw=False, **kwargs):
+    if not created or raw or not instance.file:
+        return
+    filename = instance.filename()
+    if previews.can_preview(filename) and not previews.preview_exists(instance.file.name):
+        enqueue("board.generate_preview", file_name=instance.file.name, filename=filename)
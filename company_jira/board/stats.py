@@ -0,0 +1,110 @@
+# board/stats.py
+from django.db.models import Count, IntegerField, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .counters import COUNTER_FIELDS, refresh_stale_overdue
+from .models import Issue, ProjectIssueCounters
+
+
+class IssueStats:
+    """
+    Status / priority / overdue counts for a scope of issues.
+
+    Every bucket is computed with conditional aggregation, so one scope
+    costs exactly one query no matter how many buckets the page shows:
+
+        stats = IssueStats.for_assignee(request.user)
+        stats.status_counts()    # {"todo": 3, "in_progress": 1, "done": 7}
+        stats.priority_counts()  # {"low": 2, "medium": 5, ...}
+        stats.overdue            # 1
+
+    The query only runs the first time a count is read. Project scopes
+    sum the maintained ProjectIssueCounters rows instead of scanning the
+    Issue table.
+    """
+
+    STATUS_BUCKETS = {
+        "todo": "TODO",
+        "in_progress": "IN_PROGRESS",
+        "done": "DONE",
+    }
+    PRIORITY_BUCKETS = {
+        "low": "LOW",
+        "medium": "MEDIUM",
+        "high": "HIGH",
+        "critical": "CRITICAL",
+    }
+
+    def __init__(self, queryset, counters=None):
+        self.queryset = queryset
+        # optional ProjectIssueCounters queryset covering the same scope
+        self.counters = counters
+        self._counts = None
+
+    # ------------------------------------------------------------------
+    # scopes
+    # ------------------------------------------------------------------
+    @classmethod
+    def for_projects(cls, projects):
+        """All issues in the given projects (queryset or list of ids)."""
+        return cls(
+            Issue.objects.filter(project__in=projects),
+            counters=ProjectIssueCounters.objects.filter(project__in=projects),
+        )
+
+    @classmethod
+    def for_assignee(cls, user):
+        """All issues assigned to ``user``."""
+        return cls(Issue.objects.filter(assignee=user))
+
+    # ------------------------------------------------------------------
+    # counts
+    # ------------------------------------------------------------------
+    @property
+    def counts(self):
+        if self._counts is None:
+            self._counts = self._aggregate()
+        return self._counts
+
+    def _aggregate(self):
+        if self.counters is not None:
+            return self._sum_counters()
+
+        today = timezone.localdate()
+        aggregates = {}
+        for key, value in self.STATUS_BUCKETS.items():
+            aggregates[key] = Count("pk", filter=Q(status=value))
+        for key, value in self.PRIORITY_BUCKETS.items():
+            aggregates[key] = Count("pk", filter=Q(priority=value))
+        aggregates["overdue"] = Count(
+            "pk", filter=Q(due_date__lt=today) & ~Q(status="DONE")
+        )
+        # order_by() drops the model's default ordering from the aggregate
+        return self.queryset.order_by().aggregate(**aggregates)
+
+    def _sum_counters(self):
+        today = timezone.localdate()
+        aggregates = {
+            field: Coalesce(Sum(field), 0, output_field=IntegerField())
+            for field in COUNTER_FIELDS
+        }
+        aggregates["stale"] = Count("pk", filter=~Q(overdue_as_of=today) | Q(overdue_as_of=None))
+
+        counts = self.counters.order_by().aggregate(**aggregates)
+        if counts.pop("stale"):
+            # first read of the day: recount overdue, then sum again
+            refresh_stale_overdue(self.counters)
+            counts = self.counters.order_by().aggregate(**aggregates)
+            counts.pop("stale")
+        return counts
+
+    def status_counts(self):
+        return {key: self.counts[key] for key in self.STATUS_BUCKETS}
+
+    def priority_counts(self):
+        return {key: self.counts[key] for key in self.PRIORITY_BUCKETS}
+
+    @property
+    def overdue(self):
+        return self.counts["overdue"]
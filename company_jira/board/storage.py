@@ -0,0 +1,39 @@
+# board/storage.py
+"""
+File storage that fans uploads out into hashed subdirectories.
+
+``attachments/brief.pdf`` is stored as ``attachments/3f/a2/brief.pdf``,
+the two levels taken from a hash of the file name, so no directory ends
+up with more than a few hundred entries however many files there are.
+Content-addressed attachment blobs (board.blobs) use the same two-level
+layout keyed by their SHA-256.
+
+Files saved before this storage was configured stay where they are
+until ``manage.py migrate_media_layout`` moves them.
+"""
+import hashlib
+import posixpath
+import re
+
+from django.core.files.storage import FileSystemStorage
+
+_SHARD = re.compile(r"^[0-9a-f]{2}$")
+
+
+def shard_name(name):
+    """``dir/file`` -> ``dir/aa/bb/file``; names already in that layout are returned as is."""
+    if is_sharded(name):
+        return name
+    dirname, basename = posixpath.split(name)
+    digest = hashlib.md5(basename.encode(), usedforsecurity=False).hexdigest()
+    return posixpath.join(dirname, digest[:2], digest[2:4], basename)
+
+
+def is_sharded(name):
+    parts = name.split("/")
+    return len(parts) >= 3 and bool(_SHARD.match(parts[-3])) and bool(_SHARD.match(parts[-2]))
+
+
+class ShardedFileSystemStorage(FileSystemStorage):
+    def generate_filename(self, filename):
+        return super().generate_filename(shard_name(filename.replace("\\", "/")))
@@ -1,3 +1,1465 @@
-from django.test import TestCase
+import asyncio
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Q
+from django.http import Http404
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import counters, jobs, previews
+from . import search as board_search
+from .delta import OVERLAP, TOMBSTONE_RETENTION
+from .events import BaseBroker, InProcessBroker, get_broker
+from .badges import get_nav_counts
+from .blobs import blob_name
+from .checks import check_shared_cache
+from .downloads import _byte_range, serve_file
+from .media import delete_orphans, find_orphans
+from .models import (
+    Attachment,
+    Blob,
+    ChunkedUpload,
+    Comment,
+    EmailOTP,
+    Issue,
+    IssueTombstone,
+    Job,
+    Notification,
+    NotificationCounter,
+    Profile,
+    Project,
+    ProjectAttachment,
+    ProjectIssueCounters,
+)
+from .notifications import (
+    COALESCE_WINDOW,
+    create_issue_activity_notifications,
+    fan_out,
+    mark_all_read,
+    mark_read,
+)
+from .pagination import KeysetPaginator, encode_cursor
+from .previews import preview_name
+from .stats import IssueStats
+from .uploads import temp_path
+from .visibility import invalidate_visible_projects, visible_project_ids
+from .views import StatusFeedMixin
 
 # Create your tests here.
+
+
+#-----------------------------Query plans----------------------------------#
+
+# "SCAN board_issue" is a full table scan; "SCAN ... USING INDEX" and
+# "SEARCH ..." are fine
+FULL_SCAN = re.compile(r"\bSCAN (?!.*\bUSING\b)(?!CONSTANT ROW)")
+# the rows came off the index in the wrong order and get sorted again
+TEMP_SORT = "USE TEMP B-TREE FOR ORDER BY"
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN is SQLite syntax")
+class HotQueryPlanTests(TestCase):
+    """
+    The queries behind the busiest pages must stay on an index. A failure
+    here usually means a filter changed shape or an index was dropped.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("plan", "plan@garagecollective.agency")
+        cls.project = Project.objects.create(name="Plan", key="PLN", owner=cls.user)
+
+    def assertUsesIndex(self, queryset, index):
+        """
+        ``queryset`` seeks ``index`` (so dropping or reshaping it fails
+        here) and never sorts its rows after reading them.
+        """
+        plan = queryset.explain()
+        context = f"\n{plan}\n\n{queryset.query}"
+        scans = [line for line in plan.splitlines() if FULL_SCAN.search(line)]
+        self.assertFalse(scans, f"full table scan in:{context}")
+        self.assertRegex(plan, rf"\bINDEX {index}\b", f"{index} not used in:{context}")
+        self.assertNotIn(TEMP_SORT, plan, f"extra sort in:{context}")
+
+    def test_board_columns(self):
+        # the view groups by status in Python, in the model's -created_at order
+        self.assertUsesIndex(
+            Issue.objects.filter(project=self.project, show_on_board=True),
+            "board_issue_on_board_idx",
+        )
+
+    def test_nav_counts(self):
+        # only counted (no ORDER BY, no columns), so the index covers them
+        open_issues = Issue.objects.filter(assignee=self.user).exclude(status="DONE").order_by().values("pk")
+        self.assertUsesIndex(open_issues, "board_issue_assigne_fa98a2_idx")
+        self.assertUsesIndex(
+            open_issues.filter(due_date__lt=timezone.localdate()), "board_issue_assigne_fa98a2_idx"
+        )
+
+    def feed_page(self, project_ids):
+        """A "Load older" page of the status feed, as the views build it."""
+        paginator = KeysetPaginator(StatusFeedMixin().get_feed_queryset(project_ids), 25)
+        return paginator.page_queryset(encode_cursor(timezone.now(), 1000))
+
+    def test_status_feed_one_project(self):
+        self.assertUsesIndex(self.feed_page([self.project.pk]), "board_issue_on_board_idx")
+
+    def test_status_feed_several_projects(self):
+        # team leads
+        other = Project.objects.create(name="Other", key="OTH", owner=self.user)
+        self.assertUsesIndex(self.feed_page([self.project.pk, other.pk]), "board_issue_feed_idx")
+
+    def test_status_feed_all_projects(self):
+        # bosses
+        self.assertUsesIndex(self.feed_page(None), "board_issue_feed_idx")
+
+    def test_my_tasks_detail_issue(self):
+        self.assertUsesIndex(
+            Issue.objects.filter(project=self.project, show_on_board=False).order_by("-created_at", "-pk")[:1],
+            "board_issue_detail_idx",
+        )
+
+    def test_board_delta(self):
+        # board.delta sorts the few changed rows itself
+        self.assertUsesIndex(
+            Issue.objects.filter(project=self.project, updated_at__gt=timezone.now()).order_by(),
+            "board_issue_project_id_ff4f7ad0",
+        )
+
+    def test_inbox(self):
+        self.assertUsesIndex(
+            Notification.objects.filter(user=self.user).order_by("-last_occurred_at", "-pk")[:31],
+            "board_notif_user_id_4ec78f_idx",
+        )
+        self.assertUsesIndex(
+            Notification.objects.filter(user=self.user, is_read=False), "board_notif_unread_idx"
+        )
+
+    def test_notification_purge(self):
+        self.assertUsesIndex(
+            Notification.objects.filter(
+                is_read=True, last_occurred_at__lt=timezone.now() - timedelta(days=90)
+            ).order_by("last_occurred_at", "pk"),
+            "board_notif_read_age_idx",
+        )
+
+    def test_email_lookups(self):
+        self.assertUsesIndex(
+            User.objects.filter(email__iexact="Plan@GarageCollective.agency"), "board_user_email_ci"
+        )
+        self.assertUsesIndex(
+            EmailOTP.objects.filter(
+                email__iexact="plan@garagecollective.agency", code="123456", is_used=False
+            ),
+            "board_emailotp_email_code_ci",
+        )
+
+    def test_user_autocomplete(self):
+        query = "pla"
+        users = User.objects.filter(is_active=True).filter(
+            Q(username__istartswith=query)
+            | Q(first_name__istartswith=query)
+            | Q(last_name__istartswith=query)
+            | Q(email__istartswith=query)
+        )
+        for index in (
+            "board_user_username_prefix",
+            "board_user_first_name_prefix",
+            "board_user_last_name_prefix",
+            "board_user_email_ci",
+        ):
+            self.assertUsesIndex(users, index)
+
+
+#-----------------------------Attachment files-----------------------------#
+
+class TempMediaMixin:
+    """Each test gets an empty MEDIA_ROOT of its own."""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+
+    def media_path(self, name):
+        return os.path.join(self.media_root, *name.split("/"))
+
+
+class BlobRefCountTests(TempMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("blob")
+        cls.project = Project.objects.create(name="Blobs", key="BLB", owner=cls.user)
+        cls.issue = Issue.objects.create(project=cls.project, title="Files")
+
+    def attach(self, content=b"same bytes"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Attachment.objects.create(
+                issue=self.issue, uploaded_by=self.user, file=ContentFile(content, name="report.txt")
+            )
+
+    def test_identical_uploads_share_one_file(self):
+        first, second = self.attach(), self.attach()
+        blob = first.blob
+        path = self.media_path(blob_name(blob.sha256))
+
+        self.assertEqual(second.blob_id, blob.pk)
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(first.filename(), "report.txt")
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+        self.assertTrue(os.path.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(Blob.objects.filter(pk=blob.pk).exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_different_content_gets_its_own_blob(self):
+        self.assertNotEqual(self.attach(b"one").blob_id, self.attach(b"two").blob_id)
+
+    def test_file_is_removed_only_after_commit(self):
+        attachment = self.attach()
+        path = self.media_path(attachment.file.name)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            attachment.delete()
+        self.assertTrue(os.path.exists(path))
+
+        for callback in callbacks:
+            callback()
+        self.assertFalse(os.path.exists(path))
+
+    def test_stored_again_before_removal_keeps_the_file(self):
+        attachment = self.attach()
+        path = self.media_path(attachment.file.name)
+        with self.captureOnCommitCallbacks() as callbacks:
+            attachment.delete()
+
+        again = self.attach()
+        for callback in callbacks:
+            callback()
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(Blob.objects.get(pk=again.blob_id).ref_count, 1)
+
+
+class OrphanedMediaTests(TempMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("media")
+        cls.project = Project.objects.create(name="Media", key="MED", owner=cls.user)
+        cls.issue = Issue.objects.create(project=cls.project, title="Files")
+
+    def put(self, name, age_hours=48):
+        path = self.media_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as fh:
+            fh.write(b"x" * 10)
+        then = time.time() - age_hours * 3600
+        os.utime(path, (then, then))
+        return name
+
+    def orphans(self, **kwargs):
+        return {name for batch in find_orphans(**kwargs) for name, _size in batch}
+
+    def test_unreferenced_files_are_found(self):
+        names = {
+            self.put("attachments/ab/cd/stray.txt"),
+            self.put("blobs/tmp/0123abcd"),
+            self.put(preview_name("attachments/ab/cd/stray.txt")),
+            self.put(f"uploads_tmp/{uuid.uuid4()}.part"),
+        }
+        self.assertEqual(self.orphans(batch_size=2), names)
+
+    def test_files_inside_the_grace_period_are_kept(self):
+        self.put("attachments/ab/cd/new.txt", age_hours=1)
+        self.assertEqual(self.orphans(), set())
+        self.assertEqual(self.orphans(grace_hours=0.5), {"attachments/ab/cd/new.txt"})
+
+    def test_referenced_blob_and_its_thumbnail_are_kept(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            attachment = Attachment.objects.create(
+                issue=self.issue, uploaded_by=self.user, file=ContentFile(b"png", name="logo.png")
+            )
+        old = time.time() - 48 * 3600
+        os.utime(self.media_path(attachment.file.name), (old, old))
+        self.put(preview_name(attachment.file.name))
+
+        self.assertEqual(self.orphans(), set())
+
+    def test_file_named_like_a_thumbnail_is_kept(self):
+        # an upload that happens to end in ".thumb.jpg" is a file of its own
+        name = self.put("attachments/ab/cd/logo.png.thumb.jpg")
+        Attachment.objects.create(issue=self.issue, uploaded_by=self.user, file=name)
+
+        self.assertEqual(self.orphans(), set())
+
+    def test_part_file_of_a_live_upload_is_kept(self):
+        upload = ChunkedUpload.objects.create(
+            user=self.user,
+            target=ChunkedUpload.TARGET_ISSUE,
+            target_id=self.issue.pk,
+            filename="big.bin",
+            size=100,
+        )
+        self.put(f"uploads_tmp/{upload.pk}.part")
+
+        self.assertEqual(self.orphans(), set())
+
+    def test_delete_skips_files_referenced_since_the_scan(self):
+        kept = self.put("attachments/ab/cd/claimed.txt")
+        gone = self.put("attachments/ab/cd/stray.txt")
+        batches = list(find_orphans())
+        Attachment.objects.create(issue=self.issue, uploaded_by=self.user, file=kept)
+
+        self.assertEqual([delete_orphans(batch) for batch in batches], [(1, 10)])
+        self.assertTrue(os.path.exists(self.media_path(kept)))
+        self.assertFalse(os.path.exists(self.media_path(gone)))
+
+
+class ChunkedUploadViewTests(TempMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("uploader")
+        cls.project = Project.objects.create(name="Uploads", key="UPL", owner=cls.user)
+        cls.issue = Issue.objects.create(project=cls.project, title="Files")
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("upload_start"),
+            {"target": "issue", "target_id": self.issue.pk, "filename": "notes.txt", "size": 10},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.upload = ChunkedUpload.objects.get(pk=response.json()["id"])
+        self.url = reverse("upload_detail", args=[self.upload.pk])
+
+    def put(self, data, first, last=None):
+        last = first + len(data) - 1 if last is None else last
+        return self.client.generic(
+            "PUT",
+            self.url,
+            data,
+            content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE=f"bytes {first}-{last}/10",
+        )
+
+    def complete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse("upload_complete", args=[self.upload.pk]))
+
+    def test_chunks_resume_from_the_confirmed_offset(self):
+        self.assertEqual(self.put(b"01234", 0).json()["received"], 5)
+        self.assertEqual(self.client.get(self.url).json()["received"], 5)
+        self.assertEqual(self.put(b"56789", 5).json()["received"], 10)
+
+        response = self.complete()
+        self.assertEqual(response.status_code, 200)
+        attachment = Attachment.objects.get(pk=response.json()["attachment_id"])
+        self.assertEqual(attachment.filename(), "notes.txt")
+        with attachment.file.open("rb") as fh:
+            self.assertEqual(fh.read(), b"0123456789")
+        self.assertFalse(os.path.exists(temp_path(self.upload)))
+
+    def test_offset_mismatch(self):
+        self.put(b"01234", 0)
+        response = self.put(b"789", 7)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["received"], 5)
+
+    def test_chunk_past_the_declared_size(self):
+        response = self.put(b"0123456789abc", 0, last=12)
+        self.assertEqual(response.status_code, 413)
+        self.upload.refresh_from_db()
+        self.assertEqual(self.upload.received, 0)
+
+    def test_body_longer_than_its_range(self):
+        # the header claims 4 bytes, the body carries 7
+        self.put(b"012345", 0)
+        response = self.put(b"6789abc", 6, last=9)
+        self.assertEqual(response.status_code, 413)
+        self.upload.refresh_from_db()
+        self.assertLessEqual(self.upload.received, 10)
+        self.assertLessEqual(os.path.getsize(temp_path(self.upload)), 10)
+
+    def test_complete_twice_returns_the_same_attachment(self):
+        self.put(b"0123456789", 0)
+        first, second = self.complete(), self.complete()
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.json()["attachment_id"], second.json()["attachment_id"])
+        self.assertEqual(Attachment.objects.filter(issue=self.issue).count(), 1)
+
+    def test_incomplete_upload_cannot_complete(self):
+        self.put(b"01234", 0)
+        self.assertEqual(self.complete().status_code, 409)
+
+    def test_expired_temp_file(self):
+        self.put(b"01234", 0)
+        os.remove(temp_path(self.upload))
+
+        self.assertEqual(self.put(b"56789", 5).status_code, 410)
+
+    def test_expired_temp_file_on_complete(self):
+        self.put(b"0123456789", 0)
+        os.remove(temp_path(self.upload))
+        self.assertEqual(self.complete().status_code, 410)
+
+
+class ByteRangeTests(SimpleTestCase):
+    def test_ranges(self):
+        cases = [
+            ("bytes=0-4", (0, 4)),
+            ("bytes=5-", (5, 9)),  # open-ended
+            ("bytes=5-100", (5, 9)),  # clamped to the file
+            ("bytes=-3", (7, 9)),  # suffix: the last 3 bytes
+            ("bytes=-100", (0, 9)),
+            ("bytes = 2 - 3", (2, 3)),
+        ]
+        for header, expected in cases:
+            with self.subTest(header=header):
+                self.assertEqual(_byte_range(header, 10), expected)
+
+    def test_unsatisfiable(self):
+        for header in ("bytes=10-", "bytes=12-20", "bytes=4-2", "bytes=-0"):
+            with self.subTest(header=header):
+                self.assertIs(_byte_range(header, 10), False)
+        self.assertIs(_byte_range("bytes=-5", 0), False)
+
+    def test_ignored(self):
+        # multiple ranges and junk get the whole file, which RFC 9110 allows
+        for header in ("bytes=0-1,3-4", "items=0-4", "bytes=-", "bytes=a-b"):
+            with self.subTest(header=header):
+                self.assertIsNone(_byte_range(header, 10))
+
+
+class ServeFileTests(TempMediaMixin, SimpleTestCase):
+    name = "blobs/aa/bb/data"
+
+    def setUp(self):
+        super().setUp()
+        os.makedirs(os.path.dirname(self.media_path(self.name)))
+        with open(self.media_path(self.name), "wb") as fh:
+            fh.write(b"0123456789")
+        self.factory = RequestFactory()
+
+    def serve(self, **headers):
+        response = serve_file(self.factory.get("/", headers=headers), self.name, filename="data.txt")
+        self.addCleanup(response.close)
+        return response
+
+    def body(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_whole_file(self):
+        response = self.serve()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), b"0123456789")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["X-Content-Type-Options"], "nosniff")
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        self.assertIn("data.txt", response["Content-Disposition"])
+
+    def test_range(self):
+        response = self.serve(Range="bytes=2-4")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 2-4/10")
+        self.assertEqual(response["Content-Length"], "3")
+        self.assertEqual(self.body(response), b"234")
+
+    def test_suffix_and_open_ended_ranges(self):
+        self.assertEqual(self.body(self.serve(Range="bytes=-3")), b"789")
+        response = self.serve(Range="bytes=6-")
+        self.assertEqual(response["Content-Range"], "bytes 6-9/10")
+        self.assertEqual(self.body(response), b"6789")
+
+    def test_unsatisfiable_range(self):
+        response = self.serve(Range="bytes=10-20")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */10")
+
+    def test_if_range(self):
+        etag = self.serve()["ETag"]
+        self.assertEqual(self.serve(Range="bytes=0-1", If_Range=etag).status_code, 206)
+
+        # the file changed since the client's partial copy: send all of it
+        stale = self.serve(Range="bytes=0-1", If_Range='"0-0"')
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(self.body(stale), b"0123456789")
+
+    def test_if_none_match(self):
+        etag = self.serve()["ETag"]
+        for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+            with self.subTest(header=header):
+                response = self.serve(If_None_Match=header)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response["ETag"], etag)
+                self.assertEqual(response["Cache-Control"], "private, no-cache")
+        self.assertEqual(self.serve(If_None_Match='"other"').status_code, 200)
+
+    def test_etag_changes_with_the_file(self):
+        etag = self.serve()["ETag"]
+        with open(self.media_path(self.name), "ab") as fh:
+            fh.write(b"!")
+        self.assertNotEqual(self.serve()["ETag"], etag)
+
+    def test_missing_file(self):
+        with self.assertRaises(Http404):
+            serve_file(self.factory.get("/"), "blobs/aa/bb/missing")
+
+
+def image_bytes(size=(800, 600), mode="RGBA", fmt="PNG"):
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new(mode, size, (200, 30, 30, 128) if mode == "RGBA" else "red").save(buffer, fmt)
+    return buffer.getvalue()
+
+
+@skipUnless(previews.Image is not None, "thumbnails need Pillow")
+class PreviewTests(TempMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("viewer")
+        cls.project = Project.objects.create(name="Pictures", key="PIC", owner=cls.user)
+        cls.issue = Issue.objects.create(project=cls.project, title="Screenshot")
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def attach(self, content, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Attachment.objects.create(
+                issue=self.issue, uploaded_by=self.user, file=ContentFile(content, name=name)
+            )
+
+    def run_jobs(self):
+        return [jobs.run_job(pk, "test") for pk in jobs.claim("test", 10)]
+
+    def test_upload_queues_a_thumbnail(self):
+        from PIL import Image
+
+        attachment = self.attach(image_bytes(), "screen.png")
+        job = Job.objects.get()
+        self.assertEqual(job.name, "board.generate_preview")
+        self.assertEqual(job.payload, {"file_name": attachment.file.name, "filename": "screen.png"})
+
+        self.assertEqual(self.run_jobs(), [True])
+        path = self.media_path(preview_name(attachment.file.name))
+        self.assertTrue(path.startswith(self.media_path(previews.PREVIEW_DIR)))
+        with Image.open(path) as thumbnail:
+            self.assertEqual(thumbnail.format, "JPEG")
+            self.assertLessEqual(thumbnail.size, previews.THUMBNAIL_SIZE)
+        # nothing half-written left next to it
+        self.assertEqual(os.listdir(os.path.dirname(path)), [os.path.basename(path)])
+
+    def test_thumbnail_is_served_immutable(self):
+        attachment = self.attach(image_bytes(mode="RGB", fmt="JPEG"), "photo.jpg")
+        self.run_jobs()
+
+        response = self.client.get(reverse("attachment_preview", args=[attachment.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"\xff\xd8"))
+
+    def test_project_attachment_thumbnail(self):
+        attachment = ProjectAttachment.objects.create(
+            project=self.project, uploaded_by=self.user, file=ContentFile(image_bytes(), name="logo.png")
+        )
+        generation = Project.objects.get(pk=self.project.pk).generation
+        self.run_jobs()
+
+        # the cached sidebar is rebuilt to show the thumbnail
+        self.assertEqual(Project.objects.get(pk=self.project.pk).generation, generation + 1)
+        response = self.client.get(reverse("project_attachment_preview", args=[attachment.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_other_files_have_no_preview(self):
+        attachment = self.attach(b"plain text", "notes.txt")
+        self.assertFalse(Job.objects.exists())
+        self.assertFalse(previews.generate_preview(attachment.file.name, "notes.txt"))
+        self.assertEqual(
+            self.client.get(reverse("attachment_preview", args=[attachment.pk])).status_code, 404
+        )
+
+    def test_pdf_without_a_renderer_is_skipped(self):
+        with mock.patch.object(previews, "fitz", None), mock.patch("shutil.which", return_value=None):
+            self.assertFalse(previews.can_preview("spec.pdf"))
+            self.attach(b"%PDF-1.4", "spec.pdf")
+        self.assertFalse(Job.objects.exists())
+
+    def test_broken_image_keeps_the_plain_link(self):
+        attachment = self.attach(b"not really a png", "broken.png")
+
+        with self.assertLogs("board.previews", "INFO"):
+            self.assertEqual(self.run_jobs(), [True])  # not retried
+        self.assertFalse(previews.preview_exists(attachment.file.name))
+        leftovers = [name for _dir, _dirs, names in os.walk(self.media_path(previews.PREVIEW_DIR)) for name in names]
+        self.assertEqual(leftovers, [])  # the temp file is cleaned up too
+
+    @mock.patch.object(previews, "MAX_PIXELS", 100)
+    def test_huge_images_are_refused_before_decoding(self):
+        attachment = self.attach(image_bytes(), "poster.png")
+
+        with self.assertLogs("board.previews", "INFO"):
+            self.run_jobs()
+        self.assertFalse(previews.preview_exists(attachment.file.name))
+
+    def test_generate_previews_command(self):
+        first = self.attach(image_bytes(), "one.png")
+        self.attach(image_bytes(), "same-bytes.png")  # shares first's blob
+        self.attach(image_bytes(size=(40, 40)), "two.png")
+        self.attach(b"plain text", "notes.txt")
+        Job.objects.all().delete()  # as if uploaded before previews existed
+
+        call_command("generate_previews", stdout=StringIO())
+        self.assertEqual(Job.objects.count(), 2)
+        self.assertEqual(self.run_jobs(), [True, True])
+        self.assertTrue(previews.preview_exists(first.file.name))
+
+        out = StringIO()
+        call_command("generate_previews", stdout=out)
+        self.assertIn("Queued 0 preview job(s).", out.getvalue())
+
+
+#-----------------------------Conditional pages----------------------------#
+
+class DashboardETagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("etag")
+        cls.project = Project.objects.create(name="Before", key="BEF", owner=cls.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        # the first page sets the CSRF cookie, which is part of the token
+        self.client.get(reverse("dashboard"))
+
+    def test_unchanged_dashboard_is_not_modified(self):
+        etag = self.client.get(reverse("dashboard"))["ETag"]
+        self.assertEqual(self.client.get(reverse("dashboard"), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_project_edit_changes_the_etag(self):
+        etag = self.client.get(reverse("dashboard"))["ETag"]
+
+        self.project.name = "After"
+        self.project.key = "AFT"
+        self.project.save()
+
+        response = self.client.get(reverse("dashboard"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "After")
+
+
+#-----------------------------Nav badges-----------------------------------#
+
+class NavCountsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("badges")
+        cls.project = Project.objects.create(name="Badges", key="BDG", owner=cls.user)
+
+    def test_counts_follow_writes(self):
+        self.assertEqual(
+            get_nav_counts(self.user),
+            {"date": timezone.localdate().isoformat(), "open": 0, "overdue": 0, "unread": 0},
+        )
+        Issue.objects.create(
+            project=self.project,
+            title="Late",
+            assignee=self.user,
+            due_date=timezone.localdate() - timedelta(days=1),
+        )
+        Notification.objects.create(user=self.user, verb="did something")
+
+        counts = get_nav_counts(self.user)
+        self.assertEqual((counts["open"], counts["overdue"], counts["unread"]), (1, 1, 1))
+
+    def test_unread_is_never_cached(self):
+        get_nav_counts(self.user)
+        # as if another worker had written: no signal, no cache delete here
+        NotificationCounter.objects.filter(user=self.user).update(unread=7)
+        self.assertEqual(get_nav_counts(self.user)["unread"], 7)
+
+    def test_shared_cache_setting_is_checked(self):
+        self.assertEqual(check_shared_cache(None), [])
+        with override_settings(BOARD_SHARED_CACHE=True):
+            self.assertEqual([e.id for e in check_shared_cache(None)], ["board.E001"])
+
+
+#-----------------------------Visibility-----------------------------------#
+
+class VisibilityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner")
+        cls.assignee = User.objects.create_user("assignee")
+        cls.member = User.objects.create_user("member")
+        cls.outsider = User.objects.create_user("outsider")
+        cls.boss = User.objects.create_user("boss")
+        # through the cached profile: force_login saves the user, and with it the profile
+        cls.boss.profile.role = Profile.ROLE_BOSS
+        cls.boss.profile.save()
+        cls.project = Project.objects.create(name="Private", key="PRV", owner=cls.owner)
+        cls.issue = Issue.objects.create(project=cls.project, title="Secret", assignee=cls.assignee)
+        cls.issue.members.add(cls.member)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, user, name, pk):
+        self.client.force_login(user)
+        return self.client.get(reverse(name, args=[pk]), {"since": timezone.now().isoformat()})
+
+    def fresh_ids(self, user):
+        # a new instance, like the next request; the user object memoises its entry
+        return visible_project_ids(User.objects.get(pk=user.pk))
+
+    def test_assignee_and_issue_members_see_the_issue(self):
+        for user in (self.owner, self.assignee, self.member, self.boss):
+            with self.subTest(user=user.username):
+                self.assertEqual(self.get(user, "issue_detail", self.issue.pk).status_code, 200)
+
+    def test_others_get_404(self):
+        for name in ("issue_detail", "issue_edit"):
+            with self.subTest(name=name):
+                self.assertEqual(self.get(self.outsider, name, self.issue.pk).status_code, 404)
+
+    def test_board_is_for_project_members_only(self):
+        for name in ("project_board", "project_board_delta"):
+            with self.subTest(name=name):
+                self.assertEqual(self.get(self.owner, name, self.project.pk).status_code, 200)
+                self.assertEqual(self.get(self.boss, name, self.project.pk).status_code, 200)
+                # seeing one issue does not open the whole board
+                self.assertEqual(self.get(self.assignee, name, self.project.pk).status_code, 404)
+                self.assertEqual(self.get(self.outsider, name, self.project.pk).status_code, 404)
+
+    def test_cached_set_follows_membership_changes(self):
+        self.assertEqual(self.fresh_ids(self.outsider), frozenset())
+
+        self.project.members.add(self.outsider)
+        self.assertEqual(self.fresh_ids(self.outsider), {self.project.pk})
+        self.assertEqual(self.get(self.outsider, "project_board", self.project.pk).status_code, 200)
+
+        self.project.members.remove(self.outsider)
+        self.assertEqual(self.fresh_ids(self.outsider), frozenset())
+        self.assertIsNone(self.fresh_ids(self.boss))
+
+    def test_cached_set_is_used_until_the_stamp_moves(self):
+        self.assertEqual(self.fresh_ids(self.outsider), frozenset())
+
+        # a write that skips the signals, as another process's would look from here
+        Project.members.through.objects.create(project=self.project, user=self.outsider)
+        outsider = User.objects.get(pk=self.outsider.pk)
+        with self.assertNumQueries(1):  # the stamp lookup; the set comes from the cache
+            self.assertEqual(visible_project_ids(outsider), frozenset())
+
+        invalidate_visible_projects(self.outsider.pk)
+        self.assertEqual(self.fresh_ids(self.outsider), {self.project.pk})
+
+
+#-----------------------------Board delta----------------------------------#
+
+class BoardDeltaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("watcher")
+        cls.project = Project.objects.create(name="Live", key="LIV", owner=cls.user)
+        cls.other = Project.objects.create(name="Elsewhere", key="ELS", owner=cls.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = reverse("project_board_delta", args=[self.project.pk])
+
+    def changes(self, since):
+        response = self.client.get(self.url, {"since": since})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def changed_ids(self, payload):
+        return [card["id"] for card in payload["changed"]]
+
+    def test_versions_round_trip(self):
+        version = self.client.get(reverse("project_board", args=[self.project.pk])).context["board_version"]
+        issue = Issue.objects.create(project=self.project, title="New card", show_on_board=True)
+        Issue.objects.create(project=self.other, title="Not this board")
+
+        payload = self.changes(version)
+        self.assertFalse(payload["reset"])
+        self.assertEqual(self.changed_ids(payload), [issue.pk])
+        self.assertIn("New card", payload["changed"][0]["html"])
+
+        # nothing new: only what the overlap re-sends
+        Issue.objects.update(updated_at=timezone.now() - OVERLAP - timedelta(seconds=1))
+        payload = self.changes(payload["version"])
+        self.assertEqual((payload["changed"], payload["deleted"]), ([], []))
+
+    def test_edits_and_hidden_cards(self):
+        issue = Issue.objects.create(project=self.project, title="Card", show_on_board=True)
+        since = timezone.now().isoformat()
+
+        issue.status = "DONE"
+        issue.show_on_board = False
+        issue.save()
+        card, = self.changes(since)["changed"]
+        self.assertEqual((card["id"], card["status"], card["show_on_board"]), (issue.pk, "DONE", False))
+        self.assertEqual(card["html"], "")  # the client takes the card off
+
+    def test_overlap_resends_recent_writes(self):
+        since = timezone.now()
+        just_before = Issue.objects.create(project=self.project, title="Committed late")
+        too_old = Issue.objects.create(project=self.project, title="Seen already")
+        Issue.objects.filter(pk=just_before.pk).update(updated_at=since - OVERLAP + timedelta(seconds=1))
+        Issue.objects.filter(pk=too_old.pk).update(updated_at=since - OVERLAP - timedelta(seconds=1))
+
+        self.assertEqual(self.changed_ids(self.changes(since.isoformat())), [just_before.pk])
+
+    def test_deletes_leave_tombstones(self):
+        gone = Issue.objects.create(project=self.project, title="Gone")
+        elsewhere = Issue.objects.create(project=self.other, title="Gone too")
+        since = timezone.now().isoformat()
+
+        gone_pk = gone.pk
+        gone.delete()
+        elsewhere.delete()
+        payload = self.changes(since)
+        self.assertEqual((payload["changed"], payload["deleted"]), ([], [gone_pk]))
+
+        later = (timezone.now() + OVERLAP + timedelta(seconds=1)).isoformat()
+        self.assertEqual(self.changes(later)["deleted"], [])
+
+    def test_old_tombstones_are_pruned(self):
+        old = Issue.objects.create(project=self.project, title="Old")
+        old.delete()
+        IssueTombstone.objects.update(deleted_at=timezone.now() - TOMBSTONE_RETENTION - timedelta(days=1))
+
+        Issue.objects.create(project=self.project, title="New").delete()
+        self.assertEqual(IssueTombstone.objects.filter(project_id=self.project.pk).count(), 1)
+
+    def test_versions_older_than_the_tombstones_reset(self):
+        since = (timezone.now() - TOMBSTONE_RETENTION - timedelta(minutes=1)).isoformat()
+        self.assertTrue(self.changes(since)["reset"])
+
+        since = (timezone.now() - TOMBSTONE_RETENTION + timedelta(minutes=1)).isoformat()
+        self.assertFalse(self.changes(since)["reset"])
+
+    def test_bad_version(self):
+        self.assertEqual(self.client.get(self.url, {"since": "yesterday"}).status_code, 400)
+
+
+#-----------------------------Search---------------------------------------#
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = User.objects.create_user("member")
+        cls.boss = User.objects.create_user("boss")
+        Profile.objects.filter(user=cls.boss).update(role=Profile.ROLE_BOSS)
+        cls.project = Project.objects.create(name="Open", key="OPN", owner=cls.member)
+        cls.hidden = Project.objects.create(name="Closed", key="CLS", owner=cls.boss)
+
+    def find(self, query, user=None, page_size=20):
+        user = User.objects.get(pk=(user or self.member).pk)  # fresh visibility entry
+        hits, _has_next = board_search.search(user, query, page_size=page_size)
+        return [hit.obj for hit in hits]
+
+    def test_index_follows_issue_writes(self):
+        issue = Issue.objects.create(project=self.project, title="Zephyr outage", description="fans")
+        self.assertEqual(self.find("zephyr"), [issue])
+        self.assertEqual(self.find("zep"), [issue])  # prefix while typing
+
+        issue.title = "Quasar outage"
+        issue.save()
+        self.assertEqual(self.find("zephyr"), [])
+        self.assertEqual(self.find("quasar"), [issue])
+
+        issue.delete()
+        self.assertEqual(self.find("quasar"), [])
+
+    def test_comments_follow_their_issue(self):
+        issue = Issue.objects.create(project=self.project, title="Printer")
+        comment = Comment.objects.create(issue=issue, author=self.member, body="toner smudges")
+        self.assertEqual(self.find("toner"), [comment])
+
+        issue.project = self.hidden  # moved out of sight, comments too
+        issue.save()
+        self.assertEqual(self.find("toner"), [])
+        self.assertEqual(self.find("toner", self.boss), [comment])
+
+        comment.delete()
+        self.assertEqual(self.find("toner", self.boss), [])
+
+    def test_results_are_limited_to_visible_projects(self):
+        mine = Issue.objects.create(project=self.project, title="Shared word")
+        theirs = Issue.objects.create(project=self.hidden, title="Shared word")
+
+        self.assertEqual(self.find("shared"), [mine])
+        self.assertEqual(set(self.find("shared", self.boss)), {mine, theirs})
+
+    @mock.patch.object(board_search, "MAX_RESULTS", 3)
+    def test_best_match_wins_over_newer_ones(self):
+        best = Issue.objects.create(project=self.project, title="Kestrel", description="kestrel kestrel")
+        for i in range(5):
+            Issue.objects.create(project=self.project, title=f"Newer {i}", description="mentions kestrel once")
+
+        self.assertEqual(self.find("kestrel", page_size=2)[0], best)
+
+    @mock.patch.object(board_search, "MAX_RESULTS", 3)
+    def test_hidden_matches_do_not_use_up_the_results(self):
+        mine = Issue.objects.create(project=self.project, title="Heron")
+        for i in range(5):
+            Issue.objects.create(project=self.hidden, title="Heron", description="heron heron")
+
+        self.assertEqual(self.find("heron", page_size=2), [mine])
+
+    def test_paging(self):
+        issues = [Issue.objects.create(project=self.project, title=f"Osprey {i}") for i in range(3)]
+        user = User.objects.get(pk=self.member.pk)
+
+        first, has_next = board_search.search(user, "osprey", page=1, page_size=2)
+        second, has_more = board_search.search(user, "osprey", page=2, page_size=2)
+        self.assertEqual((len(first), has_next, len(second), has_more), (2, True, 1, False))
+        self.assertEqual({hit.obj for hit in first + second}, set(issues))
+
+
+#-----------------------------Notifications--------------------------------#
+
+class NotificationFanOutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.actor = User.objects.create_user("actor")
+        cls.boss = User.objects.create_user("boss")
+        cls.lead = User.objects.create_user("lead")
+        cls.employee = User.objects.create_user("employee")
+        Profile.objects.filter(user=cls.boss).update(role=Profile.ROLE_BOSS)
+        Profile.objects.filter(user__in=[cls.lead, cls.actor]).update(role=Profile.ROLE_LEAD)
+        cls.project = Project.objects.create(name="Fan", key="FAN", owner=cls.actor)
+        cls.project.members.add(cls.lead, cls.employee)
+        cls.issue = Issue.objects.create(project=cls.project, title="Busy")
+
+    def notify(self, verb="updated status"):
+        return fan_out(
+            [self.boss.pk, self.lead.pk, self.actor.pk],
+            verb,
+            project=self.project,
+            kind=Notification.KIND_STATUS,
+            exclude=[self.actor.pk],
+        )
+
+    def unread(self, user):
+        return NotificationCounter.objects.get(user=user).unread
+
+    def test_one_row_per_recipient_without_the_actor(self):
+        created = self.notify()
+
+        self.assertEqual({n.user_id for n in created}, {self.boss.pk, self.lead.pk})
+        self.assertFalse(Notification.objects.filter(user=self.actor).exists())
+        self.assertEqual((self.unread(self.boss), self.unread(self.lead)), (1, 1))
+
+    def test_issue_activity_recipients(self):
+        create_issue_activity_notifications(self.issue, self.actor, "moved a card")
+
+        # bosses and leads on the project; not employees, not the actor
+        self.assertEqual(
+            set(Notification.objects.values_list("user_id", flat=True)), {self.boss.pk, self.lead.pk}
+        )
+
+    def test_repeat_inside_the_window_coalesces(self):
+        self.notify("first")
+        first = Notification.objects.get(user=self.boss)
+
+        self.assertEqual(self.notify("second"), [])
+
+        row = Notification.objects.get(user=self.boss)
+        self.assertEqual(row.pk, first.pk)
+        self.assertEqual(row.occurrences, 2)
+        self.assertEqual(row.verb, "second")
+        self.assertGreater(row.last_occurred_at, first.last_occurred_at)
+        self.assertFalse(row.is_read)
+        self.assertEqual(self.unread(self.boss), 1)
+
+    def test_repeat_outside_the_window_adds_a_row(self):
+        self.notify()
+        Notification.objects.update(
+            last_occurred_at=timezone.now() - COALESCE_WINDOW - timedelta(minutes=1)
+        )
+
+        self.assertEqual(len(self.notify()), 2)
+        self.assertEqual(Notification.objects.filter(user=self.boss).count(), 2)
+        self.assertEqual(self.unread(self.boss), 2)
+
+    def test_read_rows_are_not_reused(self):
+        self.notify()
+        Notification.objects.filter(user=self.boss).update(is_read=True)
+
+        self.notify()
+        self.assertEqual(Notification.objects.filter(user=self.boss).count(), 2)
+
+    def test_deferred_fan_out_waits_for_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            fan_out([self.boss.pk], "later", project=self.project, defer=True)
+        self.assertFalse(Notification.objects.exists())
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(Notification.objects.get().user, self.boss)
+
+
+    def assertNotifiesInsideTransaction(self, target, post):
+        # defer=True only waits for commit if the call is inside the view's atomic block
+        depth = len(connection.savepoint_ids)
+        seen = []
+        with mock.patch(f"board.views.{target}", lambda *a, **kw: seen.append(len(connection.savepoint_ids))):
+            response = post()
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(seen), 1)
+        self.assertGreater(seen[0], depth)
+
+    def test_board_posts_notify_on_commit(self):
+        self.client.force_login(self.lead)
+        url = reverse("project_board", args=[self.project.pk])
+        for action in ("status", "issue"):
+            with self.subTest(action=action):
+                self.assertNotifiesInsideTransaction(
+                    "create_issue_activity_notifications",
+                    lambda: self.client.post(
+                        url, {"action": action, "title": "Update", "priority": "MEDIUM", "status": "TODO"}
+                    ),
+                )
+
+    def test_project_create_notifies_on_commit(self):
+        self.client.force_login(self.lead)
+        self.assertNotifiesInsideTransaction(
+            "create_project_created_notifications",
+            lambda: self.client.post(reverse("project_create"), {"name": "New", "key": "NEW"}),
+        )
+
+
+class RecordingBroker(BaseBroker):
+    def __init__(self):
+        self.events = []
+
+    def publish(self, user_id, event):
+        self.events.append((user_id, event))
+
+
+class BrokerTests(SimpleTestCase):
+    def test_publish_reaches_only_that_users_clients(self):
+        async def scenario():
+            broker = InProcessBroker()
+            first, second = broker.subscribe(1), broker.subscribe(1)
+            other = broker.subscribe(2)
+
+            broker.publish(1, {"type": "unread", "unread": 3})
+            await asyncio.sleep(0)  # delivery is scheduled on the loop
+            self.assertEqual(await first.get(), {"type": "unread", "unread": 3})
+            self.assertEqual(await second.get(), {"type": "unread", "unread": 3})
+            self.assertTrue(other.queue.empty())
+
+            first.close()
+            second.close()
+            self.assertFalse(broker.has_subscribers(1))
+            self.assertTrue(broker.has_subscribers(2))
+            broker.publish(1, {"type": "unread", "unread": 4})
+            await asyncio.sleep(0)
+            self.assertTrue(first.queue.empty())
+
+        asyncio.run(scenario())
+
+    def test_slow_client_misses_events(self):
+        async def scenario():
+            broker = InProcessBroker()
+            subscription = broker.subscribe(1)
+            for i in range(subscription.queue.maxsize + 5):
+                broker.publish(1, {"n": i})
+            await asyncio.sleep(0)
+            self.assertEqual(subscription.queue.qsize(), subscription.queue.maxsize)
+            self.assertEqual(await subscription.get(), {"n": 0})
+
+        asyncio.run(scenario())
+
+    def test_client_with_a_closed_loop_is_dropped(self):
+        broker = InProcessBroker()
+
+        async def connect():
+            broker.subscribe(1)
+
+        asyncio.run(connect())  # closes the loop, like a finished worker
+        broker.publish(1, {"type": "unread", "unread": 1})
+        self.assertFalse(broker.has_subscribers(1))
+
+
+class NotificationStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("listener")
+        cls.other = User.objects.create_user("bystander")
+
+    def test_wsgi_gets_no_content(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse("notification_stream")).status_code, 204)
+
+    async def test_anonymous_is_refused(self):
+        response = await self.async_client.get(reverse("notification_stream"))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_stream_starts_with_the_unread_count(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("notification_stream"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b"retry: 5000\n\n")
+        self.assertEqual(await anext(chunks), b'event: unread\ndata: {"type": "unread", "unread": 0}\n\n')
+
+        get_broker().publish(self.other.pk, {"type": "unread", "unread": 9})
+        get_broker().publish(self.user.pk, {"type": "unread", "unread": 1})
+        self.assertEqual(await anext(chunks), b'event: unread\ndata: {"type": "unread", "unread": 1}\n\n')
+
+        await chunks.aclose()
+
+    def test_fan_out_publishes_to_each_recipient_once(self):
+        broker = RecordingBroker()
+        with mock.patch("board.events.get_broker", return_value=broker), \
+                self.captureOnCommitCallbacks(execute=True):
+            fan_out([self.user.pk, self.other.pk], "hello", exclude=[self.other.pk])
+            self.assertEqual(broker.events, [])  # nothing before commit
+
+        (user_id, event), = broker.events
+        self.assertEqual(user_id, self.user.pk)
+        self.assertEqual(event["id"], Notification.objects.get(user=self.user).pk)
+        self.assertEqual((event["type"], event["unread"]), ("notification", 1))
+
+
+class UnreadCounterTests(TestCase):
+    """NotificationCounter.unread has to equal the unread rows after every kind of write."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner")
+        cls.users = [User.objects.create_user(f"reader{i}") for i in range(3)]
+        cls.project = Project.objects.create(name="Counts", key="CNT", owner=cls.owner)
+        cls.other = Project.objects.create(name="Other", key="OTC", owner=cls.owner)
+
+    def assertCountersMatch(self):
+        for user in User.objects.all():
+            with self.subTest(user=user.username):
+                counter = NotificationCounter.objects.filter(user=user).values_list("unread", flat=True)
+                self.assertEqual(
+                    counter.first() or 0,
+                    Notification.objects.filter(user=user, is_read=False).count(),
+                )
+
+    def fan_out(self, project, kind=Notification.KIND_STATUS):
+        fan_out([u.pk for u in self.users], "activity", project=project, kind=kind)
+
+    def test_counter_follows_every_write(self):
+        first, second, third = self.users
+
+        self.fan_out(self.project)
+        self.fan_out(self.project)  # coalesced
+        self.fan_out(self.other)
+        self.fan_out(self.project, kind="")  # never coalesced
+        self.assertCountersMatch()
+
+        mark_read(first, Notification.objects.filter(user=first).first().pk)
+        mark_read(first, Notification.objects.filter(user=first, is_read=True).first().pk)  # no-op
+        self.assertCountersMatch()
+
+        mark_all_read(second)
+        self.assertCountersMatch()
+
+        Notification.objects.filter(user=third, is_read=False).first().delete()
+        Notification.objects.create(user=third, verb="single row")
+        self.assertCountersMatch()
+
+        self.other.delete()  # cascades to its notifications
+        self.assertCountersMatch()
+
+        third.delete()  # cascades to the user's rows and counter
+        self.assertCountersMatch()
+
+
+#-----------------------------Issue counters-------------------------------#
+
+class IssueCounterTests(TestCase):
+    """ProjectIssueCounters, kept up to date from signals, against a fresh COUNT."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("counts")
+        cls.first = Project.objects.create(name="First", key="FST", owner=cls.user)
+        cls.second = Project.objects.create(name="Second", key="SND", owner=cls.user)
+
+    def setUp(self):
+        real_apply = counters._apply
+
+        def apply_without_clamping(deltas, today, rebuild_missing=True):
+            # the Greatest(.., 0) clamp is a safety net; correct deltas never need it
+            for project_id, changes in deltas.items():
+                row = ProjectIssueCounters.objects.filter(project_id=project_id).first()
+                if row is None:
+                    continue
+                for field, delta in changes.items():
+                    if field == "overdue" and row.overdue_as_of != today:
+                        continue
+                    self.assertGreaterEqual(getattr(row, field) + delta, 0, f"{field} of {project_id}")
+            real_apply(deltas, today, rebuild_missing)
+
+        patcher = mock.patch.object(counters, "_apply", apply_without_clamping)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assertCountersMatch(self):
+        for project in Project.objects.all():
+            with self.subTest(project=project.key):
+                self.assertEqual(
+                    IssueStats.for_projects([project.pk]).counts,
+                    IssueStats(Issue.objects.filter(project=project)).counts,
+                )
+
+    def test_counters_follow_every_write(self):
+        today = timezone.localdate()
+        late = Issue.objects.create(
+            project=self.first, title="Late", priority="HIGH", due_date=today - timedelta(days=2)
+        )
+        todo = Issue.objects.create(project=self.first, title="Todo", due_date=today + timedelta(days=2))
+        Issue.objects.create(project=self.second, title="Elsewhere", status="IN_PROGRESS")
+        self.assertCountersMatch()
+
+        late.status = "DONE"  # no longer overdue
+        late.save()
+        todo.due_date = today - timedelta(days=1)  # now overdue
+        todo.priority = "CRITICAL"
+        todo.save()
+        self.assertCountersMatch()
+
+        todo.project = self.second  # moved
+        todo.save()
+        self.assertCountersMatch()
+
+        Issue.objects.get(pk=late.pk).delete()
+        todo.delete()
+        self.assertCountersMatch()
+
+        self.second.delete()  # cascades to its issues and counters
+        self.assertCountersMatch()
+
+    def test_rebuild_matches_incremental_counts(self):
+        Issue.objects.create(project=self.first, title="One")
+        Issue.objects.create(project=self.first, title="Two", status="DONE", priority="LOW")
+        incremental = IssueStats.for_projects([self.first.pk]).counts
+
+        ProjectIssueCounters.objects.all().delete()
+        self.assertEqual(counters.rebuild_counters(), 2)
+        self.assertEqual(IssueStats.for_projects([self.first.pk]).counts, incremental)
+
+    def test_stale_overdue_is_recounted_on_read(self):
+        today = timezone.localdate()
+        Issue.objects.create(project=self.first, title="Late", due_date=today - timedelta(days=1))
+        # as if last counted yesterday, before the due date passed
+        ProjectIssueCounters.objects.update(overdue=0, overdue_as_of=today - timedelta(days=1))
+
+        self.assertEqual(IssueStats.for_projects([self.first.pk]).overdue, 1)
+        self.assertEqual(ProjectIssueCounters.objects.get(project=self.first).overdue_as_of, today)
+
+
+#-----------------------------Job queue------------------------------------#
+
+class InlineExecutor:
+    """ThreadPoolExecutor stand-in: the test database lives in one connection."""
+
+    def __init__(self, max_workers):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.calls = []
+        self.failures = 0
+
+        def record(**payload):
+            self.calls.append(payload)
+
+        def flaky(**payload):
+            self.failures += 1
+            raise RuntimeError("SMTP down")
+
+        patcher = mock.patch.dict(jobs._registry, {"test.record": record, "test.flaky": flaky})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def claim_and_run(self, worker_id="worker"):
+        return [jobs.run_job(pk, worker_id) for pk in jobs.claim(worker_id, 10)]
+
+    def test_enqueue_rejects_unknown_names(self):
+        with self.assertRaises(jobs.UnknownJob):
+            jobs.enqueue("test.typo")
+        self.assertFalse(Job.objects.exists())
+
+    def test_claim_and_run(self):
+        job = jobs.enqueue("test.record", to="boss")
+
+        self.assertEqual(self.claim_and_run(), [True])
+        self.assertEqual(self.calls, [{"to": "boss"}])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_until), (Job.STATUS_DONE, 1, None))
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(jobs.claim("worker", 10), [])
+
+    def test_delayed_job_is_not_due(self):
+        jobs.enqueue("test.record", delay=timedelta(minutes=5))
+        self.assertEqual(jobs.claim("worker", 10), [])
+
+    def test_claimed_job_is_not_claimed_twice(self):
+        job = jobs.enqueue("test.record")
+
+        self.assertEqual(jobs.claim("first", 10), [job.pk])
+        self.assertEqual(jobs.claim("second", 10), [])
+        # the second worker cannot run it either
+        self.assertFalse(jobs.run_job(job.pk, "second"))
+        self.assertEqual(self.calls, [])
+
+    def test_claim_loses_the_race_for_a_candidate(self):
+        job = jobs.enqueue("test.record")
+        real_claimable = jobs._claimable
+
+        def claimable(now):
+            # another worker takes the row between SELECT and UPDATE
+            if claimable.calls == 1:
+                Job.objects.filter(pk=job.pk).update(
+                    status=Job.STATUS_RUNNING, locked_by="first", locked_until=now + jobs.LEASE
+                )
+            claimable.calls += 1
+            return real_claimable(now)
+
+        claimable.calls = 0
+        with mock.patch.object(jobs, "_claimable", claimable):
+            self.assertEqual(jobs.claim("second", 10), [])
+
+        job.refresh_from_db()
+        self.assertEqual((job.locked_by, job.attempts), ("first", 0))
+
+    def test_claim_respects_the_limit(self):
+        for _ in range(3):
+            jobs.enqueue("test.record")
+        self.assertEqual(len(jobs.claim("worker", 2)), 2)
+        self.assertEqual(len(jobs.claim("worker", 2)), 1)
+
+    def test_failures_back_off_until_max_attempts(self):
+        job = jobs.enqueue("test.flaky", max_attempts=2)
+
+        before = timezone.now()
+        with self.assertLogs("board.jobs", "WARNING"):
+            self.assertEqual(self.claim_and_run(), [False])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_QUEUED, 1))
+        self.assertIn("SMTP down", job.last_error)
+        self.assertGreaterEqual(job.run_at, before + timedelta(seconds=jobs.backoff(1)))
+        self.assertEqual(jobs.claim("worker", 10), [])  # not due yet
+
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs("board.jobs", "WARNING"):
+            self.assertEqual(self.claim_and_run(), [False])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(self.failures, 2)
+
+        Job.objects.update(run_at=timezone.now())
+        self.assertEqual(jobs.claim("worker", 10), [])  # given up
+
+    def test_backoff_doubles_up_to_the_cap(self):
+        self.assertEqual(
+            [jobs.backoff(n) for n in (1, 2, 3)],
+            [jobs.BACKOFF_BASE, 2 * jobs.BACKOFF_BASE, 4 * jobs.BACKOFF_BASE],
+        )
+        self.assertEqual(jobs.backoff(100), jobs.BACKOFF_MAX)
+
+    def test_expired_lease_is_claimed_again(self):
+        job = jobs.enqueue("test.record")
+        self.assertEqual(jobs.claim("crashed", 10), [job.pk])
+        Job.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(jobs.claim("worker", 10), [job.pk])
+        # the crashed worker comes back: its lease is gone
+        self.assertFalse(jobs.run_job(job.pk, "crashed"))
+        self.assertTrue(jobs.run_job(job.pk, "worker"))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_by), (Job.STATUS_DONE, 2, "worker"))
+        self.assertEqual(len(self.calls), 1)
+
+    def test_live_lease_is_not_claimed(self):
+        jobs.enqueue("test.record")
+        jobs.claim("busy", 10)
+        self.assertEqual(jobs.claim("worker", 10), [])
+
+    @override_settings(BOARD_JOBS_EAGER=True)
+    def test_eager_mode_runs_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            job = jobs.enqueue("test.record", to="lead")
+        self.assertEqual(self.calls, [])  # nothing runs before commit
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.calls, [{"to": "lead"}])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by, job.attempts), (Job.STATUS_DONE, "eager", 1))
+
+    @override_settings(BOARD_JOBS_EAGER=True)
+    def test_eager_mode_rollback_runs_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                jobs.enqueue("test.record")
+                raise RuntimeError
+        self.assertEqual(self.calls, [])
+        self.assertFalse(Job.objects.exists())
+
+    def test_run_worker_once_drains_the_queue(self):
+        jobs.enqueue("test.record", n=1)
+        jobs.enqueue("test.record", n=2)
+        jobs.enqueue("test.record", n=3, delay=timedelta(hours=1))
+
+        with mock.patch("board.management.commands.run_worker.ThreadPoolExecutor", InlineExecutor), \
+                mock.patch("board.management.commands.run_worker.signal.signal"):
+            call_command("run_worker", "--once", "--threads", "1", stdout=StringIO())
+
+        self.assertEqual(self.calls, [{"n": 1}, {"n": 2}])
+        self.assertEqual(Job.objects.filter(status=Job.STATUS_QUEUED).count(), 1)
@@ -0,0 +1,235 @@
+# board/uploads.py
+"""
+Chunked, resumable attachment uploads.
+
+A client announces a file with ``start_upload`` (name, size, target
+issue or project), then sends the bytes in any number of chunks, each
+starting at the offset the server has confirmed so far. Chunks are
+streamed from the request to MEDIA_ROOT/uploads_tmp/<id>.part in small
+blocks, so a worker's memory use does not depend on the file size. A
+dropped connection keeps whatever reached the disk; the client asks
+for the current offset and carries on from there.
+
+``complete_upload`` creates the Attachment / ProjectAttachment; the
+blob store moves the finished file into place (a rename, not a copy).
+Abandoned uploads are removed by ``manage.py purge_stale_uploads``.
+"""
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Attachment, ChunkedUpload, ProjectAttachment
+from .visibility import get_visible_issue_or_404, get_visible_project_or_404
+
+TEMP_DIR = "uploads_tmp"
+
+MAX_BYTES = getattr(settings, "BOARD_UPLOAD_MAX_BYTES", 2 * 1024 ** 3)
+# total declared size of one user's unfinished uploads
+QUOTA_BYTES = getattr(settings, "BOARD_UPLOAD_QUOTA_BYTES", 5 * 1024 ** 3)
+# what we suggest to clients; the server accepts any chunk length
+CHUNK_BYTES = getattr(settings, "BOARD_UPLOAD_CHUNK_BYTES", 8 * 1024 ** 2)
+EXPIRY_HOURS = getattr(settings, "BOARD_UPLOAD_EXPIRY_HOURS", 24)
+
+# read / write granularity while streaming a chunk to disk
+_BLOCK = 64 * 1024
+
+
+class UploadRejected(Exception):
+    """The request can't be applied to the upload; ``status`` is the HTTP code."""
+
+    status = 400
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        if status is not None:
+            self.status = status
+
+
+class OffsetMismatch(UploadRejected):
+    """The chunk doesn't start where the upload left off; resume from ``received``."""
+
+    status = 409
+
+    def __init__(self, received):
+        super().__init__(f"Expected a chunk starting at byte {received}.")
+        self.received = received
+
+
+def temp_path(upload):
+    return os.path.join(settings.MEDIA_ROOT, TEMP_DIR, f"{upload.pk}.part")
+
+
+def _target_object(user, target, target_id):
+    """The issue / project being attached to, if ``user`` can see it (else 404)."""
+    if target == ChunkedUpload.TARGET_ISSUE:
+        return get_visible_issue_or_404(user, target_id)
+    if target == ChunkedUpload.TARGET_PROJECT:
+        return get_visible_project_or_404(user, target_id)
+    raise UploadRejected(f"Unknown upload target {target!r}.")
+
+
+def _clean_filename(filename):
+    # browsers may send a full path; storage re-validates the name anyway
+    name = os.path.basename(str(filename).replace("\\", "/")).strip()
+    if not name or name in (".", ".."):
+        raise UploadRejected("A file name is required.")
+    return name[:255]
+
+
+# ---------------------------------------------------------------------
+# upload lifecycle
+# ---------------------------------------------------------------------
+def start_upload(user, target, target_id, filename, size):
+    """Check limits and permissions and create the upload with an empty temp file."""
+    _target_object(user, target, target_id)
+    filename = _clean_filename(filename)
+    if size < 0:
+        raise UploadRejected("The file size can't be negative.")
+    if size > MAX_BYTES:
+        raise UploadRejected(f"Files are limited to {MAX_BYTES} bytes.", status=413)
+
+    with transaction.atomic():
+        pending = (
+            ChunkedUpload.objects.filter(user=user, status=ChunkedUpload.STATUS_UPLOADING)
+            .aggregate(total=Sum("size"))["total"]
+            or 0
+        )
+        if pending + size > QUOTA_BYTES:
+            raise UploadRejected(
+                "Too much data in unfinished uploads; finish or cancel some first.", status=413
+            )
+        upload = ChunkedUpload.objects.create(
+            user=user, target=target, target_id=target_id, filename=filename, size=size
+        )
+
+    path = temp_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+    return upload
+
+
+def write_chunk(upload, offset, stream, length=None):
+    """
+    Append the bytes read from ``stream`` at ``offset``, which has to be
+    the number of bytes received so far. ``length`` (the request's
+    Content-Length) lets an oversized chunk be refused before reading
+    it. Returns the new offset.
+    """
+    if upload.status != ChunkedUpload.STATUS_UPLOADING:
+        raise UploadRejected("This upload is already complete.", status=409)
+    if offset != upload.received:
+        raise OffsetMismatch(upload.received)
+    if length is not None and offset + length > upload.size:
+        raise UploadRejected("The chunk runs past the declared file size.", status=413)
+
+    written = 0
+    try:
+        with open(temp_path(upload), "r+b") as fh:
+            # drop anything past the confirmed offset (e.g. a half-applied write)
+            fh.seek(offset)
+            fh.truncate()
+            while True:
+                block = stream.read(_BLOCK)
+                if not block:
+                    break
+                if offset + written + len(block) > upload.size:
+                    fh.truncate(offset + written)
+                    raise UploadRejected("The chunk runs past the declared file size.", status=413)
+                fh.write(block)
+                written += len(block)
+    except FileNotFoundError:
+        raise UploadRejected("This upload has expired; start again.", status=410)
+    finally:
+        # keep whatever made it to disk, even if the client went away mid-chunk
+        if written:
+            updated = ChunkedUpload.objects.filter(
+                pk=upload.pk, received=offset, status=ChunkedUpload.STATUS_UPLOADING
+            ).update(received=offset + written, updated_at=timezone.now())
+            if updated:
+                upload.received = offset + written
+
+    if upload.received != offset + written:
+        # another request for the same upload got there first
+        upload.refresh_from_db(fields=["received"])
+        raise OffsetMismatch(upload.received)
+    return upload.received
+
+
+class _FinishedFile(File):
+    """Lets the blob store (board.blobs) move the temp file instead of copying it."""
+
+    def __init__(self, file, name, path):
+        super().__init__(file, name)
+        self.path = path
+
+    def temporary_file_path(self):
+        return self.path
+
+
+def complete_upload(upload):
+    """
+    Turn a fully received upload into its Attachment / ProjectAttachment
+    and return it. Completing twice returns the same row.
+    """
+    model = Attachment if upload.target == ChunkedUpload.TARGET_ISSUE else ProjectAttachment
+    if upload.status == ChunkedUpload.STATUS_COMPLETE:
+        return model.objects.get(pk=upload.attachment_id)
+    if upload.received != upload.size:
+        raise UploadRejected(f"Only {upload.received} of {upload.size} bytes received.", status=409)
+
+    target_obj = _target_object(upload.user, upload.target, upload.target_id)
+    path = temp_path(upload)
+    if not os.path.exists(path):
+        raise UploadRejected("This upload has expired; start again.", status=410)
+
+    with transaction.atomic():
+        locked = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+        if locked.status == ChunkedUpload.STATUS_COMPLETE:
+            return model.objects.get(pk=locked.attachment_id)
+
+        if model is Attachment:
+            attachment = Attachment(issue=target_obj, uploaded_by=upload.user)
+        else:
+            attachment = ProjectAttachment(project=target_obj, uploaded_by=upload.user)
+        with open(path, "rb") as fh:
+            attachment.file = _FinishedFile(fh, upload.filename, path)
+            attachment.save()  # stores the blob, see board.blobs.attachment_pre_save
+
+        ChunkedUpload.objects.filter(pk=upload.pk).update(
+            status=ChunkedUpload.STATUS_COMPLETE, attachment_id=attachment.pk, updated_at=timezone.now()
+        )
+    # still there if an identical blob already existed
+    _remove_temp_file(upload)
+    upload.status = ChunkedUpload.STATUS_COMPLETE
+    upload.attachment_id = attachment.pk
+    return attachment
+
+
+def _remove_temp_file(upload):
+    try:
+        os.remove(temp_path(upload))
+    except FileNotFoundError:
+        pass
+
+
+def abort_upload(upload):
+    _remove_temp_file(upload)
+    upload.delete()
+
+
+def stale_uploads(hours=None):
+    """Uploads untouched for ``hours`` (finished ones are only kept for retried completes)."""
+    cutoff = timezone.now() - timedelta(hours=EXPIRY_HOURS if hours is None else hours)
+    return ChunkedUpload.objects.filter(updated_at__lt=cutoff)
+
+
+def purge_uploads(uploads):
+    """Delete ``uploads`` and their temp files. Returns how many rows went."""
+    for upload in uploads:
+        _remove_temp_file(upload)
+    return ChunkedUpload.objects.filter(pk__in=[u.pk for u in uploads]).delete()[0]
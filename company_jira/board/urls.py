@@ -13,9 +13,14 @@ from .views import (
     TeamListView, 
     delete_comment,
     delete_attachment,
+    download_attachment,
+    download_project_attachment,
+    attachment_preview,
+    project_attachment_preview,
     TeamListView,
     ProfileView,
     add_project_attachment,
+    project_board_delta,
     DepartmentProjectsView,
     TeamLeadDashboardView,
     BossDashboardView,
@@ -24,6 +29,13 @@ from .views import (
     otp_login_verify,
     InviteUserView,
     NotificationListView,
+    notification_mark_read,
+    notification_stream,
+    search,
+    user_autocomplete,
+    upload_start,
+    upload_detail,
+    upload_complete,
     ProjectMembersUpdateView,
 )
 from django.contrib.auth import views as auth_views
@@ -33,6 +45,7 @@ urlpatterns = [
     path("my-tasks/", MyTasksView.as_view(), name="my_tasks"), 
     path("projects/new/", ProjectCreateView.as_view(), name="project_create"),
     path("projects/<int:pk>/", ProjectBoardView.as_view(), name="project_board"),
+    path("projects/<int:pk>/changes/", project_board_delta, name="project_board_delta"),
     path(
         "projects/<int:project_id>/issues/new/",
         IssueCreateView.as_view(),
@@ -50,6 +63,18 @@ urlpatterns = [
     path("team/", TeamListView.as_view(), name="team_list"),
     path("comments/<int:pk>/delete/", delete_comment, name="comment_delete"),
     path("attachments/<int:pk>/delete/", delete_attachment, name="attachment_delete"),
+    path("attachments/<int:pk>/download/", download_attachment, name="attachment_download"),
+    path(
+        "project-attachments/<int:pk>/download/",
+        download_project_attachment,
+        name="project_attachment_download",
+    ),
+    path("attachments/<int:pk>/preview/", attachment_preview, name="attachment_preview"),
+    path(
+        "project-attachments/<int:pk>/preview/",
+        project_attachment_preview,
+        name="project_attachment_preview",
+    ),
     path("profile/", ProfileView.as_view(), name="profile"),
     path("projects/<int:pk>/attach/", add_project_attachment, name="project_add_attachment"),
     path(
@@ -58,12 +83,34 @@ urlpatterns = [
     name="department_projects",
     ),
     path("team-lead/", TeamLeadDashboardView.as_view(), name="teamlead_dashboard"),
+    path(
+        "team-lead/feed/",
+        TeamLeadDashboardView.as_view(fragment=True),
+        name="teamlead_dashboard_feed",
+    ),
     path("boss/", BossDashboardView.as_view(), name="boss_dashboard"),
+    path("boss/feed/", BossDashboardView.as_view(fragment=True), name="boss_dashboard_feed"),
     path("projects/<int:pk>/delete/", project_delete, name="project_delete"),
     path("login/otp/", otp_login_request, name="otp_login"),
     path("login/otp/verify/", otp_login_verify, name="otp_verify"),
     path("members/invite/", InviteUserView.as_view(), name="invite_user"),
     path("notifications/", NotificationListView.as_view(), name="notifications"),
+    path(
+        "notifications/feed/",
+        NotificationListView.as_view(fragment=True),
+        name="notifications_feed",
+    ),
+    path(
+        "notifications/<int:pk>/read/",
+        notification_mark_read,
+        name="notification_mark_read",
+    ),
+    path("notifications/stream/", notification_stream, name="notification_stream"),
+    path("search/", search, name="search"),
+    path("users/autocomplete/", user_autocomplete, name="user_autocomplete"),
+    path("uploads/", upload_start, name="upload_start"),
+    path("uploads/<uuid:upload_id>/", upload_detail, name="upload_detail"),
+    path("uploads/<uuid:upload_id>/complete/", upload_complete, name="upload_complete"),
     path("accounts/logout/", auth_views.LogoutView.as_view(), name="logout"),
     path(
     "projects/<int:pk>/members/",
@@ -1,5 +1,14 @@
-from django.db.models import Q
+import asyncio
+import hashlib
+import json
+import os
+import re
+
+from asgiref.sync import sync_to_async
+from django.db.models import F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth import logout
+from django.core.cache import cache
 
 
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -7,13 +16,21 @@ from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
 from django.views.generic import TemplateView, DetailView, CreateView, UpdateView, ListView
 
-from .models import Project, Issue, Comment, Attachment, ProjectAttachment, Profile
+from .models import Project, Issue, Comment, Attachment, ProjectAttachment, Profile, ChunkedUpload
 from .forms import ProjectForm, IssueForm, CommentForm, AttachmentForm, ProjectAttachmentForm, ProjectMembersForm
 
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
-from django.views.decorators.http import require_POST
-from django.http import HttpResponseRedirect, JsonResponse
+from django.views.decorators.http import require_http_methods, require_POST
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.template.loader import render_to_string
 from django.contrib import messages
 from django.urls import reverse
 
@@ -27,7 +44,6 @@ from django.utils import timezone
 from django.http import HttpResponseForbidden
 
 from django.contrib.auth import get_user_model, login
-from django.core.mail import send_mail
 from .forms import OTPLoginRequestForm, OTPVerifyForm
 from .models import EmailOTP
 
@@ -40,9 +56,35 @@ from .models import Project, ProjectAttachment, Notification
 from .notifications import (
     create_project_created_notifications,
     create_issue_activity_notifications,
+    mark_all_read,
+    mark_read,
+)
+from .events import get_broker
+from .jobs import enqueue
+from .stats import IssueStats
+from . import search as board_search
+from . import uploads
+from .pagination import InvalidCursor, KeysetPaginator
+from .delta import StaleVersion, board_changes, current_version, parse_version
+from .conditional import (
+    conditional_page,
+    dashboard_etag,
+    my_tasks_etag,
+    notifications_etag,
+    project_board_etag,
+)
+from .badges import unread_count
+from .downloads import PRIVATE_IMMUTABLE, serve_file
+from .previews import preview_name
+from .visibility import (
+    get_visible_issue_or_404,
+    get_visible_project_or_404,
+    visible_project_ids,
+    visible_projects,
 )
 #------------DashboardView---------------------------------------------------------#
 
+@method_decorator(conditional_page(dashboard_etag), name="get")
 class DashboardView(LoginRequiredMixin, TemplateView):
     template_name = "board/dashboard.html"
 
@@ -52,35 +94,19 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         profile = getattr(user, "profile", None)
 
         # ---------- Which projects does this user see? ----------
-        if profile and profile.role == Profile.ROLE_BOSS:
-            # Boss sees all projects, all departments
-            projects = Project.objects.all()
-        else:
-            # Team Lead / Employee: projects where they are owner OR member
-            # (no department restriction so cross-department work is visible)
-            projects = Project.objects.filter(
-                Q(owner=user) | Q(members=user)
-            ).distinct()
+        # Boss: all projects. Team Lead / Employee: owner OR member
+        # (no department restriction so cross-department work is visible)
+        projects = visible_projects(user)
 
         ctx["projects"] = projects
 
         # ---------- Limit issues to those projects ----------
-        issues_qs = Issue.objects.filter(project__in=projects)
-
-        # Overview counts (only from visible projects)
-        ctx["issue_counts"] = {
-            "todo": issues_qs.filter(status="TODO").count(),
-            "in_progress": issues_qs.filter(status="IN_PROGRESS").count(),
-            "done": issues_qs.filter(status="DONE").count(),
-        }
-
-        # Priority breakdown (same filter)
-        ctx["priority_counts"] = {
-            "low": issues_qs.filter(priority="LOW").count(),
-            "medium": issues_qs.filter(priority="MEDIUM").count(),
-            "high": issues_qs.filter(priority="HIGH").count(),
-            "critical": issues_qs.filter(priority="CRITICAL").count(),
-        }
+        stats = IssueStats.for_projects(projects)
+        issues_qs = stats.queryset
+
+        # Overview + priority breakdown (one aggregate query)
+        ctx["issue_counts"] = stats.status_counts()
+        ctx["priority_counts"] = stats.priority_counts()
 
         # Recently updated (only from these projects)
         ctx["recent_issues"] = (
@@ -96,30 +122,35 @@ class DashboardView(LoginRequiredMixin, TemplateView):
 
 #------------------------------------------END-----------------------------------------------------------------------------------------#
 
+@method_decorator(conditional_page(project_board_etag), name="get")
 class ProjectBoardView(LoginRequiredMixin, DetailView):
     model = Project
     template_name = "board/project_board.html"
     context_object_name = "project"
 
     def get_queryset(self):
-        user = self.request.user
-        # If the user is a boss, they can see ALL projects
-        profile = getattr(user, "profile", None)
-        if profile and profile.role == "BOSS":
-            return Project.objects.all()
-
-        # Everyone else (lead / employee) only sees projects they own or are a member of
-        return Project.objects.filter(
-            Q(owner=user) | Q(members=user)
-        ).distinct()
+        # Boss sees ALL projects; lead / employee only the ones they own or are a member of
+        return visible_projects(self.request.user).select_related("owner")
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         project = self.object
-        # only show issues that are intended for the board
-        ctx["todo"] = project.issues.filter(status="TODO", show_on_board=True)
-        ctx["in_progress"] = project.issues.filter(status="IN_PROGRESS", show_on_board=True)
-        ctx["done"] = project.issues.filter(status="DONE", show_on_board=True)
+        # taken before the query so the first delta poll can't miss a write
+        ctx["board_version"] = current_version()
+
+        # only show issues that are intended for the board:
+        # one query for all columns, grouped here (keeps -created_at order)
+        columns = {"TODO": [], "IN_PROGRESS": [], "DONE": []}
+        board_issues = project.issues.filter(show_on_board=True).select_related("assignee")
+        for issue in board_issues:
+            columns.setdefault(issue.status, []).append(issue)
+
+        ctx["todo"] = columns["TODO"]
+        ctx["in_progress"] = columns["IN_PROGRESS"]
+        ctx["done"] = columns["DONE"]
+
+        # lazy: only evaluated when the cached sidebar fragment is rebuilt
+        ctx["project_attachments"] = project.attachments.select_related("uploaded_by")
         ctx["issue_form"] = IssueForm()
         ctx["project_attachment_form"] = ProjectAttachmentForm()
         return ctx
@@ -158,21 +189,28 @@ class ProjectBoardView(LoginRequiredMixin, DetailView):
         # -------------------------------------------------
         if action == "status":
             if form.is_valid():
-                issue = form.save(commit=False)
-                issue.project = project
-                issue.title = request.POST.get("title", "Status update")
-                issue.assignee = request.user
-                issue.show_on_board = True
-                issue.save()
-                form.save_m2m()
-
-                files = request.FILES.getlist("attachments")
-                for f in files:
-                    Attachment.objects.create(issue=issue, file=f, uploaded_by=request.user)
-
-                # 🔔 notify department lead + all bosses
-                verb = f"{request.user.username} updated project status"
-                create_issue_activity_notifications(issue, actor=request.user, verb=verb)
+                with transaction.atomic():
+                    issue = form.save(commit=False)
+                    issue.project = project
+                    issue.title = request.POST.get("title", "Status update")
+                    issue.assignee = request.user
+                    issue.show_on_board = True
+                    issue.save()
+                    form.save_m2m()
+
+                    files = request.FILES.getlist("attachments")
+                    for f in files:
+                        Attachment.objects.create(issue=issue, file=f, uploaded_by=request.user)
+
+                    # 🔔 notify department lead + all bosses (once this block commits)
+                    verb = f"{request.user.username} updated project status"
+                    create_issue_activity_notifications(
+                        issue,
+                        actor=request.user,
+                        verb=verb,
+                        kind=Notification.KIND_STATUS,
+                        defer=True,
+                    )
 
                 messages.success(request, "Status saved and visible in My Tasks.")
                 return redirect("project_board", pk=project.pk)
@@ -192,31 +230,38 @@ class ProjectBoardView(LoginRequiredMixin, DetailView):
                     show_on_board=True
                 ).order_by("-created_at").first()
 
-                if existing:
-                    issue = existing
-                    if cleaned.get("title"):
-                        issue.title = cleaned["title"]
-                    if "description" in cleaned:
-                        issue.description = cleaned.get("description", issue.description)
-                    if "members" in cleaned:
-                        issue.members.set(cleaned["members"])
-                    issue.save()
-                else:
-                    issue = form.save(commit=False)
-                    issue.project = project
-                    issue.assignee = request.user
-                    issue.show_on_board = True
-                    issue.save()
-                    if hasattr(form, "save_m2m"):
-                        form.save_m2m()
-
-                files = request.FILES.getlist("attachments")
-                for f in files:
-                    Attachment.objects.create(issue=issue, file=f, uploaded_by=request.user)
-
-                # 🔔 notify department lead + all bosses
-                verb = f"{request.user.username} reported an issue"
-                create_issue_activity_notifications(issue, actor=request.user, verb=verb)
+                with transaction.atomic():
+                    if existing:
+                        issue = existing
+                        if cleaned.get("title"):
+                            issue.title = cleaned["title"]
+                        if "description" in cleaned:
+                            issue.description = cleaned.get("description", issue.description)
+                        if "members" in cleaned:
+                            issue.members.set(cleaned["members"])
+                        issue.save()
+                    else:
+                        issue = form.save(commit=False)
+                        issue.project = project
+                        issue.assignee = request.user
+                        issue.show_on_board = True
+                        issue.save()
+                        if hasattr(form, "save_m2m"):
+                            form.save_m2m()
+
+                    files = request.FILES.getlist("attachments")
+                    for f in files:
+                        Attachment.objects.create(issue=issue, file=f, uploaded_by=request.user)
+
+                    # 🔔 notify department lead + all bosses (once this block commits)
+                    verb = f"{request.user.username} reported an issue"
+                    create_issue_activity_notifications(
+                        issue,
+                        actor=request.user,
+                        verb=verb,
+                        kind=Notification.KIND_ISSUE,
+                        defer=True,
+                    )
 
                 messages.success(
                     request,
@@ -240,26 +285,43 @@ class ProjectBoardView(LoginRequiredMixin, DetailView):
 
 
 
-    
-#--------------------------ProjectCreateView-------------------------------------#
 
-def create_project_created_notifications(project):
+@login_required
+def project_board_delta(request, pk):
     """
-    Create a notification for every member of a newly-created project.
+    JSON changes for a live board since ``?since=<version>``: rendered
+    cards for created / edited / moved issues and ids of deleted ones.
     """
-    # Message shown in notification
-    message = f"{project.owner.username} created project: {project.name}"
-
-    # Notify all project members (employees the lead/boss selected)
-    recipients = project.members.all()
-
-    for user in recipients:
-        Notification.objects.create(
-            user=user,
-            verb=message,
-            project=project,
-        )
+    get_visible_project_or_404(request.user, pk)
+
+    version = current_version()
+    try:
+        since = parse_version(request.GET.get("since", ""))
+        changed, deleted = board_changes(pk, since)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid since.")
+    except StaleVersion:
+        return JsonResponse({"version": version, "reset": True})
+
+    return JsonResponse({
+        "version": version,
+        "reset": False,
+        "changed": [
+            {
+                "id": issue.pk,
+                "status": issue.status,
+                "show_on_board": issue.show_on_board,
+                "html": render_to_string(
+                    "board/_issue_card.html", {"issue": issue}, request=request
+                ) if issue.show_on_board else "",
+            }
+            for issue in changed
+        ],
+        "deleted": deleted,
+    })
 
+    
+#--------------------------ProjectCreateView-------------------------------------#
 
 class ProjectCreateView(LoginRequiredMixin, CreateView):
     model = Project
@@ -278,20 +340,21 @@ class ProjectCreateView(LoginRequiredMixin, CreateView):
         # Save reference URL from the form (optional)
         project.reference_url = form.cleaned_data.get("reference_url")
 
-        project.save()
-        form.save_m2m()  # members, etc.
+        with transaction.atomic():
+            project.save()
+            form.save_m2m()  # members, etc.
 
-        # attachments
-        files = self.request.FILES.getlist("attachments")
-        for f in files:
-            ProjectAttachment.objects.create(
-                project=project,
-                file=f,
-                uploaded_by=self.request.user,
-            )
+            # attachments
+            files = self.request.FILES.getlist("attachments")
+            for f in files:
+                ProjectAttachment.objects.create(
+                    project=project,
+                    file=f,
+                    uploaded_by=self.request.user,
+                )
 
-        # 🔔 notify project members + bosses
-        create_project_created_notifications(project)
+            # 🔔 notify project members + bosses (once this block commits)
+            create_project_created_notifications(project, defer=True)
 
         messages.success(self.request, "Project created.")
         return redirect("project_board", pk=project.pk)
@@ -308,7 +371,7 @@ class IssueCreateView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         project_id = self.kwargs["project_id"]
-        project = get_object_or_404(Project, pk=project_id)
+        project = get_visible_project_or_404(self.request.user, project_id)
         form.instance.project = project
         return super().form_valid(form)
 
@@ -321,6 +384,14 @@ class IssueUpdateView(LoginRequiredMixin, UpdateView):
     form_class = IssueForm
     template_name = "board/issue_form.html"
 
+    def get_object(self, queryset=None):
+        return get_visible_issue_or_404(self.request.user, self.kwargs["pk"], queryset)
+
+    def form_valid(self, form):
+        # issue row + project counters move together
+        with transaction.atomic():
+            return super().form_valid(form)
+
     def get_success_url(self):
         return reverse_lazy("project_board", kwargs={"pk": self.object.project.pk})
     
@@ -329,6 +400,9 @@ class IssueDetailView(LoginRequiredMixin, DetailView):
     template_name = "board/issue_detail.html"
     context_object_name = "issue"
 
+    def get_object(self, queryset=None):
+        return get_visible_issue_or_404(self.request.user, self.kwargs["pk"], queryset)
+
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         ctx["comment_form"] = CommentForm()
@@ -371,6 +445,9 @@ class DepartmentProjectsView(LoginRequiredMixin, TemplateView):
             .distinct()
             .order_by("name")
         )
+        visible_ids = visible_project_ids(self.request.user)
+        if visible_ids is not None:
+            projects = projects.filter(pk__in=visible_ids)
 
         # All issues in those projects
         issues = (
@@ -383,9 +460,10 @@ class DepartmentProjectsView(LoginRequiredMixin, TemplateView):
         ctx["dept_code"] = dept_code
         ctx["dept_label"] = dept_label
 
-        ctx["todo_count"] = issues.filter(status="TODO").count()
-        ctx["in_progress_count"] = issues.filter(status="IN_PROGRESS").count()
-        ctx["done_count"] = issues.filter(status="DONE").count()
+        status_counts = IssueStats.for_projects(projects).status_counts()
+        ctx["todo_count"] = status_counts["todo"]
+        ctx["in_progress_count"] = status_counts["in_progress"]
+        ctx["done_count"] = status_counts["done"]
 
         ctx["projects"] = projects
         ctx["members"] = members
@@ -406,14 +484,17 @@ def update_issue_status(request, pk):
 
     valid_statuses = {value for value, _ in Issue.STATUS_CHOICES}
     if new_status in valid_statuses:
-        issue.status = new_status
-        issue.save()
+        # issue row + project counters move together
+        with transaction.atomic():
+            issue.status = new_status
+            issue.save()
 
     next_url = request.POST.get("next") or reverse("my_tasks")
     return HttpResponseRedirect(next_url)
 
 
 
+@method_decorator(conditional_page(my_tasks_etag), name="get")
 class MyTasksView(LoginRequiredMixin, ListView):
     model = Issue
     template_name = "board/my_tasks.html"
@@ -447,6 +528,18 @@ class MyTasksView(LoginRequiredMixin, ListView):
         else:
             qs = qs.order_by("status", "-updated_at")
 
+        # The "View Issue" link opens the project's latest detailed
+        # (show_on_board=False) issue when there is one, else the row
+        # itself. Worked out in SQL so the page costs the same number of
+        # queries however many projects the user works across.
+        latest_detail = (
+            Issue.objects
+                 .filter(project_id=OuterRef("project_id"), show_on_board=False)
+                 .order_by("-created_at", "-pk")
+                 .values("pk")[:1]
+        )
+        qs = qs.annotate(view_issue_pk=Coalesce(Subquery(latest_detail), F("pk")))
+
         # pull related objects efficiently
         return qs.select_related("project", "assignee").prefetch_related("attachments")
 
@@ -459,64 +552,19 @@ class MyTasksView(LoginRequiredMixin, ListView):
         ctx["current_priority"] = self.request.GET.get("priority", "all")
         ctx["current_order"] = self.request.GET.get("order", "default")
 
-        # summary counts
-        all_my = Issue.objects.filter(assignee=self.request.user)
-        from django.utils import timezone
-        today = timezone.localdate()
-
-        summary = {
-            "todo": all_my.filter(status="TODO").count(),
-            "in_progress": all_my.filter(status="IN_PROGRESS").count(),
-            "done": all_my.filter(status="DONE").count(),
-            "overdue": all_my.filter(due_date__lt=today)
-                             .exclude(status="DONE")
-                             .count(),
-        }
+        # summary counts (one aggregate query)
+        stats = IssueStats.for_assignee(self.request.user)
+        summary = stats.status_counts()
+        summary["overdue"] = stats.overdue
         ctx["summary"] = summary
 
-        # --------------------------
-        # NEW: choose which issue the "View Issue" link should open
-        # --------------------------
-        # ctx['issues'] is the ListView object_list (the queryset we returned)
-        issues = list(ctx.get("issues", []))
-
-        # collect project ids for the issues currently in the table
-        project_ids = {i.project_id for i in issues}
-
-        # For each project, find the latest non-board issue (show_on_board=False).
-        # Portable approach: one query per project (fine for small number of projects).
-        latest_non_board_by_project = {}
-        if project_ids:
-            for pid in project_ids:
-                latest = (
-                    Issue.objects
-                         .filter(project_id=pid, show_on_board=False)
-                         .order_by("-created_at")
-                         .first()
-                )
-                if latest:
-                    latest_non_board_by_project[pid] = latest
-
-        # attach helper attribute view_issue_pk to each issue in the table
-        # so the template can link to the "detailed" issue while leaving the
-        # board-row title/status untouched.
-        for issue in issues:
-            latest = latest_non_board_by_project.get(issue.project_id)
-            if latest:
-                issue.view_issue_pk = latest.pk
-            else:
-                issue.view_issue_pk = issue.pk
-
-        # put the (possibly annotated) list back into context
-        ctx["issues"] = issues
-
         return ctx
 
 
 @login_required
 @require_POST
 def add_comment(request, pk):
-    issue = get_object_or_404(Issue, pk=pk)
+    issue = get_visible_issue_or_404(request.user, pk)
     form = CommentForm(request.POST)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -530,7 +578,7 @@ def add_comment(request, pk):
 @login_required
 @require_POST
 def add_attachment(request, pk):
-    issue = get_object_or_404(Issue, pk=pk)
+    issue = get_visible_issue_or_404(request.user, pk)
     form = AttachmentForm(request.POST, request.FILES)
     if form.is_valid():
         att = form.save(commit=False)
@@ -575,6 +623,56 @@ def delete_attachment(request, pk):
     return HttpResponseRedirect(reverse("issue_detail", args=[issue.pk]))
 
 
+def _visible_attachment(user, model, pk):
+    if model is Attachment:
+        attachment = get_object_or_404(Attachment.objects.only("pk", "issue", "file", "original_name"), pk=pk)
+        get_visible_issue_or_404(user, attachment.issue_id)
+    else:
+        attachment = get_object_or_404(ProjectAttachment.objects.only("pk", "project", "file", "original_name"), pk=pk)
+        get_visible_project_or_404(user, attachment.project_id)
+    return attachment
+
+
+def _download(request, model, pk):
+    attachment = _visible_attachment(request.user, model, pk)
+    return serve_file(
+        request, attachment.file, attachment.filename(), as_attachment="download" in request.GET
+    )
+
+
+def _preview(request, model, pk):
+    attachment = _visible_attachment(request.user, model, pk)
+    stem = os.path.splitext(attachment.filename())[0]
+    # the original never changes, so its thumbnail can be cached for good
+    return serve_file(
+        request, preview_name(attachment.file.name), f"{stem}.jpg", cache_control=PRIVATE_IMMUTABLE
+    )
+
+
+@login_required
+@require_http_methods(["GET", "HEAD"])
+def download_attachment(request, pk):
+    return _download(request, Attachment, pk)
+
+
+@login_required
+@require_http_methods(["GET", "HEAD"])
+def download_project_attachment(request, pk):
+    return _download(request, ProjectAttachment, pk)
+
+
+@login_required
+@require_http_methods(["GET", "HEAD"])
+def attachment_preview(request, pk):
+    return _preview(request, Attachment, pk)
+
+
+@login_required
+@require_http_methods(["GET", "HEAD"])
+def project_attachment_preview(request, pk):
+    return _preview(request, ProjectAttachment, pk)
+
+
 class ProfileView(LoginRequiredMixin, TemplateView):
     template_name = "board/profile.html"
 
@@ -591,11 +689,7 @@ from django.db.models import Q
 @login_required
 @require_POST
 def add_project_attachment(request, pk):
-    project = get_object_or_404(
-        Project,
-        Q(owner=request.user) | Q(members=request.user),
-        pk=pk,
-    )
+    project = get_visible_project_or_404(request.user, pk)
 
     form = ProjectAttachmentForm(request.POST, request.FILES)
     if form.is_valid():
@@ -611,12 +705,7 @@ def add_project_attachment(request, pk):
 @login_required
 def issue_create(request, project_id):
     # make sure user is allowed to add issues to this project
-    project = get_object_or_404(
-        Project.objects.filter(
-            Q(owner=request.user) | Q(members=request.user)
-        ),
-        pk=project_id,
-    )
+    project = get_visible_project_or_404(request.user, project_id)
 
     if request.method == "POST":
         form = IssueForm(request.POST, request.FILES)
@@ -647,58 +736,114 @@ def issue_create(request, project_id):
     )
 
 
-#---------------------TEAM-LEAD---------------------------------------------------------#
+#---------------------STATUS FEEDS (lead + boss)----------------------------------------#
 
-class TeamLeadDashboardView(LoginRequiredMixin, TemplateView):
-    template_name = "board/teamlead_dashboard.html"
+class StatusFeedMixin:
+    """
+    Newest-first feed of board-visible issues for the member status pages.
 
-    def get_projects_for_lead(self, user):
-        """
-        Return projects the lead should see.
-        Currently returns projects where the user is owner OR member.
-        """
-        return Project.objects.filter(Q(owner=user) | Q(members=user)).distinct()
+    The page renders the first slice; the "Load older" button calls the
+    same view with ``fragment=True`` (see urls.py) and a ``?cursor=``,
+    which answers with the next slice as an HTML fragment in JSON.
+    Paging is keyset-based on (created_at, id), see board.pagination.
+    """
+    feed_page_size = 25
+    feed_days = 60
+    feed_rows_template = None
+    fragment = False
 
-    def get_context_data(self, **kwargs):
-        ctx = super().get_context_data(**kwargs)
-        user = self.request.user
+    def get_feed_projects(self, user):
+        raise NotImplementedError
 
-        projects = self.get_projects_for_lead(user)
+    def get_feed_project_ids(self, user):
+        """Ids of the projects in the feed, or None for every project."""
+        return visible_project_ids(user)
 
+    def get_feed_queryset(self, project_ids):
         # optional: recent timeframe (remove filter to show all)
-        recent_cutoff = timezone.now() - timezone.timedelta(days=60)
-
-        # Fetch board-visible issues in those projects, newest first.
-        # These are the items a Lead will want to review.
-        # We pull related() to include assignee and project for the template.
-        status_updates = (
+        recent_cutoff = timezone.now() - timezone.timedelta(days=self.feed_days)
+        qs = (
             Issue.objects
-                 .filter(project__in=projects, show_on_board=True)
-                 .filter(created_at__gte=recent_cutoff)
+                 .filter(show_on_board=True, created_at__gte=recent_cutoff)
                  .select_related("project", "assignee")
-                 .order_by("-created_at")
         )
+        # Every page has to be a seek along (created_at, id), never a sort
+        # of the whole window (see HotQueryPlanTests.test_status_feed_*).
+        if project_ids is None:
+            # everything: board_issue_feed_idx is already in feed order
+            return qs
+        if len(project_ids) <= 1:
+            # one project: so is its stretch of board_issue_on_board_idx
+            return qs.filter(project_id__in=project_ids)
+        # Several projects: seeking each on board_issue_on_board_idx would
+        # leave their rows to be merged by a sort. "project_id + 0" can't
+        # use that index, so SQLite walks board_issue_feed_idx newest
+        # first and checks the project on the index entry instead.
+        return qs.alias(feed_project=F("project_id") + 0).filter(feed_project__in=sorted(project_ids))
+
+    def get(self, request, *args, **kwargs):
+        if not self.fragment:
+            return super().get(request, *args, **kwargs)
+
+        project_ids = self.get_feed_project_ids(request.user)
+        try:
+            items, next_cursor = KeysetPaginator(
+                self.get_feed_queryset(project_ids), self.feed_page_size
+            ).page(request.GET.get("cursor"))
+        except InvalidCursor:
+            return HttpResponseBadRequest("Invalid cursor.")
+
+        html = render_to_string(
+            self.feed_rows_template, {"status_updates": items}, request=request
+        )
+        return JsonResponse({"html": html, "next_cursor": next_cursor})
 
-        # If you prefer to only show items created via the "status" action
-        # (where title == "Status update"), uncomment the next line:
-        # status_updates = status_updates.filter(title__iexact="Status update")
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        projects = self.get_feed_projects(self.request.user)
+
+        # Fetch board-visible issues in those projects, newest first.
+        # select_related() pulls assignee and project for the template.
+        items, next_cursor = KeysetPaginator(
+            self.get_feed_queryset(self.get_feed_project_ids(self.request.user)), self.feed_page_size
+        ).page()
 
-        ctx["status_updates"] = status_updates
+        ctx["status_updates"] = items
+        ctx["next_cursor"] = next_cursor
         ctx["projects"] = projects
         return ctx
 
+
+#---------------------TEAM-LEAD---------------------------------------------------------#
+
+class TeamLeadDashboardView(LoginRequiredMixin, StatusFeedMixin, TemplateView):
+    template_name = "board/teamlead_dashboard.html"
+    feed_rows_template = "board/_teamlead_status_rows.html"
+
+    def get_projects_for_lead(self, user):
+        """
+        Return projects the lead should see.
+        Currently returns projects where the user is owner OR member.
+        """
+        return visible_projects(user)
+
+    def get_feed_projects(self, user):
+        return self.get_projects_for_lead(user)
+
 #----------------------------Boss-team-view----------------------------------------#
-class BossDashboardView(LoginRequiredMixin, TemplateView):
+class BossDashboardView(LoginRequiredMixin, StatusFeedMixin, TemplateView):
     template_name = "board/boss_dashboard.html"
+    feed_rows_template = "board/_boss_status_rows.html"
 
     def get_projects_for_boss(self, user):
         """
         Boss should see ALL projects (across all team leads / departments).
+        Anyone else who opens this page only gets their visible projects.
 
         If later you want to restrict by the boss's department,
         you can add a filter here.
         """
-        projects = Project.objects.all()
+        projects = visible_projects(user)
 
         # If your Project has a department field and you want
         # the boss to only see one department, uncomment this:
@@ -707,28 +852,10 @@ class BossDashboardView(LoginRequiredMixin, TemplateView):
         # if profile and profile.department:
         #     projects = projects.filter(department=profile.department)
 
-        return projects.distinct()
+        return projects
 
-    def get_context_data(self, **kwargs):
-        ctx = super().get_context_data(**kwargs)
-        user = self.request.user
-
-        # now this includes *all* projects the boss should see
-        projects = self.get_projects_for_boss(user)
-
-        # last 60 days of status updates on those projects
-        recent_cutoff = timezone.now() - timezone.timedelta(days=60)
-        status_updates = (
-            Issue.objects
-                 .filter(project__in=projects, show_on_board=True)
-                 .filter(created_at__gte=recent_cutoff)
-                 .select_related("project", "assignee")
-                 .order_by("-created_at")
-        )
-
-        ctx["status_updates"] = status_updates
-        ctx["projects"] = projects
-        return ctx
+    def get_feed_projects(self, user):
+        return self.get_projects_for_boss(user)
 
     
 
@@ -741,7 +868,7 @@ def project_delete(request, pk):
     Allow only LEAD and BOSS to delete a project.
     (You can tighten this rule if you want to restrict to project.owner etc.)
     """
-    project = get_object_or_404(Project, pk=pk)
+    project = get_visible_project_or_404(request.user, pk)
 
     # Get role safely
     profile = getattr(request.user, "profile", None)
@@ -797,12 +924,11 @@ def otp_login_request(request):
             EmailOTP.objects.create(user=user, email=email, code=code)
 
             # Send OTP by email
-            send_mail(
+            enqueue(
+                "board.send_mail",
                 subject="Your login code",
                 message=f"Your login code is: {code}\n\nIt expires in 10 minutes.",
-                from_email=None,
                 recipient_list=[email],
-                fail_silently=False,
             )
 
             # Optionally remember the email in session for convenience
@@ -930,7 +1056,8 @@ class InviteUserView(View):
         profile.save()
 
         # Optional: send them a welcome email with instructions
-        send_mail(
+        enqueue(
+            "board.send_mail",
             subject="You’ve been added to G-Track dashboard",
             message=(
                 "Hi,\n\n"
@@ -939,9 +1066,7 @@ class InviteUserView(View):
                 "and use the one-time code you receive.\n\n"
                 "Login page: https://garagecollective.agency/G-track/login/otp/\n"
             ),
-            from_email=None,
             recipient_list=[email],
-            fail_silently=True,
         )
 
         messages.success(
@@ -955,10 +1080,13 @@ class InviteUserView(View):
 
 #-------------------------------------------------Notification-------------------------------------------------------------------#
 
+@method_decorator(conditional_page(notifications_etag), name="get")
 class NotificationListView(LoginRequiredMixin, ListView):
     model = Notification
     template_name = "board/notifications.html"
     context_object_name = "notifications"
+    page_size = 30
+    fragment = False
 
     def get_queryset(self):
         return (
@@ -967,17 +1095,94 @@ class NotificationListView(LoginRequiredMixin, ListView):
             .select_related("project")
         )
 
+    def get(self, request, *args, **kwargs):
+        # newest page only; older rows come from the feed endpoint
+        try:
+            self.object_list, self.next_cursor = KeysetPaginator(
+                self.get_queryset(), self.page_size, field="last_occurred_at"
+            ).page(request.GET.get("cursor"))
+        except InvalidCursor:
+            return HttpResponseBadRequest("Invalid cursor.")
+
+        if self.fragment:
+            html = render_to_string(
+                "board/_notification_rows.html",
+                {"notifications": self.object_list},
+                request=request,
+            )
+            return JsonResponse({"html": html, "next_cursor": self.next_cursor})
+        return self.render_to_response(self.get_context_data())
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["next_cursor"] = self.next_cursor
+        return ctx
+
     def post(self, request, *args, **kwargs):
         # Mark all current user's notifications as read
-        Notification.objects.filter(
-            user=request.user,
-            is_read=False
-        ).update(is_read=True)
+        mark_all_read(request.user)
 
         messages.success(request, "All notifications marked as read.")
         return redirect("notifications")
+
+
+@login_required
+@require_POST
+def notification_mark_read(request, pk):
+    mark_read(request.user, pk)
+    if request.headers.get("x-requested-with") == "XMLHttpRequest":
+        return JsonResponse({"unread": unread_count(request.user.pk)})
+    return redirect("notifications")
     
 
+SSE_HEARTBEAT_SECONDS = 25
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def notification_stream(request):
+    """
+    Server-sent events for the bell: ``unread`` on connect and after
+    mark-all-read, ``notification`` for every new Notification.
+
+    Needs the ASGI entry point (company_jira.asgi) so idle connections
+    only cost a parked coroutine. Under WSGI we answer 204, which tells
+    EventSource to stop reconnecting; the page still works without it.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+
+    unread = await sync_to_async(unread_count)(user.pk)
+
+    async def stream():
+        # subscribe inside the generator so the finally always pairs with it
+        subscription = get_broker().subscribe(user.pk)
+        try:
+            yield "retry: 5000\n\n"
+            yield _sse("unread", {"type": "unread", "unread": unread})
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse(event["type"], event)
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: don't buffer the stream
+    return response
+
+
 #-------------------------Edit Members----------------------------------------------#
 
 class ProjectMembersUpdateView(LoginRequiredMixin, UpdateView):
@@ -985,6 +1190,9 @@ class ProjectMembersUpdateView(LoginRequiredMixin, UpdateView):
     form_class = ProjectMembersForm
     template_name = "board/project_members_form.html"
 
+    def get_queryset(self):
+        return visible_projects(self.request.user)
+
     def dispatch(self, request, *args, **kwargs):
         role = getattr(request.user.profile, "role", None)
         if role not in ("BOSS", "LEAD"):
@@ -995,3 +1203,171 @@ class ProjectMembersUpdateView(LoginRequiredMixin, UpdateView):
     def get_success_url(self):
         messages.success(self.request, "Project members updated.")
         return reverse("project_board", kwargs={"pk": self.object.pk})
+
+
+#-------------------------------------------------User picker-------------------------------------------------------------------#
+
+USER_AUTOCOMPLETE_LIMIT = 10
+USER_AUTOCOMPLETE_TIMEOUT = 60  # seconds; new accounts show up within a minute
+
+
+@login_required
+def user_autocomplete(request):
+    """
+    JSON for the typeahead user pickers (board.widgets): active users
+    whose username, first / last name or email starts with ``q``.
+    """
+    query = request.GET.get("q", "").strip().lower()[:50]
+    if not query:
+        return JsonResponse({"results": []})
+
+    key = f"board:user-autocomplete:{hashlib.sha1(query.encode()).hexdigest()}"
+    results = cache.get(key)
+    if results is None:
+        users = (
+            User.objects.filter(is_active=True)
+            .filter(
+                Q(username__istartswith=query)
+                | Q(first_name__istartswith=query)
+                | Q(last_name__istartswith=query)
+                | Q(email__istartswith=query)
+            )
+            .order_by("username")
+            .values("pk", "username", "first_name", "last_name", "email")[:USER_AUTOCOMPLETE_LIMIT]
+        )
+        results = []
+        for u in users:
+            full_name = f"{u['first_name']} {u['last_name']}".strip()
+            label = " · ".join(part for part in (u["username"], full_name, u["email"]) if part)
+            results.append({"id": u["pk"], "text": u["username"], "label": label})
+        cache.set(key, results, USER_AUTOCOMPLETE_TIMEOUT)
+
+    return JsonResponse({"results": results})
+
+
+#-------------------------------------------------Search-------------------------------------------------------------------#
+
+SEARCH_PAGE_SIZE = 20
+
+
+@login_required
+def search(request):
+    query = request.GET.get("q", "").strip()
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        page = 1
+
+    hits, has_next = [], False
+    if query:
+        hits, has_next = board_search.search(request.user, query, page, SEARCH_PAGE_SIZE)
+
+    return render(request, "board/search.html", {
+        "query": query,
+        "hits": hits,
+        "page": page,
+        "has_next": has_next,
+        "previous_page": page - 1,
+        "next_page": page + 1,
+    })
+
+
+#-------------------------------------------------Chunked uploads-------------------------------------------------------------------#
+
+_CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+
+def _upload_json(upload, status=200):
+    return JsonResponse({
+        "id": str(upload.pk),
+        "filename": upload.filename,
+        "size": upload.size,
+        "received": upload.received,
+        "complete": upload.status == ChunkedUpload.STATUS_COMPLETE,
+        "chunk_size": uploads.CHUNK_BYTES,
+        "url": reverse("upload_detail", args=[upload.pk]),
+    }, status=status)
+
+
+def _upload_error(exc):
+    data = {"error": str(exc)}
+    if isinstance(exc, uploads.OffsetMismatch):
+        data["received"] = exc.received
+    return JsonResponse(data, status=exc.status)
+
+
+@login_required
+@require_POST
+def upload_start(request):
+    """
+    Begin a chunked upload. Form fields: ``target`` ("issue" or
+    "project"), ``target_id``, ``filename`` and ``size`` in bytes.
+    """
+    try:
+        target_id = int(request.POST.get("target_id", ""))
+        size = int(request.POST.get("size", ""))
+    except ValueError:
+        return JsonResponse({"error": "target_id and size must be integers."}, status=400)
+
+    try:
+        upload = uploads.start_upload(
+            request.user,
+            request.POST.get("target", ""),
+            target_id,
+            request.POST.get("filename", ""),
+            size,
+        )
+    except uploads.UploadRejected as exc:
+        return _upload_error(exc)
+    return _upload_json(upload, status=201)
+
+
+@login_required
+@require_http_methods(["GET", "PUT", "DELETE"])
+def upload_detail(request, upload_id):
+    """
+    GET: how many bytes have arrived (where to resume).
+    PUT: one chunk as the raw request body, placed by a
+    ``Content-Range: bytes <first>-<last>/<size>`` header.
+    DELETE: cancel the upload.
+    """
+    upload = get_object_or_404(ChunkedUpload, pk=upload_id, user=request.user)
+
+    if request.method == "DELETE":
+        uploads.abort_upload(upload)
+        return HttpResponse(status=204)
+
+    if request.method == "PUT":
+        match = _CONTENT_RANGE.match(request.headers.get("Content-Range", ""))
+        if not match:
+            return JsonResponse({"error": "A Content-Range header is required."}, status=400)
+        first, last, total = (int(g) for g in match.groups())
+        if total != upload.size or last < first:
+            return JsonResponse({"error": "Content-Range doesn't match this upload."}, status=400)
+        try:
+            # read straight from the request stream; request.body would buffer it all
+            uploads.write_chunk(upload, first, request, length=last - first + 1)
+        except uploads.UploadRejected as exc:
+            return _upload_error(exc)
+
+    return _upload_json(upload)
+
+
+@login_required
+@require_POST
+def upload_complete(request, upload_id):
+    upload = get_object_or_404(ChunkedUpload, pk=upload_id, user=request.user)
+    try:
+        attachment = uploads.complete_upload(upload)
+    except uploads.UploadRejected as exc:
+        return _upload_error(exc)
+
+    if upload.target == ChunkedUpload.TARGET_ISSUE:
+        redirect_url = reverse("issue_detail", args=[upload.target_id])
+    else:
+        redirect_url = reverse("project_board", args=[upload.target_id])
+    return JsonResponse({
+        "attachment_id": attachment.pk,
+        "filename": attachment.filename(),
+        "redirect": redirect_url,
+    })
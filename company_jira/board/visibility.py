@@ -0,0 +1,127 @@
+# board/visibility.py
+"""
+Which projects can a user see?
+
+  - BOSS: every project
+  - everyone else: projects they own or are a member of
+
+The answer is computed once per user and cached as a set of project ids,
+so views check ``pk in ids`` instead of re-running the owner/members
+join. The cache key carries Profile.visibility_changed_at, which
+board.signals moves when Project.members or Project.owner change (and
+any Profile save moves by itself). The stamp lives in the database, so
+a change made by one process is seen by all of them on their next
+request, even with a per-process cache.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from .models import Issue, Profile, Project
+
+VISIBILITY_TIMEOUT = getattr(settings, "BOARD_VISIBILITY_TIMEOUT", 60 * 60)
+
+
+def _cache_key(user_id, changed_at):
+    return f"board:visible-projects:{user_id}:{changed_at.timestamp()}"
+
+
+def _compute(user, role):
+    if role == Profile.ROLE_BOSS:
+        return {"all": True, "ids": (), "role": role}
+
+    ids = Project.objects.filter(
+        Q(owner=user) | Q(members=user)
+    ).values_list("pk", flat=True).distinct()
+    return {"all": False, "ids": tuple(ids), "role": role}
+
+
+def _entry(user):
+    if not user.is_authenticated:
+        return {"all": False, "ids": (), "role": None}
+
+    # one lookup per request even if several checks run
+    cached = getattr(user, "_visible_projects", None)
+    if cached is None:
+        profile = Profile.objects.filter(user=user).values_list("role", "visibility_changed_at").first()
+        if profile is None:
+            # nothing to version the entry by; rare enough to just compute
+            cached = _compute(user, None)
+        else:
+            key = _cache_key(user.pk, profile[1])
+            cached = cache.get(key)
+            if cached is None:
+                cached = _compute(user, profile[0])
+                cache.set(key, cached, VISIBILITY_TIMEOUT)
+        user._visible_projects = cached
+    return cached
+
+
+def sees_all_projects(user):
+    return _entry(user)["all"]
+
+
+def cached_role(user):
+    """The user's Profile.role as of the cached entry (None without a profile)."""
+    return _entry(user).get("role")
+
+
+def visible_project_ids(user):
+    """
+    Frozenset of project ids ``user`` may see, or None when the user
+    sees every project (bosses).
+    """
+    entry = _entry(user)
+    if entry["all"]:
+        return None
+    return frozenset(entry["ids"])
+
+
+def visible_projects(user):
+    """Queryset of the projects ``user`` may see (no join, no distinct)."""
+    ids = visible_project_ids(user)
+    if ids is None:
+        return Project.objects.all()
+    return Project.objects.filter(pk__in=ids)
+
+
+def can_view_project(user, project):
+    project_id = getattr(project, "pk", project)
+    ids = visible_project_ids(user)
+    return ids is None or project_id in ids
+
+
+def can_view_issue(user, issue):
+    """
+    Issues are visible through their project, and also to their assignee
+    and members (My Tasks links to issues on projects the user is not a
+    member of).
+    """
+    if can_view_project(user, issue.project_id):
+        return True
+    if user.is_authenticated and issue.assignee_id == user.pk:
+        return True
+    return user.is_authenticated and issue.members.filter(pk=user.pk).exists()
+
+
+def get_visible_project_or_404(user, pk, queryset=None):
+    if not can_view_project(user, int(pk)):
+        raise Http404("No Project matches the given query.")
+    return get_object_or_404(queryset if queryset is not None else Project, pk=pk)
+
+
+def get_visible_issue_or_404(user, pk, queryset=None):
+    issue = get_object_or_404(queryset if queryset is not None else Issue, pk=pk)
+    if not can_view_issue(user, issue):
+        raise Http404("No Issue matches the given query.")
+    return issue
+
+
+def invalidate_visible_projects(*user_ids):
+    """Move the users' stamps, so every process stops using their cached entries."""
+    ids = {uid for uid in user_ids if uid}
+    if ids:
+        Profile.objects.filter(user_id__in=ids).update(visibility_changed_at=timezone.now())
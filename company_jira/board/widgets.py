@@ -0,0 +1,47 @@
+# board/widgets.py
+"""
+User pickers that render only the users already chosen.
+
+A plain Select over User.objects renders every account as an <option>
+on every page that shows the form. These widgets emit just the selected
+users plus a ``data-autocomplete-url``; static/js/user_picker.js adds a
+search box that fetches more from ``user_autocomplete`` as you type.
+The form field still validates submitted ids against its queryset, so
+only the posted ids are looked up.
+"""
+from django import forms
+from django.contrib.auth import get_user_model
+from django.urls import reverse_lazy
+
+User = get_user_model()
+
+
+class _LazyUserChoicesMixin:
+    def __init__(self, attrs=None, choices=()):
+        attrs = {"data-autocomplete-url": reverse_lazy("user_autocomplete"), **(attrs or {})}
+        super().__init__(attrs, choices)
+
+    def optgroups(self, name, value, attrs=None):
+        # a re-rendered invalid form can carry anything the client posted
+        chosen = []
+        for v in value:
+            try:
+                chosen.append(int(v))
+            except (TypeError, ValueError):
+                pass
+        choices = [] if self.allow_multiple_selected else [("", "---------")]
+        choices += [
+            (user.pk, user.get_username())
+            for user in User.objects.filter(pk__in=chosen).order_by("username")
+        ]
+        # render from this short list instead of the field's full queryset
+        self.choices = choices
+        return super().optgroups(name, value, attrs)
+
+
+class UserSelect(_LazyUserChoicesMixin, forms.Select):
+    pass
+
+
+class UserSelectMultiple(_LazyUserChoicesMixin, forms.SelectMultiple):
+    pass
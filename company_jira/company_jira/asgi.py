@@ -3,6 +3,10 @@ ASGI config for company_jira project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve through this entry point (e.g. ``uvicorn company_jira.asgi:application``)
+to enable the live notification stream at /notifications/stream/; under
+WSGI that endpoint answers 204 and the bell only updates on page loads.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
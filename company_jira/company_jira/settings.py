@@ -88,6 +88,77 @@ DATABASES = {
 }
 
 
+# Cache
+# LocMemCache is per process. Lookups that are dropped on writes (the
+# nav badge issue counts) are only cached across requests when
+# BOARD_SHARED_CACHE is True, i.e. when every worker uses the same cache
+# (Redis, Memcached or django.core.cache.backends.db.DatabaseCache);
+# otherwise they are computed per request. `manage.py check` refuses
+# BOARD_SHARED_CACHE = True over a per-process backend.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+BOARD_SHARED_CACHE = False
+
+BOARD_NAV_COUNTS_TIMEOUT = 10 * 60  # seconds
+
+# Live notification stream (server-sent events, served via asgi.py).
+# The in-process broker only reaches clients connected to the same
+# process; use a shared broker when running several ASGI workers.
+BOARD_EVENT_BROKER = "board.events.InProcessBroker"
+
+# Rows per INSERT when fanning a notification out to many recipients.
+BOARD_NOTIFICATION_BATCH_SIZE = 500
+# Repeat activity (same recipient, project and kind) within this many
+# minutes updates the existing unread notification. 0 disables merging.
+BOARD_NOTIFICATION_COALESCE_MINUTES = 15
+# `manage.py purge_notifications` deletes read notifications older than
+# this; unread ones are kept whatever their age.
+BOARD_NOTIFICATION_RETENTION_DAYS = 90
+
+# Background jobs (board.jobs). Run `python manage.py run_worker` next to
+# the web server; with BOARD_JOBS_EAGER the web process runs each job
+# itself right after commit (development without a worker).
+BOARD_JOBS_EAGER = False
+BOARD_JOB_LEASE_SECONDS = 5 * 60
+BOARD_JOB_BACKOFF_SECONDS = 30  # doubled on every retry
+
+# Full-text search (board.search): how deep paging through the ranked
+# results can go; later pages come back empty.
+BOARD_SEARCH_MAX_RESULTS = 1000
+
+# Chunked attachment uploads (board.uploads). Limits apply per file and
+# to the total size of one user's unfinished uploads; unfinished uploads
+# older than BOARD_UPLOAD_EXPIRY_HOURS are removed by
+# `manage.py purge_stale_uploads`.
+BOARD_UPLOAD_MAX_BYTES = 2 * 1024 ** 3
+BOARD_UPLOAD_QUOTA_BYTES = 5 * 1024 ** 3
+BOARD_UPLOAD_CHUNK_BYTES = 8 * 1024 ** 2
+BOARD_UPLOAD_EXPIRY_HOURS = 24
+
+# Attachment downloads (board.downloads). Access is checked in Django and
+# the bytes are sent by the front proxy when a backend is set:
+#   "nginx"  - X-Accel-Redirect to BOARD_SENDFILE_URL_PREFIX + file name,
+#              which needs an internal location such as
+#                  location /protected-media/ { internal; alias /path/to/media/; }
+#   "apache" - X-Sendfile with the absolute path (mod_xsendfile)
+# None streams the file from Django, with Range / If-None-Match support.
+BOARD_SENDFILE_BACKEND = None
+BOARD_SENDFILE_URL_PREFIX = "/protected-media/"
+
+# Attachment thumbnails (board.previews), rendered by the job worker.
+# Images need Pillow; PDFs also need PyMuPDF or poppler's pdftoppm.
+BOARD_THUMBNAIL_SIZE = (320, 320)
+BOARD_THUMBNAIL_MAX_PIXELS = 80_000_000
+
+# `manage.py collect_orphaned_media` only deletes unreferenced files older
+# than this, so uploads whose row isn't committed yet are never touched.
+BOARD_MEDIA_GC_GRACE_HOURS = 24
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -129,6 +200,13 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Uploads are fanned out into hashed subdirectories (board/storage.py);
+# `manage.py migrate_media_layout` moves files saved before that.
+STORAGES = {
+    "default": {"BACKEND": "board.storage.ShardedFileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,106 @@
+// Chunked, resumable uploads for <form data-chunked-upload> (board/uploads.py).
+// Without JS the form still posts the file as plain multipart. With it, the
+// file goes up in chunks; a failed chunk is retried from the offset the
+// server reports, so a flaky connection never restarts the whole file.
+(function () {
+  const MAX_RETRIES = 5;
+
+  function csrfToken(form) {
+    const input = form.querySelector("input[name=csrfmiddlewaretoken]");
+    return input ? input.value : "";
+  }
+
+  function sleep(ms) {
+    return new Promise(function (resolve) { setTimeout(resolve, ms); });
+  }
+
+  function request(method, url, token, body, headers) {
+    const opts = { method: method, credentials: "same-origin", headers: headers || {} };
+    opts.headers["X-CSRFToken"] = token;
+    if (body !== undefined) opts.body = body;
+    return fetch(url, opts).then(function (resp) {
+      return resp.json().catch(function () { return {}; }).then(function (data) {
+        data.httpStatus = resp.status;
+        return data;
+      });
+    });
+  }
+
+  async function upload(form, file, progress) {
+    const token = csrfToken(form);
+    const params = new FormData();
+    params.append("target", form.dataset.target);
+    params.append("target_id", form.dataset.targetId);
+    params.append("filename", file.name);
+    params.append("size", file.size);
+
+    const info = await request("POST", form.dataset.startUrl, token, params);
+    if (info.httpStatus !== 201) throw new Error(info.error || "Could not start the upload.");
+
+    let offset = 0;
+    let failures = 0;
+    while (offset < file.size) {
+      const end = Math.min(offset + info.chunk_size, file.size);
+      let result;
+      try {
+        result = await request("PUT", info.url, token, file.slice(offset, end), {
+          "Content-Range": "bytes " + offset + "-" + (end - 1) + "/" + file.size,
+          "Content-Type": "application/octet-stream",
+        });
+      } catch (err) {
+        result = { httpStatus: 0 };
+      }
+
+      if (result.httpStatus === 200 || result.httpStatus === 409) {
+        offset = result.received;  // 409: resume where the server is
+        failures = 0;
+      } else if (result.httpStatus === 0 || result.httpStatus >= 500) {
+        if (++failures > MAX_RETRIES) throw new Error("Upload interrupted.");
+        await sleep(1000 * failures);
+        // ask where to resume; part of the chunk may have made it
+        const status = await request("GET", info.url, token).catch(function () { return {}; });
+        if (status.httpStatus === 200) offset = status.received;
+      } else {
+        throw new Error(result.error || "Upload rejected.");
+      }
+      progress.value = file.size ? offset / file.size : 1;
+    }
+
+    const done = await request("POST", info.url + "complete/", token);
+    if (done.httpStatus !== 200) throw new Error(done.error || "Could not finish the upload.");
+    return done;
+  }
+
+  function bind(form) {
+    const input = form.querySelector("input[type=file]");
+    if (!input || !window.fetch) return;
+
+    const progress = document.createElement("progress");
+    progress.max = 1;
+    progress.value = 0;
+    progress.hidden = true;
+    form.appendChild(progress);
+
+    form.addEventListener("submit", async function (e) {
+      if (!input.files.length) return;
+      e.preventDefault();
+      progress.hidden = false;
+      let redirect = window.location.href;
+      try {
+        for (const file of input.files) {
+          progress.value = 0;
+          redirect = (await upload(form, file, progress)).redirect || redirect;
+        }
+      } catch (err) {
+        progress.hidden = true;
+        window.alert(err.message);
+        return;
+      }
+      window.location.href = redirect;
+    });
+  }
+
+  document.addEventListener("DOMContentLoaded", function () {
+    document.querySelectorAll("form[data-chunked-upload]").forEach(bind);
+  });
+})();
@@ -0,0 +1,69 @@
+// Typeahead for <select data-autocomplete-url> user pickers (board/widgets.py).
+// The select only contains the chosen users; typing in the box above it
+// fetches matches and picking one adds it as a selected <option>.
+(function () {
+  function debounce(fn, ms) {
+    let timer;
+    return function () {
+      const args = arguments;
+      clearTimeout(timer);
+      timer = setTimeout(function () { fn.apply(null, args); }, ms);
+    };
+  }
+
+  function choose(select, user) {
+    let option = select.querySelector('option[value="' + user.id + '"]');
+    if (!option) {
+      option = new Option(user.text, user.id);
+      select.appendChild(option);
+    }
+    if (!select.multiple) select.value = String(user.id);
+    option.selected = true;
+    select.dispatchEvent(new Event("change", { bubbles: true }));
+  }
+
+  function attach(select) {
+    if (select.dataset.pickerBound) return;
+    select.dataset.pickerBound = "1";
+
+    const box = document.createElement("input");
+    box.type = "search";
+    box.placeholder = "Type a name or email…";
+    box.className = "user-picker-search";
+    box.autocomplete = "off";
+
+    const list = document.createElement("ul");
+    list.className = "user-picker-results";
+
+    select.parentNode.insertBefore(box, select);
+    select.parentNode.insertBefore(list, select);
+
+    const lookup = debounce(function (q) {
+      if (q.length < 1) { list.innerHTML = ""; return; }
+      fetch(select.dataset.autocompleteUrl + "?q=" + encodeURIComponent(q), { credentials: "same-origin" })
+        .then(function (resp) { return resp.json(); })
+        .then(function (data) {
+          if (box.value.trim() !== q) return; // a newer request is on its way
+          list.innerHTML = "";
+          data.results.forEach(function (user) {
+            const li = document.createElement("li");
+            li.textContent = user.label;
+            li.addEventListener("mousedown", function (e) {
+              e.preventDefault();
+              choose(select, user);
+              box.value = "";
+              list.innerHTML = "";
+            });
+            list.appendChild(li);
+          });
+        });
+    }, 200);
+
+    box.addEventListener("input", function () { lookup(box.value.trim()); });
+    box.addEventListener("blur", function () { list.innerHTML = ""; });
+  }
+
+  document.addEventListener("DOMContentLoaded", function () {
+    document.querySelectorAll("select[data-autocomplete-url]").forEach(attach);
+  });
+})();